@@ -3,30 +3,31 @@ Authentication helpers for FastAPI routes
 """
 
 import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
-from database import get_supabase_client
+from cache import TTLCache
+from database import get_db
+from repository import get_user
 from models import UserResponse
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer(auto_error=False)
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-me-in-production-at-least-32-characters-long")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Principal cache: user id -> UserResponse, and token -> user id
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
 
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+_principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL, name="principals")
+_token_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL, name="tokens")
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -38,12 +39,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def _decode_token(token: str) -> Optional[str]:
+    user_id = _token_cache.get(token)
+    if user_id is not None:
+        return user_id
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: Optional[str] = payload.get("sub")
-        return user_id
     except JWTError:
         return None
+    user_id = payload.get("sub")
+    if user_id:
+        # Never keep a token in the cache past its own expiry
+        exp = payload.get("exp")
+        ttl = exp - time.time() if exp else PRINCIPAL_CACHE_TTL
+        _token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
+
+def invalidate_principal(user_id: str) -> None:
+    """Drop a cached user so the next request reloads it from the database"""
+    _principal_cache.invalidate(user_id)
+
+
+def cache_stats() -> dict:
+    return {"principals": _principal_cache.stats(), "tokens": _token_cache.stats()}
 
 
 async def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)) -> UserResponse:
@@ -53,12 +71,15 @@ async def get_current_user(creds: HTTPAuthorizationCredentials = Depends(securit
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    supabase = get_supabase_client()
-    result = supabase.table("users").select("*").eq("id", user_id).limit(1).execute()
-    if not result.data:
+    user = _principal_cache.get(user_id)
+    if user is not None:
+        return user
+
+    db = get_db()
+    u = await get_user(db, user_id)
+    if u is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    u = result.data[0]
-    return UserResponse(
+    user = UserResponse(
         id=u["id"],
         name=u["name"],
         email=u["email"],
@@ -67,6 +88,8 @@ async def get_current_user(creds: HTTPAuthorizationCredentials = Depends(securit
         agent_license=u.get("agent_license"),
         created_at=u["created_at"],
     )
+    _principal_cache.set(user_id, user)
+    return user
 
 
 async def get_current_user_optional(creds: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Optional[UserResponse]:
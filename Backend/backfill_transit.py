@@ -0,0 +1,89 @@
+"""
+Backfill the transit columns of existing listings
+
+Reads every listing (active or not) in keyset chunks by id, computes its
+nearest station and the stations within TRANSIT_RADIUS_M from ``lat`` /
+``lng`` (see ``transit``), and writes only the rows whose stored values
+differ, with one ``bulk_update_properties`` call per owner per chunk.
+Listings whose coordinates were cleared get their transit columns cleared
+too, in one plain update per chunk (the bulk function keeps the stored
+value of a null field). Safe to re-run, e.g. after the gazetteer or TRANSIT_RADIUS_M changes. Running
+workers pick the new values up at their next catalogue refresh.
+
+Usage:
+    python backfill_transit.py [--chunk 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import Database, close_db, get_db  # noqa: E402
+from transit import TRANSIT_COLUMNS, transit_fields  # noqa: E402
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+async def backfill(db: Database, chunk_size: int = BACKFILL_CHUNK_SIZE, dry_run: bool = False) -> Tuple[int, int]:
+    """``(listings scanned, listings updated)``"""
+    scanned = updated = 0
+    last = None
+    while True:
+        query = db.table("properties").select(",".join(("id", "owner_id", "lat", "lng", *TRANSIT_COLUMNS)))
+        if last is not None:
+            query = query.gt("id", last)
+        rows = (await query.order("id").limit(chunk_size).execute()).data
+        by_owner: Dict[str, List[Dict[str, Any]]] = {}
+        cleared: List[str] = []
+        for row in rows:
+            fields = transit_fields(row.get("lat"), row.get("lng"))
+            if all(row.get(k) == v for k, v in fields.items()):
+                continue
+            if fields["nearest_station"] is None:
+                cleared.append(row["id"])
+            else:
+                by_owner.setdefault(row["owner_id"], []).append({"id": row["id"], **fields})
+        if dry_run:
+            updated += sum(len(items) for items in by_owner.values()) + len(cleared)
+        else:
+            writes = [
+                db.rpc("bulk_update_properties", {"p_owner_id": owner, "p_items": items}).execute()
+                for owner, items in by_owner.items()
+            ]
+            if cleared:
+                # Only rows still without coordinates: one moved since the read keeps its values
+                writes.append(
+                    db.table("properties").update(dict.fromkeys(TRANSIT_COLUMNS))
+                    .in_("id", cleared).or_("lat.is.null,lng.is.null").execute()
+                )
+            results = await asyncio.gather(*writes)
+            # Count the rows the database wrote, not the ones sent
+            updated += sum(len(result.data) for result in results)
+        scanned += len(rows)
+        if len(rows) < chunk_size:
+            return scanned, updated
+        last = rows[-1]["id"]
+
+
+async def run(args) -> None:
+    try:
+        scanned, updated = await backfill(get_db(), args.chunk, args.dry_run)
+        verb = "would be updated" if args.dry_run else "updated"
+        print(f"✅ Transit columns: {updated} of {scanned} listings {verb}")
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk", type=int, default=BACKFILL_CHUNK_SIZE, help="Listings read per query")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the listings that need updating")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: blocking Supabase calls vs the shared async PostgREST client
+
+Simulates a PostgREST upstream with a fixed round-trip latency and fires
+N concurrent "requests" at each concurrency level. The blocking variant
+mimics calling the sync client inside an ``async def`` route (the whole
+event loop waits for every round-trip); the async variant awaits the
+shared ``AsyncPostgrestClient``.
+
+Usage:
+    python benchmarks/bench_async_db.py [--latency-ms 20] [--requests 400]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rest_client import AsyncPostgrestClient  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_blocking(latency: float, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await asyncio.sleep(0)  # request waits for its turn on the loop
+            time.sleep(latency)  # sync client: the event loop is blocked
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return samples, time.perf_counter() - start
+
+
+async def run_async(latency: float, total: int, concurrency: int):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json=[{"id": "1"}])
+
+    client = AsyncPostgrestClient(
+        "http://postgrest.local",
+        "anon",
+        max_connections=concurrency,
+        transport=httpx.MockTransport(handler),
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await client.table("properties").select("*").eq("is_active", True).limit(10).execute()
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return samples, elapsed
+
+
+def report(name, concurrency, samples, elapsed):
+    print(
+        f"{name:<9} c={concurrency:<4} "
+        f"p50={statistics.median(samples) * 1000:8.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.1f}ms "
+        f"throughput={len(samples) / elapsed:8.1f} req/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    for concurrency in args.concurrency:
+        # Keep the blocking run short: it is serialised by design
+        blocking_total = min(args.requests, 100)
+        samples, elapsed = await run_blocking(latency, blocking_total, concurrency)
+        report("blocking", concurrency, samples, elapsed)
+        samples, elapsed = await run_async(latency, args.requests, concurrency)
+        report("async", concurrency, samples, elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
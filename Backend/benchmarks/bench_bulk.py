@@ -0,0 +1,84 @@
+"""
+Benchmark: loading a listing feed one request at a time vs in bulk
+
+Runs against a simulated PostgREST (httpx MockTransport) that charges a
+fixed round-trip per request plus a per-row write cost, so the numbers
+show how request count and chunking dominate feed load time. Compares:
+
+- single: one INSERT per listing (what POST /api/properties does), with
+  ``--clients`` requests in flight like a migration script would use
+- bulk: bulk.create_listings (chunked multi-row INSERTs)
+
+Usage:
+    python benchmarks/bench_bulk.py [--rows 50000] [--rtt-ms 5] [--row-us 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bulk  # noqa: E402
+from models import PropertyCreate  # noqa: E402
+from rest_client import AsyncPostgrestClient  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+
+
+def fake_postgrest(rtt: float, per_row: float) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        rows = body if isinstance(body, list) else [body]
+        await asyncio.sleep(rtt + per_row * len(rows))
+        return httpx.Response(201, json=[dict(row, id=str(uuid.uuid4())) for row in rows])
+
+    return httpx.MockTransport(handler)
+
+
+async def run(args):
+    listings = make_listings(args.rows)
+    items = [(i, PropertyCreate.model_validate(row)) for i, row in enumerate(listings)]
+    owner = str(uuid.uuid4())
+    db = AsyncPostgrestClient("http://db/rest/v1", "key", transport=fake_postgrest(args.rtt_ms / 1000, args.row_us / 1e6))
+
+    if args.rows <= args.single_limit:
+        semaphore = asyncio.Semaphore(args.clients)
+
+        async def insert_one(data):
+            async with semaphore:
+                await db.table("properties").insert(bulk.listing_row(data, owner)).execute()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(insert_one(data) for _, data in items))
+        single = time.perf_counter() - start
+        print(f"single: {len(items)} requests, {single:.2f}s")
+    else:
+        estimate = len(items) / args.clients * (args.rtt_ms / 1000 + args.row_us / 1e6)
+        print(f"single: {len(items)} requests, ~{estimate:.0f}s at best (skipped; raise --single-limit to run)")
+
+    start = time.perf_counter()
+    results = await bulk.create_listings(db, owner, items, on_row=lambda row: None)
+    elapsed = time.perf_counter() - start
+    requests = -(-len(items) // bulk.BULK_CHUNK_SIZE)
+    print(f"bulk:   {requests} requests ({bulk.BULK_CHUNK_SIZE}/chunk, {bulk.BULK_CONCURRENCY} in flight), {elapsed:.2f}s, {len(results)} created")
+    await db.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    parser.add_argument("--row-us", type=float, default=50.0)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--single-limit", type=int, default=5_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark: listing event stream fan-out
+
+Opens N subscriptions to GET /api/properties/stream by calling the ASGI
+app directly (no sockets, so the numbers are the app's own cost), then
+publishes listing changes and waits until every subscriber's body has
+received each frame. Reports:
+
+- memory per idle subscriber (RSS growth over N open streams, including
+  Starlette's per-response tasks)
+- publish cost (matching and queueing) and publish-to-delivered latency,
+  for single events and for a burst published at once (a bulk write)
+- the cost of evaluating every subscriber's filters one by one, which is
+  what the filter groups and their index avoid
+
+Run once with shared filters (--distinct 10) and once with one filter set
+per subscriber (--distinct 0).
+
+Usage:
+    python benchmarks/bench_event_stream.py [--subscribers 20000] [--events 200] [--burst 100] [--distinct 10]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from urllib.parse import urlencode
+
+os.environ.setdefault("CATALOG_PRELOAD", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from events import listing_events  # noqa: E402
+from filters import matches  # noqa: E402
+from main import app  # noqa: E402
+from models import PropertyFilters  # noqa: E402
+from synthetic import LOCATIONS, make_listings  # noqa: E402
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def make_params(rng: random.Random) -> dict:
+    params = {"listing_type": rng.choice(["rent", "sale"]), "max_price": rng.randrange(2000, 5_000_000, 1000)}
+    if rng.random() < 0.5:
+        params["location"] = rng.choice(LOCATIONS)[0]
+    if rng.random() < 0.5:
+        params["bedrooms"] = rng.randint(1, 4)
+    return params
+
+
+class Client:
+    """One open stream: counts the event frames its body has received"""
+
+    delivered = 0
+
+    def __init__(self):
+        self.disconnect = asyncio.get_running_loop().create_future()
+
+    async def receive(self):
+        await self.disconnect
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.body":
+            Client.delivered += message.get("body", b"").count(b"\nevent: ")
+
+
+async def open_stream(client: Client, params: dict):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/properties/stream", "raw_path": b"/api/properties/stream",
+        "root_path": "", "query_string": urlencode(params, doseq=True).encode(),
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    await app(scope, client.receive, client.send)
+
+
+async def run(args):
+    rng = random.Random(3)
+    pool = [make_params(rng) for _ in range(args.distinct)] if args.distinct else None
+    params = [rng.choice(pool) if pool else make_params(rng) for _ in range(args.subscribers)]
+    rows = make_listings(args.events, seed=5)
+
+    before = rss_mb()
+    clients = [Client() for _ in params]
+    tasks = [asyncio.create_task(open_stream(c, p)) for c, p in zip(clients, params)]
+    while listing_events.subscribers < len(clients):
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.5)
+    grown = rss_mb() - before
+    stats = listing_events.stats()
+    print(f"subscribers: {stats['subscribers']:,} in {stats['filter_groups']:,} filter groups, "
+          f"{grown:.0f}MB RSS, {grown * 2**20 / len(clients) / 1024:.1f}KB each")
+
+    filters = [PropertyFilters(**{
+        "listing_type": p["listing_type"], "max_price": p["max_price"],
+        "locations": [p["location"]] if "location" in p else [], "min_bedrooms": p.get("bedrooms"),
+    }) for p in params]
+    publish_times, latencies, deliveries = [], [], []
+    for row in rows:
+        expected = Client.delivered + sum(1 for f in filters if matches(f, row))
+        start = time.perf_counter()
+        listing_events.publish("create", row)
+        publish_times.append(time.perf_counter() - start)
+        while Client.delivered < expected:
+            await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - start)
+        deliveries.append(expected)
+    per_event = [b - a for a, b in zip([0] + deliveries, deliveries)]
+    print(f"deliveries: mean {statistics.mean(per_event):.0f} subscribers per event")
+    for name, times in (("publish", publish_times), ("delivered", latencies)):
+        times = sorted(times)
+        print(f"{name:10s}: p50 {times[len(times) // 2] * 1000:7.2f}ms  p99 {times[int(len(times) * 0.99)] * 1000:7.2f}ms")
+
+    burst = make_listings(args.burst, seed=9)
+    expected = Client.delivered + sum(1 for row in burst for f in filters if matches(f, row))
+    start = time.perf_counter()
+    for row in burst:
+        listing_events.publish("create", row)
+    published = time.perf_counter() - start
+    while Client.delivered < expected:
+        await asyncio.sleep(0)
+    print(f"burst     : {len(burst)} events published in {published * 1000:.2f}ms, "
+          f"delivered in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    start = time.perf_counter()
+    for row in rows[:20]:
+        sum(1 for f in filters if matches(f, row))
+    print(f"per-subscriber matching: {(time.perf_counter() - start) / 20 * 1000:.2f}ms per event")
+
+    for client in clients:
+        client.disconnect.set_result(None)
+    await asyncio.gather(*tasks)
+    print(f"closed: {listing_events.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=20_000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=100, help="Events published at once, as by a bulk write")
+    parser.add_argument("--distinct", type=int, default=10, help="Distinct filter sets (0: one per subscriber)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: streaming export vs building the whole array in memory
+
+Runs against a simulated PostgREST (httpx MockTransport) serving a
+pre-serialized catalogue with a fixed round-trip per request. Compares:
+
+- array: one unbounded select, then the full JSON array (what
+  GET /api/properties/user/{id} does)
+- stream: export.encode over keyset chunks (GET /api/properties/export)
+
+and reports time to first byte, total time and peak Python heap
+(tracemalloc) for each.
+
+Usage:
+    python benchmarks/bench_export.py [--rows 100000] [--rtt-ms 5]
+"""
+
+import argparse
+import asyncio
+import bisect
+import os
+import sys
+import time
+import tracemalloc
+
+import httpx
+import orjson
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import export  # noqa: E402
+from models import PropertyFilters  # noqa: E402
+from rest_client import AsyncPostgrestClient  # noqa: E402
+from serialization import listings  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+
+
+def fake_postgrest(rows, rtt: float) -> httpx.MockTransport:
+    rows = sorted(rows, key=lambda row: row["id"])
+    ids = [row["id"] for row in rows]
+    # Pre-encoded so the server side does not count towards the client's heap
+    encoded = [orjson.dumps(row) for row in rows]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(rtt)
+        params = request.url.params
+        start = bisect.bisect_right(ids, params["id"][3:]) if "id" in params else 0
+        end = start + int(params["limit"]) if "limit" in params else len(rows)
+        return httpx.Response(200, content=b"[" + b",".join(encoded[start:end]) + b"]")
+
+    return httpx.MockTransport(handler)
+
+
+async def array(db):
+    start = time.perf_counter()
+    result = await db.table("properties").select("*").eq("is_active", True).execute()
+    body = orjson.dumps(listings(result.data))
+    first = time.perf_counter() - start
+    return first, time.perf_counter() - start, len(body)
+
+
+async def stream(db):
+    start = time.perf_counter()
+    reader = export.ExportReader(db, PropertyFilters(), None)
+    first_chunk = await reader.fetch(None)
+    first, size = None, 0
+    async for block in export.encode(reader, first_chunk, "ndjson"):
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(block)
+    return first, time.perf_counter() - start, size
+
+
+async def run(args):
+    rows = make_listings(args.rows)
+    db = AsyncPostgrestClient("http://db/rest/v1", "key", transport=fake_postgrest(rows, args.rtt_ms / 1000))
+    del rows
+    for name, fn in (("array", array), ("stream", stream)):
+        tracemalloc.start()
+        first, total, size = await fn(db)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:6s}: first byte {first * 1000:7.1f}ms, total {total:6.2f}s, {size / 1e6:6.1f}MB out, peak heap {peak / 1e6:6.1f}MB")
+    await db.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Load test: listing reads while a login burst saturates bcrypt
+
+Runs ``main:app`` in-process against a fake PostgREST upstream. A steady
+stream of ``GET /api/properties/`` requests is measured while a burst of
+concurrent ``POST /api/auth/login`` calls is in flight. With ``--inline``
+the hashing pool is bypassed and bcrypt runs on the event loop, which is
+how the routes behaved before the worker pool existed.
+
+Usage:
+    python benchmarks/bench_login_burst.py [--logins 64] [--readers 8] [--inline]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import database  # noqa: E402
+import hashing  # noqa: E402
+from rest_client import AsyncPostgrestClient  # noqa: E402
+
+PASSWORD = "password123"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def install_fake_db(password_hash: str, latency: float):
+    user = {
+        "id": "00000000-0000-0000-0000-000000000001",
+        "name": "Bench User",
+        "email": "bench@example.com",
+        "user_type": "hunter",
+        "phone": None,
+        "agent_license": None,
+        "password_hash": password_hash,
+        "created_at": "2024-01-01T00:00:00+00:00",
+    }
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        if request.url.path.endswith("/users"):
+            return httpx.Response(200, json=[user])
+        return httpx.Response(200, json=[])
+
+    database._async_client = AsyncPostgrestClient(
+        "http://postgrest.local", "anon", transport=httpx.MockTransport(handler)
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--inline", action="store_true", help="run bcrypt on the event loop")
+    args = parser.parse_args()
+
+    install_fake_db(hashing.pwd_context.hash(PASSWORD), args.latency_ms / 1000)
+    if args.inline:
+        async def inline_submit(operation, fn, *fn_args):
+            return fn(*fn_args)
+        hashing._submit = inline_submit
+
+    import main as app_module
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up the worker pool so process start-up is not measured
+        await client.post("/api/auth/login", json={"email": "bench@example.com", "password": PASSWORD})
+
+        read_samples = []
+        login_status = {}
+        done = asyncio.Event()
+
+        async def reader():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/properties/")
+                read_samples.append(time.perf_counter() - start)
+
+        async def login():
+            response = await client.post(
+                "/api/auth/login", json={"email": "bench@example.com", "password": PASSWORD}
+            )
+            login_status[response.status_code] = login_status.get(response.status_code, 0) + 1
+
+        readers = [asyncio.create_task(reader()) for _ in range(args.readers)]
+        await asyncio.sleep(0.5)
+        baseline = list(read_samples)
+        read_samples.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        burst_elapsed = time.perf_counter() - start
+        done.set()
+        await asyncio.gather(*readers)
+
+    mode = "inline" if args.inline else f"pool(workers={hashing.HASH_WORKERS}, queue={hashing.HASH_QUEUE_SIZE})"
+    print(f"mode: {mode}")
+    print(f"logins: {args.logins} in {burst_elapsed:.2f}s, status counts {login_status}")
+    for name, samples in (("reads before burst", baseline), ("reads during burst", read_samples)):
+        if samples:
+            print(
+                f"{name:<20} n={len(samples):<6} "
+                f"p50={statistics.median(samples) * 1000:8.1f}ms "
+                f"p99={percentile(samples, 99) * 1000:8.1f}ms"
+            )
+    hashing.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Benchmark: market statistics per segment
+
+Builds the market statistics sketches over N synthetic listings and times
+/api/stats lookups for random segments (any mix of location, property
+type, listing type and bedrooms) against computing the same count, mean
+and quantiles by aggregating over the listings:
+
+- sketch: market_stats.MarketStats.get (segment lookup)
+- scan:   NumPy masks over price/size/dimension columns plus np.quantile,
+  the best an in-memory aggregate can do (a SQL aggregate also reads
+  every row of the segment)
+
+and reports build time, the worst relative quantile error seen, and the
+cost of applying one written listing.
+
+Usage:
+    python benchmarks/bench_market_stats.py [--listings 100000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from market_stats import QUANTILES, MarketStats  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(name, times):
+    print(f"{name:7s}: p50 {percentile(times, 0.5) * 1e6:8.1f}us  p99 {percentile(times, 0.99) * 1e6:8.1f}us")
+
+
+class Scan:
+    """Listing columns, aggregated per request"""
+
+    def __init__(self, rows):
+        self.location = np.array([row["location"] for row in rows])
+        self.property_type = np.array([row["property_type"] for row in rows])
+        self.listing_type = np.array([row["listing_type"] for row in rows])
+        self.bedrooms = np.minimum(np.array([row["bedrooms"] for row in rows]), 5)
+        self.price = np.array([float(row["price"]) for row in rows])
+
+    def get(self, location, property_type, listing_type, bedrooms):
+        keep = np.ones(len(self.price), dtype=bool)
+        for column, value in ((self.location, location), (self.property_type, property_type),
+                              (self.listing_type, listing_type), (self.bedrooms, bedrooms)):
+            if value is not None:
+                keep &= column == value
+        prices = self.price[keep]
+        if not len(prices):
+            return 0, None
+        return len(prices), np.quantile(prices, [q for _, q in QUANTILES], method="higher")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = make_listings(args.listings)
+    rng = random.Random(5)
+    locations = sorted({row["location"] for row in rows})
+    segments = [
+        (rng.choice([None] + locations), rng.choice([None, "hdb", "condo", "landed"]),
+         rng.choice([None, "rent", "sale"]), rng.choice([None, 1, 2, 3, 4, 5]))
+        for _ in range(args.queries)
+    ]
+
+    stats = MarketStats()
+    start = time.perf_counter()
+    stats.reset(rows)
+    print(f"build  : {len(rows):,} listings in {time.perf_counter() - start:.2f}s, {stats.stats()}")
+
+    scan = Scan(rows)
+    sketch_times, scan_times, worst = [], [], 0.0
+    for segment in segments:
+        start = time.perf_counter()
+        result = stats.get(*segment)
+        sketch_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        count, exact = scan.get(*segment)
+        scan_times.append(time.perf_counter() - start)
+        assert result["count"] == count
+        if count:
+            approx = np.array([result["price"][name] for name, _ in QUANTILES])
+            worst = max(worst, float(np.max(np.abs(approx - exact) / exact)))
+    report("sketch", sketch_times)
+    report("scan", scan_times)
+    print(f"error  : worst relative quantile error {worst:.4f}")
+
+    start = time.perf_counter()
+    for row in rows[:5000]:
+        stats.upsert(dict(row, price=row["price"] * 1.05))
+    print(f"upsert : {(time.perf_counter() - start) / 5000 * 1e6:.0f}us per written listing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: OFFSET vs keyset pagination at shallow and deep pages
+
+Loads synthetic active listings into an in-memory SQLite table with the
+same ``(created_at DESC, id DESC)`` / ``(price, id)`` indexes as
+``properties_schema.sql`` and times fetching page 1 and page N with both
+strategies. The keyset predicate mirrors what ``pagination.apply_cursor``
+sends to PostgREST.
+
+Usage:
+    python benchmarks/bench_pagination.py [--rows 200000] [--page 10000] [--limit 10]
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta
+
+
+def build(rows: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE properties (id TEXT PRIMARY KEY, price REAL, created_at TEXT, is_active INTEGER)"
+    )
+    start = datetime(2023, 1, 1)
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO properties VALUES (?, ?, ?, 1)",
+        (
+            (
+                str(uuid.UUID(int=rng.getrandbits(128))),
+                float(rng.randrange(1000, 3_000_000, 100)),
+                (start + timedelta(seconds=i * 7)).isoformat(),
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.execute("CREATE INDEX idx_created_id ON properties(created_at DESC, id DESC) WHERE is_active = 1")
+    conn.execute("CREATE INDEX idx_price_id ON properties(price, id) WHERE is_active = 1")
+    conn.execute("ANALYZE")
+    return conn
+
+
+SORTS = {
+    "newest": ("created_at DESC, id DESC", "created_at <= ? AND (created_at < ? OR (created_at = ? AND id < ?))"),
+    "price_asc": ("price ASC, id ASC", "price >= ? AND (price > ? OR (price = ? AND id > ?))"),
+}
+
+
+def offset_page(conn, sort, page, limit):
+    order, _ = SORTS[sort]
+    sql = f"SELECT id, price, created_at FROM properties WHERE is_active = 1 ORDER BY {order} LIMIT ? OFFSET ?"
+    return conn.execute(sql, (limit, (page - 1) * limit)).fetchall()
+
+
+def keyset_page(conn, sort, last, limit):
+    order, predicate = SORTS[sort]
+    if last is None:
+        sql = f"SELECT id, price, created_at FROM properties WHERE is_active = 1 ORDER BY {order} LIMIT ?"
+        return conn.execute(sql, (limit,)).fetchall()
+    sql = (
+        f"SELECT id, price, created_at FROM properties WHERE is_active = 1 AND ({predicate}) "
+        f"ORDER BY {order} LIMIT ?"
+    )
+    key = last[2] if sort == "newest" else last[1]
+    return conn.execute(sql, (key, key, key, last[0], limit)).fetchall()
+
+
+def timed(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    args.page = min(args.page, args.rows // args.limit)
+
+    conn = build(args.rows)
+    for sort in SORTS:
+        # The row just before the deep page, as a client would hold it in its cursor
+        before = offset_page(conn, sort, args.page - 1, args.limit)[-1]
+        assert keyset_page(conn, sort, before, args.limit) == offset_page(conn, sort, args.page, args.limit)
+
+        print(f"sort={sort}")
+        print(f"  offset  page 1: {timed(lambda: offset_page(conn, sort, 1, args.limit)):8.3f}ms")
+        print(f"  offset  page {args.page}: {timed(lambda: offset_page(conn, sort, args.page, args.limit)):8.3f}ms")
+        print(f"  keyset  page 1: {timed(lambda: keyset_page(conn, sort, None, args.limit)):8.3f}ms")
+        print(f"  keyset  page {args.page}: {timed(lambda: keyset_page(conn, sort, before, args.limit)):8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: full listing responses vs sparse fieldsets
+
+Serves ``GET /api/properties`` pages from the in-memory snapshot (so no
+database is involved) and compares the default full ``PropertyResponse``
+list with ``fields=summary`` and a hand-picked field list. Reports the
+payload size per page and the server-side time to build and serialize it.
+
+Descriptions and image lists in the synthetic data are short; pad them with
+``--description-chars`` / ``--images`` to resemble real listings.
+
+Usage:
+    python benchmarks/bench_projection.py [--rows 20000] [--limit 20 100]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from catalog import catalog  # noqa: E402
+from main import app  # noqa: E402
+from snapshot import snapshot  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+
+VARIANTS = [
+    ("full", None),
+    ("summary", "summary"),
+    ("id,title,price", "id,title,price"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--description-chars", type=int, default=800)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_listings(args.rows)
+    for i, row in enumerate(rows):
+        row["description"] = (row["description"] + " ") * (args.description_chars // len(row["description"]) + 1)
+        row["description"] = row["description"][:args.description_chars]
+        row["images"] = [f"https://images.example.com/listings/{i}/{n}.jpg" for n in range(args.images)]
+    catalog.register(snapshot)
+    catalog.reset(rows)
+
+    # No lifespan: the catalogue above stands in for the preload
+    client = TestClient(app)
+    print(f"{'limit':>5} {'variant':<16} {'bytes/page':>11} {'p50':>9} {'p95':>9}")
+    for limit in args.limit:
+        for label, fields in VARIANTS:
+            params = {"limit": limit, "sort": "price_asc"}
+            if fields:
+                params["fields"] = fields
+            samples, size = [], 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.get("/api/properties/", params=params)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+                size = len(response.content)
+            samples.sort()
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f"{limit:>5} {label:<16} {size:>11,} {statistics.median(samples) * 1000:8.2f}ms {p95 * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark: matching new listings against saved searches
+
+Builds the saved-search match index over N synthetic searches (realistic
+price bands for rent and sale, optional types, bedroom bounds, locations
+and text) and matches a stream of synthetic listings against it. Compares:
+
+- index: saved_searches.MatchIndex.match_slots (predicate index)
+- scan:  every search's full predicate evaluated per listing, vectorised
+  over NumPy columns (the best a linear scan can do here)
+- python: filters.matches over every search (timed over a sample of
+  searches and scaled up)
+
+and reports build time, incremental insert rate, peak RSS, per-listing
+latency and matches per listing. Index and scan both return the positions
+of the matching searches and are compared; turning those into id strings
+(MatchIndex.match) costs the same either way and is timed separately.
+
+Usage:
+    python benchmarks/bench_saved_searches.py [--searches 1000000] [--listings 2000]
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from filters import matches  # noqa: E402
+from models import PropertyFilters  # noqa: E402
+from saved_searches import MatchIndex  # noqa: E402
+from synthetic import LOCATIONS, TYPES, make_listings  # noqa: E402
+
+RENT_PRICES = (1500, 12000)
+SALE_PRICES = (300_000, 5_000_000)
+
+
+def make_search(rng: random.Random) -> dict:
+    filters = {}
+    listing_type = rng.choice(["rent", "sale", "rent", "sale", None])
+    if listing_type:
+        filters["listing_type"] = listing_type
+    low, high = RENT_PRICES if listing_type != "sale" else SALE_PRICES
+    if rng.random() < 0.9:
+        center = rng.uniform(low, high)
+        width = center * rng.uniform(0.05, 0.3)
+        if rng.random() < 0.8:
+            filters["min_price"] = round(center - width, -1)
+        filters["max_price"] = round(center + width, -1)
+    if rng.random() < 0.7:
+        filters["property_types"] = sorted(rng.sample(TYPES, rng.choice([1, 1, 2])))
+    if rng.random() < 0.7:
+        filters["min_bedrooms"] = rng.randint(1, 4)
+    if rng.random() < 0.2:
+        filters["max_bedrooms"] = rng.randint(2, 5)
+    if rng.random() < 0.15:
+        filters["min_bathrooms"] = rng.randint(1, 3)
+    if rng.random() < 0.2:
+        filters["min_size"] = float(rng.randrange(400, 1500, 50))
+    if rng.random() < 0.6:
+        filters["locations"] = sorted(name for name, _, _ in rng.sample(LOCATIONS, rng.randint(1, 3)))
+    if rng.random() < 0.05:
+        filters["search"] = rng.choice(["pool", "renovated", "near mrt", "corner"])
+    return {"id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": str(uuid.UUID(int=rng.getrandbits(128))), "filters": filters}
+
+
+class Scan:
+    """All predicates as NumPy columns, evaluated for every search per listing"""
+
+    def __init__(self, searches):
+        def column(name, default):
+            return np.array([s["filters"].get(name, default) for s in searches], dtype=np.float64)
+
+        self.listing_type = np.array([s["filters"].get("listing_type") or "" for s in searches])
+        self.types = {t: np.array([t in s["filters"].get("property_types", TYPES) for s in searches]) for t in TYPES}
+        self.bounds = {
+            name: (column(f"min_{name}", -np.inf), column(f"max_{name}", np.inf))
+            for name in ("price", "bedrooms", "bathrooms", "size")
+        }
+        self.locations = {i: set(s["filters"]["locations"]) for i, s in enumerate(searches) if "locations" in s["filters"]}
+        self.text = {i: s["filters"]["search"] for i, s in enumerate(searches) if "search" in s["filters"]}
+        self.user_ids = np.array([s["user_id"] for s in searches])
+
+    def match(self, row):
+        keep = (self.listing_type == "") | (self.listing_type == row["listing_type"])
+        keep &= self.types[row["property_type"]]
+        for name, (low, high) in self.bounds.items():
+            keep &= (low <= row[name]) & (high >= row[name])
+        keep &= self.user_ids != row["owner_id"]
+        found = []
+        for i in np.flatnonzero(keep).tolist():
+            if i in self.locations and row["location"] not in self.locations[i]:
+                continue
+            if i in self.text and not any(
+                self.text[i] in (row[c] or "").lower() for c in ("title", "description", "address", "location")
+            ):
+                continue
+            found.append(i)
+        return np.array(found, dtype=np.int64)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def timed(fn, row, times):
+    start = time.perf_counter()
+    result = fn(row)
+    times.append(time.perf_counter() - start)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=1_000_000)
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--inserts", type=int, default=100_000, help="Searches added one by one after the bulk build")
+    parser.add_argument("--python-searches", type=int, default=20_000, help="Sample size for the filters.matches baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    searches = [make_search(rng) for _ in range(args.searches)]
+    extra = [make_search(rng) for _ in range(args.inserts)]
+    rows = [dict(row, owner_id=str(uuid.uuid4())) for row in make_listings(args.listings, seed=11)]
+
+    index = MatchIndex()
+    start = time.perf_counter()
+    index.reset(searches)
+    build = time.perf_counter() - start
+    print(f"build:   {len(searches):,} searches in {build:.2f}s, {index.stats()}")
+
+    start = time.perf_counter()
+    for search in extra:
+        index.add(search)
+    added = time.perf_counter() - start
+    print(f"insert:  {len(extra):,} searches one by one, {added / max(1, len(extra)) * 1e6:.1f}us each")
+    searches += extra
+    del extra
+
+    scan = Scan(searches)
+    index_times, scan_times, format_times, counts, mismatches = [], [], [], [], 0
+    for row in rows:
+        found = np.sort(timed(index.match_slots, row, index_times))
+        expected = timed(scan.match, row, scan_times)
+        timed(index.match, row, format_times)
+        counts.append(len(found))
+        mismatches += not np.array_equal(found, expected)
+    print(f"matches: mean {statistics.mean(counts):.0f}, p99 {percentile(counts, 0.99)} per listing, mismatches vs scan: {mismatches}")
+    for name, times in (("index", index_times), ("scan", scan_times), ("+ids", format_times)):
+        print(
+            f"{name:7s}: p50 {percentile(times, 0.5) * 1000:7.2f}ms  p99 {percentile(times, 0.99) * 1000:7.2f}ms  "
+            f"{len(times) / sum(times):8.0f} listings/s"
+        )
+
+    sample = [PropertyFilters(**s["filters"]) for s in searches[: args.python_searches]]
+    start = time.perf_counter()
+    for row in rows[:3]:
+        sum(1 for f in sample if matches(f, row))
+    per_listing = (time.perf_counter() - start) / 3 * len(searches) / max(1, len(sample))
+    print(f"python : {per_listing * 1000:7.0f}ms per listing (filters.matches over every search, scaled)")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB (searches, scan columns and index)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: in-memory BM25 search index at catalogue scale
+
+Builds the index over N synthetic listings, then times a mix of exact,
+multi-word, prefix (as-you-type) and misspelled queries, plus incremental
+upserts and removals.
+
+Usage:
+    python benchmarks/bench_search.py [--rows 100000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from search_index import SearchIndex  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+
+QUERIES = [
+    "tampines",
+    "condo orchard",
+    "spacious 3-bedroom hdb",
+    "swimming pool gym",
+    "seng",          # prefix
+    "tampnes",       # typo
+    "serangon condo",
+    "punggol balcony pet friendly",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_listings(args.rows)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.reset(rows)
+    print(f"indexed {len(index)} listings in {time.perf_counter() - start:.2f}s")
+
+    for query in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits = index.search(query, limit=20)
+            samples.append(time.perf_counter() - start)
+        print(f"{query!r:<32} hits={len(hits):<3} p50={statistics.median(samples) * 1000:8.2f}ms max={max(samples) * 1000:8.2f}ms")
+
+    start = time.perf_counter()
+    for row in rows[:1000]:
+        index.upsert(dict(row, title=row["title"] + " Updated"))
+    print(f"1000 upserts: {(time.perf_counter() - start) * 1000:.1f}ms")
+    start = time.perf_counter()
+    for row in rows[:1000]:
+        index.remove(row["id"])
+    print(f"1000 removals: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: CPU cost of serializing a 100-listing page
+
+Compares, for one page of listing rows as they come back from PostgREST:
+
+- models: ``PropertyResponse(**row)`` per row, FastAPI's response_model
+  validation and ``jsonable_encoder``, then the stdlib-based JSONResponse
+  (the previous behaviour of ``GET /api/properties``)
+- trusted: ``serialization.listings`` plus ``ORJSONResponse`` (the fast path)
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 100] [--repeat 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from models import PropertyResponse  # noqa: E402
+from serialization import listings  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+
+FIELD = create_response_field(name="Response_get_properties", type_=List[PropertyResponse])
+
+
+async def with_models(rows) -> bytes:
+    content = [PropertyResponse(**row) for row in rows]
+    body = await serialize_response(field=FIELD, response_content=content)
+    return JSONResponse(body).body
+
+
+async def trusted(rows) -> bytes:
+    return ORJSONResponse(listings(rows)).body
+
+
+async def measure(fn, rows, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        await fn(rows)
+        samples.append(time.process_time() - start)
+    return samples
+
+
+async def run(args):
+    rows = make_listings(args.rows)
+    slow_body, fast_body = await with_models(rows), await trusted(rows)
+    print(f"page of {args.rows} rows: {len(slow_body):,} bytes (models) vs {len(fast_body):,} bytes (trusted)")
+
+    results = {}
+    for label, fn in (("models", with_models), ("trusted", trusted)):
+        await measure(fn, rows, 50)  # warm up
+        samples = await measure(fn, rows, args.repeat)
+        results[label] = statistics.mean(samples)
+        print(f"{label:<8} mean={results[label] * 1000:7.3f}ms CPU  p50={statistics.median(samples) * 1000:7.3f}ms")
+    saved = results["models"] - results["trusted"]
+    print(f"CPU saved per request: {saved * 1000:.3f}ms ({results['models'] / results['trusted']:.1f}x faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: similar-listings queries
+
+Builds the similarity index over N synthetic listings and times top-k
+queries for random listings:
+
+- exact:  one matrix-vector product over every vector plus a partial sort
+- approx: k-means buckets, scoring only the nearest SIMILAR_ANN_PROBES
+  buckets (recall@k against exact is reported)
+- encode: re-encoding every listing per request, the cost the
+  precomputed vectors avoid
+
+plus build time and the cost of re-encoding one written listing.
+
+Usage:
+    python benchmarks/bench_similar.py [--listings 100000] [--queries 500] [--k 10]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import similar_index  # noqa: E402
+from similar_index import SimilarityIndex  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(name, times):
+    print(f"{name:7s}: p50 {percentile(times, 0.5) * 1000:6.2f}ms  p99 {percentile(times, 0.99) * 1000:6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = make_listings(args.listings)
+    ids = [row["id"] for row in random.Random(1).sample(rows, min(args.queries, len(rows)))]
+
+    similar_index.SIMILAR_ANN_MIN_LISTINGS = len(rows) + 1
+    exact = SimilarityIndex()
+    start = time.perf_counter()
+    exact.reset(rows)
+    print(f"build  : {len(rows):,} listings in {time.perf_counter() - start:.2f}s, {exact.stats()}")
+
+    similar_index.SIMILAR_ANN_MIN_LISTINGS = 0
+    approx = SimilarityIndex()
+    start = time.perf_counter()
+    approx.reset(rows)
+    print(f"build  : with buckets in {time.perf_counter() - start:.2f}s, {approx.stats()}")
+
+    exact_times, approx_times, recall = [], [], []
+    for pid in ids:
+        start = time.perf_counter()
+        expected = exact.similar(pid, args.k)
+        exact_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        found = approx.similar(pid, args.k)
+        approx_times.append(time.perf_counter() - start)
+        recall.append(len({p for p, _ in found} & {p for p, _ in expected}) / max(1, len(expected)))
+    report("exact", exact_times)
+    report("approx", approx_times)
+    print(f"recall@{args.k}: {sum(recall) / len(recall):.3f} with {similar_index.SIMILAR_ANN_PROBES} probes")
+
+    start = time.perf_counter()
+    exact.encode(rows)
+    print(f"encode : {(time.perf_counter() - start) * 1000:.0f}ms to vectorize every listing (per request without the index)")
+
+    start = time.perf_counter()
+    for row in rows[:2000]:
+        approx.upsert(dict(row, price=row["price"] * 1.05))
+    print(f"upsert : {(time.perf_counter() - start) / 2000 * 1e6:.0f}us per written listing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: columnar snapshot vs row-by-row filtering for the browse path
+
+Runs a mixed workload of filter/sort combinations (the kind the SPA sends
+to ``GET /api/properties``) against N listings, comparing the NumPy
+snapshot with evaluating the same filters row by row in Python. The
+current PostgREST path additionally pays a network round-trip per query;
+pass ``--rtt-ms`` to add that to the baseline column.
+
+Usage:
+    python benchmarks/bench_snapshot.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from filters import matches  # noqa: E402
+from models import PropertyFilters  # noqa: E402
+from pagination import SORTS  # noqa: E402
+from snapshot import ListingSnapshot  # noqa: E402
+from synthetic import LOCATIONS  # noqa: E402
+
+WORKLOAD = [
+    (PropertyFilters(), "newest"),
+    (PropertyFilters(listing_type="rent", max_price=4000), "price_asc"),
+    (PropertyFilters(property_types=["hdb", "condo"], min_bedrooms=3), "newest"),
+    (PropertyFilters(locations=["Tampines", "Bedok", "Pasir Ris"], listing_type="sale"), "price_desc"),
+    (PropertyFilters(min_size=1000, max_size=2000, min_bathrooms=2), "size_desc"),
+    (PropertyFilters(property_types=["condo"], locations=["Orchard"], min_price=2_000_000), "price_asc"),
+]
+
+
+def slim_rows(count: int, seed: int = 7):
+    """Listings with only the columns the browse path filters and sorts on"""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        location, lat, lng = rng.choice(LOCATIONS)
+        listing_type = rng.choice(["rent", "sale"])
+        bedrooms = rng.randint(1, 5)
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "price": float(rng.randrange(1500, 12000, 50) if listing_type == "rent" else rng.randrange(300_000, 5_000_000, 1000)),
+            "size": float(rng.randrange(400, 3500, 10)),
+            "bedrooms": bedrooms,
+            "bathrooms": max(1, bedrooms - rng.randint(0, 2)),
+            "property_type": rng.choices(["hdb", "condo", "landed"], weights=[6, 3, 1])[0],
+            "listing_type": listing_type,
+            "location": location,
+            "lat": lat,
+            "lng": lng,
+            "created_at": (start + timedelta(seconds=i * 30)).isoformat(),
+        })
+    return rows
+
+
+def baseline(rows, filters, sort, limit):
+    matched = [row for row in rows if matches(filters, row)]
+    for column, desc in reversed(SORTS[sort]):
+        matched.sort(key=lambda row: row[column], reverse=desc)
+    return [row["id"] for row in matched[:limit]]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rows = slim_rows(size)
+        snap = ListingSnapshot()
+        start = time.perf_counter()
+        snap.reset(rows)
+        print(f"n={size}: snapshot built in {time.perf_counter() - start:.2f}s")
+        repeat = 5 if size < 1_000_000 else 2
+        for filters, sort in WORKLOAD:
+            base_ms, expected = timed(lambda: baseline(rows, filters, sort, args.limit), repeat)
+            snap_ms, got = timed(lambda: snap.query(filters, sort, args.limit), repeat * 4)
+            assert got == expected, "snapshot and baseline disagree"
+            label = f"{sort} {filters.model_dump(exclude_defaults=True, mode='json')}"
+            print(f"  {label[:80]:<80} rows={base_ms + args.rtt_ms:9.2f}ms  snapshot={snap_ms:7.2f}ms")
+        del rows, snap
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: transit-proximity filters and sort
+
+Loads N synthetic listings into the columnar snapshot (with their stored
+station distances) and times browse-page queries:
+
+- station: "within R metres of station X", from the per-station postings
+- any:     "within R metres of any station", a column comparison
+- sort:    sort=transit, first page
+
+against computing the same "near station X" result per query from the
+listing coordinates (vectorised haversine over every listing), which is
+what the stored distances avoid. Also reports the cost of computing one
+listing's transit columns (paid on each write and by the backfill).
+
+Usage:
+    python benchmarks/bench_transit.py [--listings 100000] [--queries 500] [--radius 800]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import PropertyFilters  # noqa: E402
+from snapshot import ListingSnapshot  # noqa: E402
+from synthetic import make_listings  # noqa: E402
+from transit import EARTH_RADIUS_M, STATIONS, STATIONS_BY_ID, transit_fields  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(name, times):
+    print(f"{name:8s}: p50 {percentile(times, 0.5) * 1000:7.3f}ms  p99 {percentile(times, 0.99) * 1000:7.3f}ms")
+
+
+def timed(fn, times):
+    start = time.perf_counter()
+    result = fn()
+    times.append(time.perf_counter() - start)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--radius", type=int, default=800, help="Metres to the station")
+    args = parser.parse_args()
+
+    rows = make_listings(args.listings)
+    start = time.perf_counter()
+    for row in rows:
+        row.update(transit_fields(row["lat"], row["lng"]))
+    per_row = (time.perf_counter() - start) / len(rows)
+    print(f"compute: {per_row * 1e6:.0f}us per listing ({per_row * len(rows):.1f}s to backfill {len(rows):,})")
+
+    snapshot = ListingSnapshot()
+    snapshot.reset(rows)
+    lat = np.radians(np.array([row["lat"] for row in rows]))
+    lng = np.radians(np.array([row["lng"] for row in rows]))
+
+    rng = random.Random(4)
+    stations = [rng.choice(STATIONS).id for _ in range(args.queries)]
+    indexed, any_times, sort_times, geometry, mismatches = [], [], [], [], 0
+    for station in stations:
+        filters = PropertyFilters(station=station, max_station_distance=args.radius)
+        found = timed(lambda: snapshot.query(filters, "newest", 20), indexed)
+
+        def per_query():
+            s = STATIONS_BY_ID[station]
+            slat, slng = np.radians(s.lat), np.radians(s.lng)
+            a = np.sin((lat - slat) / 2) ** 2 + np.cos(slat) * np.cos(lat) * np.sin((lng - slng) / 2) ** 2
+            near = np.rint(2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))) <= args.radius
+            slots = np.flatnonzero(near)
+            order = np.lexsort((-snapshot.column("id", slots), -snapshot.column("created_at", slots)))[:20]
+            return [rows[i]["id"] for i in slots[order]]
+
+        mismatches += timed(per_query, geometry) != found
+        timed(lambda: snapshot.query(PropertyFilters(max_station_distance=args.radius), "newest", 20), any_times)
+        timed(lambda: snapshot.query(PropertyFilters(), "transit", 20), sort_times)
+
+    report("station", indexed)
+    report("any", any_times)
+    report("sort", sort_times)
+    report("geometry", geometry)
+    print(f"mismatches vs per-query geometry: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+"""
+In-memory stand-in for the Supabase PostgREST API, for benchmarks and load tests
+
+Implements the part of PostgREST the backend uses: ``select`` with column
+lists, the ``thumbnail`` computed column, ``alias:table!inner(...)``
+embeds and the filter-only ``property_stations!inner()`` embed; ``eq``/``neq``/``gt``/``gte``/``lt``/``lte``/``ilike``/``in``
+filters and nested ``or``/``and``; ``order``, ``limit``, ``offset`` and
+``Prefer: count=exact``; inserts and upserts, PATCH, DELETE; and the
+``bulk_update_properties`` / ``bulk_deactivate_properties`` /
+``create_saved_search`` functions from the schema files. Unique and
+foreign-key violations come back with the Postgres error codes the
+routes check for.
+
+Each response is delayed by ``latency`` (plus up to ``jitter`` of it,
+uniformly) and ``per_row`` for every row returned, to approximate a
+remote database.
+
+Use ``FakePostgrest.transport()`` to plug it into the app in-process, or
+run it as a server and point ``SUPABASE_URL`` at it:
+
+    python benchmarks/fake_postgrest.py --port 54321 --listings 20000
+    SUPABASE_URL=http://127.0.0.1:54321 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+import orjson
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from synthetic import make_listings  # noqa: E402
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+# Unique keys per table (besides ``id``) and foreign keys: column -> table
+UNIQUE = {"users": [("email",)], "favorites": [("user_id", "property_id")], "search_matches": [("search_id", "property_id")]}
+FOREIGN_KEYS = {
+    "favorites": {"user_id": "users", "property_id": "properties"},
+    "properties": {"owner_id": "users"},
+    "saved_searches": {"user_id": "users"},
+    "search_matches": {"search_id": "saved_searches", "user_id": "users", "property_id": "properties"},
+}
+# Rows referencing a stored row, derived from it as the schema's triggers
+# do: (table, embedded table) -> rows
+CHILDREN: Dict[Tuple[str, str], Callable[[Row], List[Row]]] = {
+    ("properties", "property_stations"): lambda row: [
+        {"property_id": row["id"], "station": station, "distance_m": metres}
+        for station, metres in (row.get("nearby_stations") or {}).items()
+    ],
+}
+DEFAULTS = {"properties": {"is_active": True, "features": None, "amenities": None, "images": None}}
+TIMESTAMPS = {"favorites": ("created_at",), "saved_searches": ("created_at",), "search_matches": ("matched_at",)}
+OPERATORS = ("eq", "neq", "gt", "gte", "lt", "lte", "ilike", "in", "is")
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.code = code
+
+
+def _now() -> str:
+    return datetime.now(tz=timezone.utc).isoformat()
+
+
+def _split(text: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if quoted:
+            if c == "\\" and i + 1 < len(text):
+                current.append(text[i:i + 2])
+                i += 2
+                continue
+            if c == '"':
+                quoted = False
+        elif c == '"':
+            quoted = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        current.append(c)
+        i += 1
+    if current or parts:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(text: str) -> str:
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", text[1:-1])
+    return text
+
+
+def _coerce(raw: str, sample: Any) -> Any:
+    """Convert a filter value to the type of the stored value it is compared with"""
+    if raw == "null":
+        return None
+    if isinstance(sample, bool):
+        return raw == "true"
+    if isinstance(sample, (int, float)):
+        return float(raw)
+    return raw
+
+
+def _like(pattern: str) -> "re.Pattern":
+    regex = "".join(".*" if c in "*%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", re.IGNORECASE | re.DOTALL)
+
+
+def _get(row: Row, column: str) -> Any:
+    # Embedded resources are filtered as "alias.column"
+    value: Any = row
+    for part in column.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _compare(op: str, raw: str, column: str) -> Predicate:
+    if op == "in":
+        options = [_unquote(v) for v in _split(raw[1:-1])]
+
+        def check(row):
+            value = _get(row, column)
+            return value is not None and any(value == _coerce(o, value) for o in options)
+        return check
+    if op == "ilike":
+        pattern = _like(_unquote(raw))
+        return lambda row: _get(row, column) is not None and bool(pattern.match(str(_get(row, column))))
+    if op == "is":
+        expected = None if raw == "null" else raw == "true"
+        return lambda row: _get(row, column) is expected
+    raw = _unquote(raw)
+    ops = {
+        "eq": lambda a, b: a == b, "neq": lambda a, b: a != b,
+        "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b, "lte": lambda a, b: a <= b,
+    }
+    if op not in ops:
+        raise PostgrestError(400, f"Unsupported operator: {op}", "PGRST100")
+    fn = ops[op]
+
+    def check(row):
+        value = _get(row, column)
+        if value is None:
+            return False
+        return fn(value, _coerce(raw, value))
+    return check
+
+
+def _condition(expr: str) -> Predicate:
+    """One ``column.op.value`` term or a nested ``and(...)``/``or(...)``"""
+    for group, combine in (("and(", all), ("or(", any)):
+        if expr.startswith(group):
+            terms = [_condition(term) for term in _split(expr[len(group):-1])]
+            return lambda row, terms=terms, combine=combine: combine(term(row) for term in terms)
+    column, rest = expr.split(".", 1)
+    op, raw = rest.split(".", 1)
+    if op not in OPERATORS:
+        # Filter on an embedded resource: "alias.column.op.value"
+        column = f"{column}.{op}"
+        op, raw = raw.split(".", 1)
+    return _compare(op, raw, column)
+
+
+@lru_cache(maxsize=256)
+def _parse_select(select: str) -> Tuple[Tuple[str, Any], ...]:
+    """``(name, None)`` for columns, ``(alias, (table, inner, columns))`` for embeds"""
+    out = []
+    for item in _split(select):
+        match = re.match(r"^(?:(\w+):)?(\w+)(!inner)?\((.*)\)$", item)
+        if match:
+            alias, table, inner, columns = match.groups()
+            out.append((alias or table, (table, bool(inner), _parse_select(columns) if columns else ())))
+        else:
+            out.append((item, None))
+    return tuple(out)
+
+
+class FakePostgrest:
+    """Tables held as ``id -> row`` dicts, served through the PostgREST URL scheme"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, per_row: float = 0.0, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_row = per_row
+        self.rng = random.Random(seed)
+        self.tables: Dict[str, Dict[str, Row]] = {
+            "users": {}, "properties": {}, "favorites": {}, "saved_searches": {}, "search_matches": {},
+        }
+        self.requests = 0
+
+    # Seeding
+    def seed(
+        self,
+        listings: int,
+        hunters: int = 200,
+        agents: int = 50,
+        password_hash: str = "",
+        seed: int = 42,
+    ) -> Tuple[List[Row], List[Row]]:
+        """Synthetic agents (who own the listings), hunters and listings.
+
+        Every user gets ``password_hash``; returns ``(agents, hunters)``.
+        """
+        rows = make_listings(listings, seed=seed, owners=agents)
+        owner_ids = list(dict.fromkeys(row["owner_id"] for row in rows)) if rows else []
+        # Separate stream: make_listings drew the owner ids from Random(seed)
+        rng = random.Random(f"users-{seed}")
+        while len(owner_ids) < agents:
+            owner_ids.append(str(uuid.UUID(int=rng.getrandbits(128))))
+        created = "2024-01-01T00:00:00+00:00"
+
+        def user(uid, index, kind):
+            return {
+                "id": uid, "name": f"{kind.title()} {index}", "email": f"{kind}{index}@example.com",
+                "user_type": kind, "phone": None, "agent_license": "AG000000" if kind == "agent" else None,
+                "password_hash": password_hash, "created_at": created, "updated_at": created,
+            }
+
+        agent_rows = [user(uid, i, "agent") for i, uid in enumerate(owner_ids)]
+        hunter_rows = [user(str(uuid.UUID(int=rng.getrandbits(128))), i, "hunter") for i in range(hunters)]
+        for row in agent_rows + hunter_rows:
+            self.tables["users"][row["id"]] = row
+        for row in rows:
+            self.tables["properties"][row["id"]] = row
+        return agent_rows, hunter_rows
+
+    # Transport
+    def transport(self) -> httpx.MockTransport:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            status, headers, body = await self.handle(
+                request.method, request.url.path, request.url.query.decode(), request.headers, request.content
+            )
+            return httpx.Response(status, headers=headers, content=body)
+
+        return httpx.MockTransport(handler)
+
+    async def asgi(self, scope, receive, send):
+        """Minimal ASGI app, for running the fake as a standalone server"""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        headers = {k.decode().lower(): v.decode() for k, v in scope["headers"]}
+        status, out, content = await self.handle(
+            scope["method"], scope["path"], scope["query_string"].decode(), headers, body
+        )
+        await send({
+            "type": "http.response.start", "status": status,
+            "headers": [(k.encode(), v.encode()) for k, v in out.items()],
+        })
+        await send({"type": "http.response.body", "body": content})
+
+    async def handle(self, method: str, path: str, query: str, headers, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        self.requests += 1
+        if path.startswith("/rest/v1"):
+            path = path[len("/rest/v1"):]
+        params = parse_qsl(query, keep_blank_values=True)
+        prefer = headers.get("prefer", "")
+        try:
+            rows, count = self._dispatch(method, path.strip("/"), params, prefer, orjson.loads(body) if body else None)
+            status = 201 if method == "POST" and not path.strip("/").startswith("rpc/") else 200
+            out = {"content-type": "application/json"}
+            if count is not None:
+                out["content-range"] = f"0-{max(len(rows) - 1, 0)}/{count}"
+            payload = orjson.dumps(rows)
+        except PostgrestError as e:
+            status, out = e.status, {"content-type": "application/json"}
+            payload = orjson.dumps({"message": e.message, "code": e.code})
+            rows = []
+        delay = self.latency * (1 + self.jitter * self.rng.random()) + self.per_row * len(rows)
+        if delay:
+            await asyncio.sleep(delay)
+        return status, out, payload
+
+    # Request handling
+    def _dispatch(self, method, path, params, prefer, body) -> Tuple[List[Row], Optional[int]]:
+        if path.startswith("rpc/"):
+            return self._rpc(path[4:], body or {}), None
+        if path not in self.tables:
+            raise PostgrestError(404, f'relation "public.{path}" does not exist', "42P01")
+        select, predicates, filters, order, limit, offset, on_conflict = "*", [], [], [], None, 0, None
+        ids = None
+        for key, value in params:
+            if key == "id" and value.startswith(("eq.", "in.")):
+                # Primary-key lookups skip the table scan
+                op, raw = value.split(".", 1)
+                ids = [raw] if op == "eq" else [_unquote(v) for v in _split(raw[1:-1])]
+            if key == "select":
+                select = value
+            elif key == "order":
+                order = [part.rsplit(".", 1) for part in value.split(",")]
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key == "on_conflict":
+                on_conflict = value
+            elif key == "or":
+                predicates.append(_condition(f"or{value}"))
+            else:
+                filters.append((key, value))
+
+        table = self.tables[path]
+        columns = _parse_select(select)
+        # Filter-only embeds of referencing rows: some child passes all their filters
+        children = {name: CHILDREN[(path, embed[0])] for name, embed in columns if embed and (path, embed[0]) in CHILDREN}
+        embedded: Dict[str, List[Predicate]] = {name: [] for name in children}
+        for key, value in filters:
+            alias, _, column = key.partition(".")
+            if alias in embedded:
+                embedded[alias].append(_condition(f"{column}.{value}"))
+            else:
+                predicates.append(_condition(f"{key}.{value}"))
+        for name, terms in embedded.items():
+            predicates.append(
+                lambda row, derive=children[name], terms=terms: any(all(t(child) for t in terms) for child in derive(row))
+            )
+        if method == "GET":
+            # Filter and sort on full rows (with embeds attached), then shape
+            candidates = table.values() if ids is None else [table[i] for i in ids if i in table]
+            rows = [view for view in (self._view(path, row, columns) for row in candidates) if view is not None]
+            rows = [row for row in rows if all(p(row) for p in predicates)]
+            for column, direction in reversed(order):
+                present = [r for r in rows if r.get(column) is not None]
+                missing = [r for r in rows if r.get(column) is None]
+                present.sort(key=lambda r: r[column], reverse=direction == "desc")
+                # Postgres default: NULLS LAST for ASC, NULLS FIRST for DESC
+                rows = missing + present if direction == "desc" else present + missing
+            total = len(rows) if "count=exact" in prefer else None
+            rows = rows[offset:offset + limit if limit is not None else None]
+            return [self._shape(path, row, columns) for row in rows], total
+        if method == "POST":
+            items = body if isinstance(body, list) else [body]
+            upsert = "resolution=merge-duplicates" in prefer
+            inserted = self._insert(path, items, upsert, on_conflict)
+            return [self._shape(path, self._view(path, row, columns), columns) for row in inserted], None
+        candidates = table.values() if ids is None else [table[i] for i in ids if i in table]
+        matched = [row for row in candidates if all(p(row) for p in predicates)]
+        if method == "PATCH":
+            for row in matched:
+                row.update(body or {})
+                if "updated_at" in row:
+                    row["updated_at"] = _now()
+        elif method == "DELETE":
+            for row in matched:
+                del table[row["id"]]
+        else:
+            raise PostgrestError(405, f"Unsupported method {method}")
+        return [self._shape(path, row, columns) for row in matched], None
+
+    def _view(self, table: str, row: Row, columns) -> Optional[Row]:
+        """The stored row with embedded resources attached (None when an inner embed is missing)"""
+        view = row
+        for name, embed in columns:
+            if embed is None:
+                continue
+            target, inner, sub_columns = embed
+            if (table, target) in CHILDREN:
+                continue
+            key = next((c for c, t in FOREIGN_KEYS.get(table, {}).items() if t == target), None)
+            related = self.tables[target].get(row.get(key)) if key else None
+            if related is not None:
+                related = self._view(target, related, sub_columns)
+            if related is None and inner:
+                return None
+            if view is row:
+                view = dict(row)
+            view[name] = related
+        return view
+
+    def _shape(self, table: str, row: Row, columns) -> Row:
+        """Apply a parsed select list (columns, computed columns, embeds) to a row view"""
+        out: Row = {}
+        for name, embed in columns:
+            if embed is not None and (table, embed[0]) in CHILDREN:
+                continue
+            if embed is not None:
+                related = row.get(name)
+                out[name] = self._shape(embed[0], related, embed[2]) if related is not None else None
+            elif name == "*":
+                out.update({k: v for k, v in row.items() if not isinstance(v, dict)})
+            elif name == "thumbnail" and table == "properties":
+                out[name] = next(iter(row.get("images") or ()), None)
+            else:
+                out[name] = row.get(name)
+        return out
+
+    def _insert(self, table: str, items: List[Row], upsert: bool, on_conflict: Optional[str]) -> List[Row]:
+        stored = self.tables[table]
+        conflict_keys = [tuple(on_conflict.split(","))] if on_conflict else UNIQUE.get(table, [])
+        staged = []
+        for item in items:
+            row = {**DEFAULTS.get(table, {}), **item}
+            row.setdefault("id", str(uuid.uuid4()))
+            now = _now()
+            for column in TIMESTAMPS.get(table, ("created_at", "updated_at")):
+                row.setdefault(column, now)
+            for column, target in FOREIGN_KEYS.get(table, {}).items():
+                if row.get(column) is not None and row[column] not in self.tables[target]:
+                    raise PostgrestError(
+                        409, f'insert or update on table "{table}" violates foreign key constraint', "23503"
+                    )
+            existing = None
+            for keys in conflict_keys:
+                existing = next(
+                    (r for r in list(stored.values()) + staged if all(r.get(k) == row.get(k) for k in keys)), None
+                )
+                if existing is not None:
+                    break
+            if existing is not None or row["id"] in stored:
+                if not upsert:
+                    raise PostgrestError(409, "duplicate key value violates unique constraint", "23505")
+                existing = existing or stored[row["id"]]
+                existing.update({k: v for k, v in item.items() if k != "id"})
+                continue
+            staged.append(row)
+        # A failed item rejects the whole statement, as in Postgres
+        for row in staged:
+            stored[row["id"]] = row
+        return staged
+
+    def _rpc(self, function: str, params: Row) -> List[Row]:
+        properties = self.tables["properties"]
+        owner = params.get("p_owner_id")
+        if function == "bulk_update_properties":
+            updated = []
+            for item in params.get("p_items", []):
+                row = properties.get(item.get("id"))
+                if row is None or row.get("owner_id") != owner:
+                    continue
+                row.update({k: v for k, v in item.items() if k != "id" and v is not None})
+                row["updated_at"] = _now()
+                updated.append(dict(row))
+            return updated
+        if function == "bulk_deactivate_properties":
+            out = []
+            for pid in params.get("p_ids", []):
+                row = properties.get(pid)
+                if row is not None and row.get("owner_id") == owner:
+                    row["is_active"] = False
+                    row["updated_at"] = _now()
+                    out.append({"id": pid})
+            return out
+        if function == "create_saved_search":
+            user = params.get("p_user_id")
+            existing = sum(1 for row in self.tables["saved_searches"].values() if row.get("user_id") == user)
+            if existing >= params.get("p_limit", 0):
+                return []
+            item = {"user_id": user, "name": params.get("p_name"), "filters": params.get("p_filters")}
+            return self._insert("saved_searches", [item], False, None)
+        raise PostgrestError(404, f"Could not find the function public.{function}", "PGRST202")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fake PostgREST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--listings", type=int, default=10_000)
+    parser.add_argument("--hunters", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--password", default="password123", help="password of every seeded user")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--row-us", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import uvicorn
+    from hashing import pwd_context
+
+    fake = FakePostgrest(args.latency_ms / 1000, args.jitter, args.row_us / 1e6, seed=args.seed)
+    fake.seed(args.listings, args.hunters, args.agents, pwd_context.hash(args.password), seed=args.seed)
+    print(f"Fake PostgREST on http://{args.host}:{args.port} ({args.listings} listings); users are "
+          f"agent<N>@example.com / hunter<N>@example.com with password {args.password!r}")
+    uvicorn.run(fake.asgi, host=args.host, port=args.port, log_level="warning", interface="asgi3")
+
+
+if __name__ == "__main__":
+    main()
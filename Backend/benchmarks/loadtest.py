@@ -0,0 +1,337 @@
+"""
+Load test: realistic traffic mix against main:app and a fake PostgREST
+
+By default the app runs in-process (lifespan included, so the listing
+catalogue and indexes are built) with ``fake_postgrest.FakePostgrest``
+as its database, seeded with synthetic listings, hunters and agents and
+configurable latency. ``--base-url`` drives an already running server
+instead (start it against ``fake_postgrest.py`` with the same seed
+options and SECRET_KEY so the seeded accounts and tokens line up).
+
+Virtual users run in a closed loop for ``--duration`` seconds, each
+picking a scenario by weight:
+
+- browse: a filtered, sorted listing page, then the next page by cursor
+- detail: one listing by id
+- search: a ranked text search
+- login: a burst of ``--burst`` concurrent logins (bcrypt)
+- bulk: an agent updating a batch of their own listings
+
+Latency is reported per route with throughput and p50/p95/p99. Results
+are written as JSON (config, git commit, per-route stats); pass an
+earlier file as ``--baseline`` to print the deltas and exit non-zero
+when a route regressed by more than ``--threshold``.
+
+Usage:
+    python benchmarks/loadtest.py [--duration 20] [--users 32] [--listings 20000]
+        [--latency-ms 5] [--mix browse=50,detail=25,search=10,login=5,bulk=10]
+        [--out results.json] [--baseline previous.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_postgrest import FakePostgrest  # noqa: E402
+from synthetic import LOCATIONS  # noqa: E402
+
+PASSWORD = "password123"
+DEFAULT_MIX = "browse=50,detail=25,search=10,login=5,bulk=10"
+SEARCH_TERMS = ["condo", "balcony", "renovated", "near mrt", "pool", "family", "corner unit", "gym", "spacious"]
+SORTS = ["newest", "price_asc", "price_desc", "size_asc"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name.strip()!r} (choose from {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.samples[route].append(time.perf_counter() - start)
+            self.errors[route] += 1
+            self.statuses[route]["transport"] += 1
+            return None
+        self.samples[route].append(time.perf_counter() - start)
+        self.statuses[route][str(response.status_code)] += 1
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors[route],
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+                "statuses": dict(sorted(self.statuses[route].items())),
+            }
+        return routes
+
+
+class Seed:
+    """The seeded accounts and listings, and a token per account"""
+
+    def __init__(self, fake: FakePostgrest, agents, hunters, create_token):
+        self.agents = agents
+        self.hunters = hunters
+        self.listing_ids = list(fake.tables["properties"])
+        self.owned = defaultdict(list)
+        for row in fake.tables["properties"].values():
+            self.owned[row["owner_id"]].append(row["id"])
+        self.tokens = {user["id"]: create_token({"sub": user["id"]}) for user in agents + hunters}
+
+
+class Context:
+    """Per-virtual-user state passed to the scenarios"""
+
+    def __init__(self, client, recorder, rng, seed: Seed, args):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.agents = seed.agents
+        self.hunters = seed.hunters
+        self.listing_ids = seed.listing_ids
+        self.owned = seed.owned
+        self.tokens = seed.tokens
+        self.args = args
+
+    def auth(self, user) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[user['id']]}"}
+
+
+async def browse(ctx: Context):
+    params = {"limit": ctx.rng.choice([10, 20, 50]), "sort": ctx.rng.choice(SORTS)}
+    if ctx.rng.random() < 0.7:
+        params["listing_type"] = ctx.rng.choice(["rent", "sale"])
+    if ctx.rng.random() < 0.5:
+        params["property_type"] = ctx.rng.choice(["hdb", "condo", "landed"])
+    if ctx.rng.random() < 0.4:
+        params["location"] = ctx.rng.choice(LOCATIONS)[0]
+    if ctx.rng.random() < 0.3:
+        params["bedrooms"] = ctx.rng.randint(1, 4)
+    if ctx.rng.random() < 0.5:
+        params["fields"] = "summary"
+    headers = ctx.auth(ctx.rng.choice(ctx.hunters)) if ctx.rng.random() < 0.3 else {}
+    response = await ctx.recorder.request(ctx.client, "GET /api/properties/", "GET", "/api/properties/", params=params, headers=headers)
+    cursor = response.headers.get("x-next-cursor") if response is not None else None
+    if cursor:
+        await ctx.recorder.request(
+            ctx.client, "GET /api/properties/ (next page)", "GET", "/api/properties/",
+            params={**params, "cursor": cursor}, headers=headers,
+        )
+
+
+async def detail(ctx: Context):
+    pid = ctx.rng.choice(ctx.listing_ids)
+    headers = ctx.auth(ctx.rng.choice(ctx.hunters)) if ctx.rng.random() < 0.3 else {}
+    await ctx.recorder.request(ctx.client, "GET /api/properties/{id}", "GET", f"/api/properties/{pid}", headers=headers)
+
+
+async def search(ctx: Context):
+    params = {"q": ctx.rng.choice(SEARCH_TERMS), "limit": 20}
+    await ctx.recorder.request(ctx.client, "GET /api/properties/search", "GET", "/api/properties/search", params=params)
+
+
+async def login(ctx: Context):
+    users = [ctx.rng.choice(ctx.hunters + ctx.agents) for _ in range(ctx.args.burst)]
+    await asyncio.gather(*(
+        ctx.recorder.request(
+            ctx.client, "POST /api/auth/login", "POST", "/api/auth/login",
+            json={"email": user["email"], "password": PASSWORD},
+        )
+        for user in users
+    ))
+
+
+async def bulk(ctx: Context):
+    agent = ctx.rng.choice(ctx.agents)
+    owned = ctx.owned.get(agent["id"]) or []
+    if not owned:
+        return
+    batch = ctx.rng.sample(owned, min(len(owned), ctx.args.bulk_size))
+    items = [{"id": pid, "price": float(ctx.rng.randrange(1500, 12000, 50))} for pid in batch]
+    await ctx.recorder.request(
+        ctx.client, "PUT /api/properties/bulk", "PUT", "/api/properties/bulk", json=items, headers=ctx.auth(agent)
+    )
+
+
+SCENARIOS = {"browse": browse, "detail": detail, "search": search, "login": login, "bulk": bulk}
+
+
+@asynccontextmanager
+async def in_process_app(fake: FakePostgrest):
+    import database
+    from rest_client import AsyncPostgrestClient
+
+    database._async_client = AsyncPostgrestClient("http://fake-postgrest/rest/v1", "anon", transport=fake.transport())
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            yield client
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-route deltas against ``baseline``; True when something regressed"""
+    regressed = False
+    print(f"\nvs baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for route, stats in current["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            print(f"  {route:34s} (new)")
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            if not before[key]:
+                continue
+            change = (stats[key] - before[key]) / before[key]
+            # Latency going up or throughput going down is a regression
+            worse = change > threshold if key != "rps" else change < -threshold
+            regressed |= worse and key != "p99_ms"
+            deltas.append(f"{key} {change:+6.1%}{' !' if worse else '  '}")
+        print(f"  {route:34s} " + "  ".join(deltas))
+    return regressed
+
+
+async def run(args):
+    from auth import create_access_token
+    from hashing import pwd_context
+
+    mix = parse_mix(args.mix)
+    fake = FakePostgrest(args.latency_ms / 1000, args.jitter, args.row_us / 1e6, seed=args.seed)
+    agents, hunters = fake.seed(args.listings, args.hunters, args.agents, pwd_context.hash(PASSWORD), seed=args.seed)
+    seed = Seed(fake, agents, hunters, create_access_token)
+
+    if args.base_url:
+        client_cm = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        client_cm = in_process_app(fake)
+
+    recorder = Recorder()
+    async with client_cm as client:
+        names, weights = list(mix), list(mix.values())
+        # Warm-up: worker pool start-up and first-request costs are not measured
+        await login(Context(client, Recorder(), random.Random(0), seed, args))
+
+        deadline = time.perf_counter() + args.duration
+        start = time.perf_counter()
+
+        async def virtual_user(index: int):
+            user_ctx = Context(client, recorder, random.Random(args.seed + index), seed, args)
+            while time.perf_counter() < deadline:
+                await SCENARIOS[user_ctx.rng.choices(names, weights)[0]](user_ctx)
+
+        await asyncio.gather(*(virtual_user(i) for i in range(args.users)))
+        elapsed = time.perf_counter() - start
+
+    routes = recorder.summary(elapsed)
+    total = sum(r["requests"] for r in routes.values())
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "mode": "base-url" if args.base_url else "in-process",
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        },
+        "total": {"requests": total, "rps": round(total / elapsed, 2), "elapsed_s": round(elapsed, 2),
+                  "upstream_requests": fake.requests if not args.base_url else None},
+        "routes": routes,
+    }
+
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), {args.users} virtual users")
+    print(f"  {'route':34s} {'reqs':>7s} {'err':>5s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s}")
+    for route, stats in routes.items():
+        print(
+            f"  {route:34s} {stats['requests']:7d} {stats['errors']:5d} {stats['rps']:8.1f} "
+            f"{stats['p50_ms']:7.1f}ms {stats['p95_ms']:7.1f}ms {stats['p99_ms']:7.1f}ms"
+            + (f"  {stats['statuses']}" if stats["errors"] else "")
+        )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(result, json.load(f), args.threshold):
+                print(f"\nRegression beyond {args.threshold:.0%}")
+                return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--users", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. browse=50,detail=25")
+    parser.add_argument("--listings", type=int, default=20_000)
+    parser.add_argument("--hunters", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="fake database round-trip")
+    parser.add_argument("--jitter", type=float, default=0.5, help="extra random latency, as a fraction")
+    parser.add_argument("--row-us", type=float, default=0.0, help="fake database cost per returned row")
+    parser.add_argument("--burst", type=int, default=8, help="concurrent logins per login scenario")
+    parser.add_argument("--bulk-size", type=int, default=50, help="listings per bulk edit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Deterministic synthetic listings for the benchmark scripts
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+# (name, lat, lng) for a spread of Singapore estates / MRT areas
+LOCATIONS = [
+    ("Ang Mo Kio", 1.3700, 103.8496), ("Bedok", 1.3240, 103.9300), ("Bishan", 1.3508, 103.8485),
+    ("Boon Lay", 1.3386, 103.7058), ("Bukit Batok", 1.3490, 103.7496), ("Bukit Panjang", 1.3784, 103.7619),
+    ("Buona Vista", 1.3072, 103.7900), ("Choa Chu Kang", 1.3854, 103.7444), ("Clementi", 1.3151, 103.7652),
+    ("Hougang", 1.3712, 103.8924), ("Jurong East", 1.3332, 103.7423), ("Kallang", 1.3114, 103.8714),
+    ("Marine Parade", 1.3030, 103.9070), ("Novena", 1.3204, 103.8438), ("Orchard", 1.3043, 103.8320),
+    ("Pasir Ris", 1.3731, 103.9493), ("Punggol", 1.4052, 103.9023), ("Queenstown", 1.2948, 103.8060),
+    ("Sembawang", 1.4491, 103.8200), ("Sengkang", 1.3916, 103.8954), ("Serangoon", 1.3496, 103.8736),
+    ("Tampines", 1.3532, 103.9452), ("Tanjong Pagar", 1.2764, 103.8458), ("Toa Payoh", 1.3327, 103.8474),
+    ("Woodlands", 1.4370, 103.7865), ("Yishun", 1.4294, 103.8350),
+]
+
+ADJECTIVES = ["Modern", "Spacious", "Cosy", "Renovated", "Bright", "Luxurious", "Quiet", "Family", "Corner", "High-floor"]
+FEATURES = ["Renovated kitchen", "Built-in wardrobes", "Balcony", "Smart home", "Aircon", "Unblocked view",
+            "Corner unit", "Walk-in closet", "Near MRT", "Pet friendly", "Study room", "Yard"]
+AMENITIES = ["Swimming pool", "Gym", "Playground", "BBQ pits", "Tennis court", "Covered parking",
+             "Function room", "Jogging track", "Sauna", "Clubhouse", "Hawker centre", "Supermarket"]
+STREETS = ["Avenue", "Street", "Road", "Drive", "Crescent", "Central", "Walk", "Rise"]
+TYPES = ["hdb", "condo", "landed"]
+
+
+def make_listing(rng: random.Random, index: int, owner_ids: List[str]) -> Dict[str, Any]:
+    location, lat, lng = rng.choice(LOCATIONS)
+    property_type = rng.choices(TYPES, weights=[6, 3, 1])[0]
+    listing_type = rng.choice(["rent", "sale"])
+    bedrooms = rng.randint(1, 5)
+    size = float(rng.randrange(400, 3500, 10))
+    if listing_type == "rent":
+        price = float(rng.randrange(1500, 12000, 50))
+    else:
+        price = float(rng.randrange(300_000, 5_000_000, 1000))
+    created = datetime(2023, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=index * 3)
+    adjective = rng.choice(ADJECTIVES)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": f"{adjective} {bedrooms}-Bedroom {property_type.upper() if property_type == 'hdb' else property_type.title()} in {location}",
+        "description": (
+            f"{adjective} {property_type} unit near {location} MRT with {bedrooms} bedrooms. "
+            f"{rng.choice(FEATURES)} and {rng.choice(AMENITIES).lower()} nearby."
+        ),
+        "address": f"{rng.randint(1, 999)} {location} {rng.choice(STREETS)} {rng.randint(1, 9)}, Singapore {rng.randint(100000, 829999)}",
+        "price": price,
+        "bedrooms": bedrooms,
+        "bathrooms": max(1, bedrooms - rng.randint(0, 2)),
+        "size": size,
+        "property_type": property_type,
+        "listing_type": listing_type,
+        "features": rng.sample(FEATURES, 3),
+        "amenities": rng.sample(AMENITIES, 3),
+        "images": [f"https://images.example.com/{index}/{i}.jpg" for i in range(3)],
+        "location": location,
+        "lat": round(lat + rng.uniform(-0.01, 0.01), 6),
+        "lng": round(lng + rng.uniform(-0.01, 0.01), 6),
+        "owner_id": rng.choice(owner_ids),
+        "contact_name": "Agent",
+        "contact_phone": f"{rng.randint(80000000, 99999999)}",
+        "contact_email": "agent@example.com",
+        "is_active": True,
+        "created_at": created.isoformat(),
+        "updated_at": created.isoformat(),
+    }
+
+
+def make_listings(count: int, seed: int = 42, owners: int = 50) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    owner_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(owners)]
+    return [make_listing(rng, i, owner_ids) for i in range(count)]
@@ -0,0 +1,182 @@
+"""
+Batched listing writes for agents migrating their inventory
+
+Items are validated one by one so a bad item is reported without failing
+the batch, then written in chunked multi-row statements: a single INSERT
+per chunk for creates, and one call per chunk to the
+``bulk_update_properties`` / ``bulk_deactivate_properties`` functions
+(see properties_schema.sql) for updates and deactivations, which match on
+``owner_id`` inside the same statement. When a chunk is rejected it is
+split in half and retried, so the offending items are isolated and every
+other item still goes through.
+"""
+
+import asyncio
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from models import BulkItemResult, BulkPropertyUpdate, PropertyCreate
+from database import Database
+from rest_client import APIError
+from repository import listing_coordinates
+from transit import moves_one_coordinate, with_transit
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "5000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "4"))
+
+# (position in the request, payload sent to the database)
+Item = Tuple[int, Dict[str, Any]]
+
+
+def listing_row(data: PropertyCreate, owner_id: str) -> Dict[str, Any]:
+    """Insert payload for a new listing owned by ``owner_id``"""
+    row = data.model_dump()
+    row["owner_id"] = owner_id
+    return with_transit(row)
+
+
+def validate(items: Sequence[Any], model: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[BulkItemResult]]:
+    """Split raw items into validated models and per-item validation errors"""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            item_id = item.get("id") if isinstance(item, dict) else None
+            errors.append(BulkItemResult(index=index, id=item_id, status="invalid", error=problems))
+    return valid, errors
+
+
+async def _write_chunk(
+    write: Callable[[List[Item]], Awaitable[List[BulkItemResult]]],
+    chunk: List[Item],
+) -> List[BulkItemResult]:
+    try:
+        return await write(chunk)
+    except APIError as e:
+        # Only a statement the database rejected (4xx) is known to have been
+        # rolled back; after a transport failure the outcome is unknown, so
+        # the chunk is reported rather than retried.
+        rejected = e.status_code is not None and 400 <= e.status_code < 500
+        if len(chunk) == 1 or not rejected:
+            return [
+                BulkItemResult(index=index, id=payload.get("id"), status="error", error=e.message)
+                for index, payload in chunk
+            ]
+        middle = len(chunk) // 2
+        return await _write_chunk(write, chunk[:middle]) + await _write_chunk(write, chunk[middle:])
+
+
+async def write_chunked(
+    write: Callable[[List[Item]], Awaitable[List[BulkItemResult]]],
+    items: List[Item],
+) -> List[BulkItemResult]:
+    """Run ``write`` over ``BULK_CHUNK_SIZE`` chunks, a few chunks at a time"""
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def run(chunk: List[Item]) -> List[BulkItemResult]:
+        async with semaphore:
+            return await _write_chunk(write, chunk)
+
+    chunks = [items[i:i + BULK_CHUNK_SIZE] for i in range(0, len(items), BULK_CHUNK_SIZE)]
+    results: List[BulkItemResult] = []
+    for chunk_results in await asyncio.gather(*(run(chunk) for chunk in chunks)):
+        results.extend(chunk_results)
+    return results
+
+
+async def create_listings(
+    db: Database, owner_id: str, items: List[Tuple[int, PropertyCreate]], on_row: Callable[[Dict[str, Any]], None]
+) -> List[BulkItemResult]:
+    async def write(chunk: List[Item]) -> List[BulkItemResult]:
+        result = await db.table("properties").insert([payload for _, payload in chunk]).execute()
+        # PostgREST returns inserted rows in input order
+        for row in result.data:
+            on_row(row)
+        return [
+            BulkItemResult(index=index, id=row["id"], status="created")
+            for (index, _), row in zip(chunk, result.data)
+        ]
+
+    return await write_chunked(write, [(index, listing_row(data, owner_id)) for index, data in items])
+
+
+async def update_listings(
+    db: Database, owner_id: str, items: List[Tuple[int, BulkPropertyUpdate]], on_row: Callable[[Dict[str, Any]], None]
+) -> List[BulkItemResult]:
+    async def write(chunk: List[Item]) -> List[BulkItemResult]:
+        partial = [payload for _, payload in chunk if moves_one_coordinate(payload)]
+        if partial:
+            # Items moving along one axis keep the stored other coordinate
+            stored = await listing_coordinates(db, owner_id, [payload["id"] for payload in partial])
+            for payload in partial:
+                with_transit(payload, stored.get(payload["id"], {}))
+        result = await db.rpc("bulk_update_properties", {
+            "p_owner_id": owner_id,
+            "p_items": [payload for _, payload in chunk],
+        }).execute()
+        updated = {_canonical(row["id"]): row for row in result.data}
+        results = []
+        for index, payload in chunk:
+            row = updated.get(payload["id"])
+            if row is None:
+                results.append(BulkItemResult(index=index, id=payload["id"], status="not_found"))
+            else:
+                on_row(row)
+                results.append(BulkItemResult(index=index, id=row["id"], status="updated"))
+        return results
+
+    payloads, rejected = _unique(
+        (index, with_transit({k: v for k, v in data.model_dump().items() if v is not None})) for index, data in items
+    )
+    return rejected + await write_chunked(write, payloads)
+
+
+async def deactivate_listings(
+    db: Database, owner_id: str, ids: List[str], on_id: Callable[[str], None]
+) -> List[BulkItemResult]:
+    async def write(chunk: List[Item]) -> List[BulkItemResult]:
+        result = await db.rpc("bulk_deactivate_properties", {
+            "p_owner_id": owner_id,
+            "p_ids": [payload["id"] for _, payload in chunk],
+        }).execute()
+        deactivated = {_canonical(row["id"]) for row in result.data}
+        results = []
+        for index, payload in chunk:
+            if payload["id"] in deactivated:
+                on_id(payload["id"])
+                results.append(BulkItemResult(index=index, id=payload["id"], status="deactivated"))
+            else:
+                results.append(BulkItemResult(index=index, id=payload["id"], status="not_found"))
+        return results
+
+    payloads, rejected = _unique((index, {"id": pid}) for index, pid in enumerate(ids))
+    return rejected + await write_chunked(write, payloads)
+
+
+def _canonical(property_id: str) -> str:
+    """Lower-case hyphenated form, as the database returns uuids"""
+    return str(uuid.UUID(str(property_id)))
+
+
+def _unique(items: Iterable[Item]) -> Tuple[List[Item], List[BulkItemResult]]:
+    """Canonicalize ids, rejecting malformed and repeated ones (a single
+    statement cannot apply two changes to one row)"""
+    seen, unique, rejected = set(), [], []
+    for index, payload in items:
+        try:
+            property_id = _canonical(payload["id"])
+        except ValueError:
+            rejected.append(BulkItemResult(index=index, id=payload["id"], status="invalid", error="Invalid id"))
+            continue
+        if property_id in seen:
+            rejected.append(BulkItemResult(index=index, id=payload["id"], status="invalid", error="Duplicate id in request"))
+        else:
+            seen.add(property_id)
+            unique.append((index, dict(payload, id=property_id)))
+    return unique, rejected
@@ -0,0 +1,137 @@
+"""
+In-process caches shared by the API modules
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache whose entries also expire after a time-to-live.
+
+    Not thread-safe; intended for use from the event loop only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = ""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class QueryCache:
+    """Result cache for read queries with generation-based invalidation.
+
+    Keys are prefixed with the current generation, so ``invalidate_all``
+    (one integer increment) makes every cached result unreachable; the
+    stale entries age out through the LRU. Concurrent misses for the same
+    key share one upstream load (single-flight). The load runs as its own
+    task, so a caller that disconnects does not cancel it for the others.
+
+    Doubles as a catalogue listener: any listing write bumps the generation.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = ""):
+        self._cache = TTLCache(maxsize, ttl, name=name)
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+        self.generation = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        key = (self.generation, key)
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            self.loads += 1
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Future") -> None:
+        self._inflight.pop(key, None)
+        # Reading the exception also marks it retrieved when nobody awaited it
+        if not task.cancelled() and task.exception() is None:
+            self._cache.set(key, task.result())
+
+    def invalidate_all(self) -> None:
+        self.generation += 1
+
+    # Catalogue listener interface
+    def reset(self, rows) -> None:
+        self.invalidate_all()
+
+    def upsert(self, row) -> None:
+        self.invalidate_all()
+
+    def remove(self, property_id) -> None:
+        self.invalidate_all()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            # Share of lookups answered without an upstream call of their own
+            "hit_ratio": round((lookups - self.loads) / lookups, 4) if lookups else 0.0,
+            "upstream_calls": self.loads,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "generation": self.generation,
+        }
@@ -0,0 +1,87 @@
+"""
+In-process catalogue of active listings
+
+Holds the active ``properties`` rows of this worker and fans every change
+out to the registered in-memory indexes (search, geo, ...). It is filled
+from the database at startup and kept current by the property write
+routes, which call ``upsert`` / ``remove`` after each successful write.
+Rows read before the transit columns were backfilled get them computed
+here, so the indexes can rely on them.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Protocol
+
+from pagination import apply_keyset, apply_sort, sort_key
+from transit import fill_transit
+
+LOAD_CHUNK_SIZE = 1000
+
+
+class CatalogListener(Protocol):
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None: ...
+
+    def upsert(self, row: Dict[str, Any]) -> None: ...
+
+    def remove(self, property_id: str) -> None: ...
+
+
+class ListingCatalog:
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.loaded = False
+        self._listeners: List[CatalogListener] = []
+
+    def register(self, listener: CatalogListener) -> None:
+        self._listeners.append(listener)
+        if self.loaded:
+            listener.reset(self.rows.values())
+
+    def get(self, property_id: str) -> Optional[Dict[str, Any]]:
+        return self.rows.get(property_id)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.rows = {row["id"]: row for row in rows if row.get("is_active", True)}
+        for row in self.rows.values():
+            fill_transit(row)
+        self.loaded = True
+        for listener in self._listeners:
+            listener.reset(self.rows.values())
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        """Record a written row; inactive rows are removed"""
+        if not row.get("is_active", True):
+            self.remove(row["id"])
+            return
+        fill_transit(row)
+        self.rows[row["id"]] = row
+        for listener in self._listeners:
+            listener.upsert(row)
+
+    def remove(self, property_id: str) -> None:
+        if self.rows.pop(property_id, None) is None:
+            return
+        for listener in self._listeners:
+            listener.remove(property_id)
+
+    async def load(self, db) -> int:
+        """Replace the catalogue with every active listing, fetched in keyset chunks"""
+        rows: List[Dict[str, Any]] = []
+        last = None
+        while True:
+            query = db.table("properties").select("*").eq("is_active", True)
+            query = apply_sort(query, "newest")
+            if last is not None:
+                query = apply_keyset(query, "newest", sort_key("newest", last))
+            result = await query.limit(LOAD_CHUNK_SIZE).execute()
+            rows.extend(result.data)
+            if len(result.data) < LOAD_CHUNK_SIZE:
+                break
+            last = result.data[-1]
+        self.reset(rows)
+        return len(rows)
+
+
+catalog = ListingCatalog()
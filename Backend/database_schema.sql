@@ -32,8 +32,12 @@ CREATE TABLE IF NOT EXISTS properties (
     features TEXT[],
     amenities TEXT[],
     images TEXT[],
+    location VARCHAR(100),
     lat DECIMAL(10,8),
     lng DECIMAL(11,8),
+    nearest_station VARCHAR(50),
+    station_distance_m INTEGER,
+    nearby_stations JSONB,
     contact_name VARCHAR(100) NOT NULL,
     contact_phone VARCHAR(8) NOT NULL,
     contact_email VARCHAR(255) NOT NULL,
@@ -52,6 +56,25 @@ CREATE TABLE IF NOT EXISTS favorites (
     UNIQUE(user_id, property_id)
 );
 
+-- Create saved searches table (a PropertyFilters object per search)
+CREATE TABLE IF NOT EXISTS saved_searches (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    name VARCHAR(100) NOT NULL,
+    filters JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Listings that matched a saved search when they were created or updated
+CREATE TABLE IF NOT EXISTS search_matches (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    search_id UUID REFERENCES saved_searches(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    property_id UUID REFERENCES properties(id) ON DELETE CASCADE,
+    matched_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(search_id, property_id)
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_user_type ON users(user_type);
@@ -60,8 +83,42 @@ CREATE INDEX IF NOT EXISTS idx_properties_property_type ON properties(property_t
 CREATE INDEX IF NOT EXISTS idx_properties_listing_type ON properties(listing_type);
 CREATE INDEX IF NOT EXISTS idx_properties_price ON properties(price);
 CREATE INDEX IF NOT EXISTS idx_properties_is_active ON properties(is_active);
+CREATE INDEX IF NOT EXISTS idx_properties_active_created_id ON properties(created_at DESC, id DESC) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_properties_active_price_id ON properties(price, id) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_properties_active_size_id ON properties(size, id) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_properties_active_station_id ON properties(station_distance_m, id) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_properties_location ON properties(location);
 CREATE INDEX IF NOT EXISTS idx_favorites_user_id ON favorites(user_id);
 CREATE INDEX IF NOT EXISTS idx_favorites_property_id ON favorites(property_id);
+CREATE INDEX IF NOT EXISTS idx_saved_searches_user_id ON saved_searches(user_id);
+CREATE INDEX IF NOT EXISTS idx_search_matches_user_matched ON search_matches(user_id, matched_at DESC);
+CREATE INDEX IF NOT EXISTS idx_search_matches_property_id ON search_matches(property_id);
+
+-- Computed column: first image URL, selectable as "thumbnail" through PostgREST
+CREATE OR REPLACE FUNCTION thumbnail(properties)
+RETURNS TEXT AS $$
+    SELECT $1.images[1];
+$$ LANGUAGE SQL STABLE;
+
+-- The bulk listing write functions (bulk_update_properties,
+-- bulk_deactivate_properties) are defined in properties_schema.sql only,
+-- next to the listing columns they write.
+
+-- Saved search creation (POST /api/saved-searches/) with the per-user cap
+-- enforced in the database. Locking the user's row serialises concurrent
+-- creates for the same user, so the count cannot be stale when the insert
+-- runs. Returns no row when the user already has p_limit searches.
+CREATE OR REPLACE FUNCTION create_saved_search(p_user_id UUID, p_name TEXT, p_filters JSONB, p_limit INTEGER)
+RETURNS SETOF saved_searches AS $$
+BEGIN
+    PERFORM 1 FROM users WHERE id = p_user_id FOR UPDATE;
+    RETURN QUERY
+    INSERT INTO saved_searches (user_id, name, filters)
+    SELECT p_user_id, p_name, p_filters
+    WHERE (SELECT count(*) FROM saved_searches WHERE user_id = p_user_id) < p_limit
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -83,6 +140,8 @@ CREATE TRIGGER update_properties_updated_at BEFORE UPDATE ON properties
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE properties ENABLE ROW LEVEL SECURITY;
 ALTER TABLE favorites ENABLE ROW LEVEL SECURITY;
+ALTER TABLE saved_searches ENABLE ROW LEVEL SECURITY;
+ALTER TABLE search_matches ENABLE ROW LEVEL SECURITY;
 
 -- Create RLS policies for users
 CREATE POLICY "Users can view their own profile" ON users
@@ -126,6 +185,13 @@ CREATE POLICY "Users can create their own favorites" ON favorites
 CREATE POLICY "Users can delete their own favorites" ON favorites
     FOR DELETE USING (auth.uid() = user_id);
 
+-- Create RLS policies for saved searches and their matches
+CREATE POLICY "Users can manage their own saved searches" ON saved_searches
+    FOR ALL USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view their own search matches" ON search_matches
+    FOR SELECT USING (auth.uid() = user_id);
+
 -- Insert sample data (optional)
 INSERT INTO users (name, email, user_type, password_hash, phone, agent_license) VALUES
 ('John Doe', 'john@example.com', 'hunter', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj4J/HSKz8m2', NULL, NULL),
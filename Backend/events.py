@@ -0,0 +1,372 @@
+"""
+In-process pub/sub of listing changes, served as Server-Sent Events
+
+The property write routes ``publish`` every create, update and
+deactivation to ``listing_events``; ``GET /api/properties/stream``
+subscribes with the listing filters and streams the matching events.
+
+- Subscribers with identical filters share a group, and the groups are
+  kept in a ``saved_searches.MatchIndex``, so a change is matched against
+  the distinct filters it can satisfy rather than every open stream. A
+  subscriber sees a change when the listing matches its filters before or
+  after it (so a listing updated out of a filtered view still arrives, and
+  the client can drop it).
+- Each event is encoded to its SSE frame once and appended to the log of
+  every group it concerns; a subscriber only holds its position in its
+  group's log. Publishing is therefore O(matching groups) and never waits
+  on a client. Parked subscribers of the touched groups are woken from the
+  event loop afterwards, ``SSE_WAKE_BATCH`` at a time, so a write request
+  does not pay for the fan-out and events published together (a bulk
+  write) cost each subscriber one wake-up.
+- A group log keeps the last ``SSE_QUEUE_SIZE`` frames. A subscriber that
+  falls further behind is disconnected and, being an ``EventSource``,
+  reconnects and resumes.
+- The last ``SSE_BUFFER_SIZE`` events are kept so a reconnecting client
+  resumes after its ``Last-Event-ID``. Ids are ``<boot>.<seq>``: an id from
+  another process, or one older than the buffer, gets a ``reset`` event
+  telling the client to refetch.
+- A single task sends the keep-alive comments to idle streams.
+
+Events only cover writes served by this worker.
+"""
+
+import asyncio
+import os
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import orjson
+from starlette.responses import JSONResponse, StreamingResponse
+
+import metrics
+from filters import matches
+from models import PropertyFilters
+from saved_searches import MatchIndex
+from serialization import listing
+
+SSE_BUFFER_SIZE = int(os.getenv("SSE_BUFFER_SIZE", "1000"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "256"))
+SSE_MAX_SUBSCRIBERS = int(os.getenv("SSE_MAX_SUBSCRIBERS", "50000"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+SSE_WAKE_BATCH = int(os.getenv("SSE_WAKE_BATCH", "1000"))
+
+# Filter groups are indexed as searches with no owner, so no listing is
+# excluded as its owner's own
+_NO_OWNER = str(uuid.UUID(int=0))
+_PING = b": ping\n\n"
+
+
+class _Event:
+    __slots__ = ("seq", "frame", "row", "previous")
+
+    def __init__(self, seq: int, frame: bytes, row: Optional[Dict[str, Any]], previous: Optional[Dict[str, Any]]):
+        self.seq = seq
+        self.frame = frame
+        self.row = row
+        self.previous = previous
+
+    def visible(self, filters: PropertyFilters) -> bool:
+        """Whether a subscriber filtering on ``filters`` gets this event"""
+        if self.row is None and self.previous is None:
+            return True  # a deactivation we know nothing about
+        return any(row is not None and matches(filters, row) for row in (self.row, self.previous))
+
+
+class _Group:
+    """Subscribers sharing one set of filters, and the frames sent to them"""
+
+    __slots__ = ("id", "key", "filters", "slot", "members", "log", "evicted", "_joined")
+
+    def __init__(self, key: str, filters: PropertyFilters):
+        self.id = str(uuid.uuid4())
+        self.key = key
+        self.filters = filters
+        self.slot = -1
+        self.members: Set["Subscriber"] = set()
+        self.log: Deque[Tuple[int, bytes]] = deque()
+        # Seq of the newest frame dropped from the log
+        self.evicted = 0
+        # (after, up to, frames): members at the same position share one chunk
+        self._joined: Tuple[int, int, bytes] = (0, 0, b"")
+
+    def append(self, seq: int, frame: bytes) -> None:
+        if len(self.log) >= SSE_QUEUE_SIZE:
+            self.evicted = self.log.popleft()[0]
+        self.log.append((seq, frame))
+
+    def frames_after(self, cursor: int) -> bytes:
+        """The logged frames newer than ``cursor``, joined"""
+        last = self.log[-1][0]
+        after, upto, joined = self._joined
+        if (after, upto) != (cursor, last):
+            new = []
+            for seq, frame in reversed(self.log):
+                if seq <= cursor:
+                    break
+                new.append(frame)
+            joined = b"".join(reversed(new))
+            self._joined = (cursor, last, joined)
+        return joined
+
+
+class Subscriber:
+    __slots__ = ("group", "cursor", "pending", "waiter", "closed")
+
+    def __init__(self, group: _Group, cursor: int, pending: List[bytes]):
+        self.group = group
+        # Seq of the last group frame handed out
+        self.cursor = cursor
+        # Frames outside the group log: replay, reset and keep-alives
+        self.pending = pending
+        self.waiter: Optional[asyncio.Future] = None
+        self.closed = False
+
+    def wake(self) -> None:
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    def close(self) -> None:
+        self.closed = True
+        self.wake()
+
+
+class ListingEventBus:
+    def __init__(self):
+        self.boot = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.buffer: Deque[_Event] = deque(maxlen=SSE_BUFFER_SIZE)
+        self.groups: Dict[str, _Group] = {}
+        self.subscribers = 0
+        self.dropped = 0
+        self._index = MatchIndex()
+        self._slots: Dict[int, _Group] = {}
+        self._touched: Set[_Group] = set()
+        self._wakeups: Deque[Subscriber] = deque()
+        self._waking = False
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.boot}.{seq}"
+
+    # Publishing
+
+    def publish(self, kind: str, row: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> None:
+        """Record a listing change and queue it for every subscriber it concerns.
+
+        ``row`` is the written row (for ``deactivate`` only its ``id`` is
+        used) and ``previous`` the listing as it was, when known. An update
+        that leaves the listing inactive is published as ``deactivate``.
+        """
+        if kind != "deactivate" and not row.get("is_active", True):
+            kind = "deactivate"
+        self.seq += 1
+        data = {"id": row["id"]} if kind == "deactivate" else listing(row)
+        frame = b"id: %s\nevent: %s\ndata: %s\n\n" % (self.event_id(self.seq).encode(), kind.encode(), orjson.dumps(data))
+        current = None if kind == "deactivate" else row
+        self.buffer.append(_Event(self.seq, frame, current, previous))
+        metrics.sse_events.inc(kind)
+        if not self.groups:
+            return
+        for group in self._audience(current, previous):
+            group.append(self.seq, frame)
+            self._touched.add(group)
+        self._schedule_wakeups()
+
+    def _audience(self, row: Optional[Dict[str, Any]], previous: Optional[Dict[str, Any]]) -> List[_Group]:
+        if row is None and previous is None:
+            return list(self.groups.values())
+        slots: Set[int] = set()
+        for version in (row, previous):
+            if version is not None:
+                slots.update(self._index.match_slots(version).tolist())
+        return [self._slots[slot] for slot in slots]
+
+    def _schedule_wakeups(self) -> None:
+        if not self._waking and (self._touched or self._wakeups):
+            self._waking = True
+            asyncio.get_running_loop().call_soon(self._wake_batch)
+
+    def _wake_batch(self) -> None:
+        """Wake parked subscribers of the touched groups, a batch per loop iteration"""
+        for group in self._touched:
+            self._wakeups.extend(s for s in group.members if s.waiter is not None)
+        self._touched.clear()
+        for _ in range(min(SSE_WAKE_BATCH, len(self._wakeups))):
+            self._wakeups.popleft().wake()
+        self._waking = False
+        self._schedule_wakeups()
+
+    # Subscribing
+
+    def subscribe(self, filters: PropertyFilters, last_event_id: Optional[str] = None) -> Optional[Subscriber]:
+        """Open a subscription, replaying what it missed since ``last_event_id``.
+
+        Returns None when ``SSE_MAX_SUBSCRIBERS`` are already connected.
+        """
+        if self.subscribers >= SSE_MAX_SUBSCRIBERS:
+            return None
+        pending = [b"retry: %d\n\n" % SSE_RETRY_MS]
+        if last_event_id:
+            missed = self._replay(last_event_id, filters)
+            if missed is None:
+                pending.append(b"id: %s\nevent: reset\ndata: {}\n\n" % self.event_id(self.seq).encode())
+            else:
+                pending.extend(missed)
+
+        key = filters.model_dump_json(exclude_defaults=True)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = _Group(key, filters)
+            group.slot = self._index.add({"id": group.id, "user_id": _NO_OWNER, "filters": filters})
+            self._slots[group.slot] = group
+        subscriber = Subscriber(group, self.seq, pending)
+        group.members.add(subscriber)
+        self.subscribers += 1
+        metrics.sse_subscribers.inc()
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.get_running_loop().create_task(self._keep_alive())
+        return subscriber
+
+    def _replay(self, last_event_id: str, filters: PropertyFilters) -> Optional[List[bytes]]:
+        """Frames after ``last_event_id``, or None when they are no longer known"""
+        boot, _, seq = last_event_id.partition(".")
+        if boot != self.boot or not seq.isdigit() or int(seq) > self.seq:
+            return None
+        after = int(seq)
+        if after < self.seq - len(self.buffer):
+            return None
+        return [event.frame for event in self.buffer if event.seq > after and event.visible(filters)]
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        group = subscriber.group
+        if subscriber not in group.members:
+            return
+        subscriber.close()
+        group.members.discard(subscriber)
+        self.subscribers -= 1
+        metrics.sse_subscribers.dec()
+        if not group.members:
+            del self.groups[group.key]
+            del self._slots[group.slot]
+            self._touched.discard(group)
+            self._index.discard(group.slot)
+            if self._index.size > 2 * len(self.groups) + 1024:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild the group index without the slots of closed groups"""
+        groups = list(self.groups.values())
+        self._index.reset({"id": g.id, "user_id": _NO_OWNER, "filters": g.filters} for g in groups)
+        self._slots = dict(enumerate(groups))
+        for slot, group in self._slots.items():
+            group.slot = slot
+
+    def _take(self, subscriber: Subscriber) -> Optional[bytes]:
+        """Frames due to ``subscriber``; closes it when it fell behind its group log"""
+        frames, subscriber.pending = subscriber.pending, []
+        group = subscriber.group
+        if group.log and group.log[-1][0] > subscriber.cursor:
+            if group.evicted > subscriber.cursor:
+                self.dropped += 1
+                metrics.sse_dropped.inc()
+                subscriber.close()
+                return None
+            new = group.frames_after(subscriber.cursor)
+            subscriber.cursor = group.log[-1][0]
+            if not frames:
+                return new
+            frames.append(new)
+        return b"".join(frames) if frames else None
+
+    async def next_chunk(self, subscriber: Subscriber) -> Optional[bytes]:
+        """The frames due to ``subscriber``, waiting for some; None once it is closed"""
+        while not subscriber.closed:
+            chunk = self._take(subscriber)
+            if chunk is not None:
+                return chunk
+            if subscriber.closed:
+                break
+            subscriber.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await subscriber.waiter
+            finally:
+                subscriber.waiter = None
+        return None
+
+    async def _keep_alive(self) -> None:
+        """Comment frames to every idle stream, so proxies keep them open"""
+        while self.subscribers:
+            await asyncio.sleep(SSE_HEARTBEAT_SECONDS)
+            for group in list(self.groups.values()):
+                for subscriber in group.members:
+                    if subscriber.waiter is not None:
+                        subscriber.pending.append(_PING)
+                        self._wakeups.append(subscriber)
+            self._schedule_wakeups()
+
+    def close(self) -> None:
+        """End every open stream"""
+        for group in list(self.groups.values()):
+            for subscriber in list(group.members):
+                subscriber.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "filter_groups": len(self.groups),
+            "buffered_events": len(self.buffer),
+            "last_event_id": self.event_id(self.seq),
+            "dropped": self.dropped,
+        }
+
+
+listing_events = ListingEventBus()
+
+
+class EventStreamResponse(StreamingResponse):
+    """``text/event-stream`` body of one subscriber.
+
+    Unlike ``StreamingResponse`` it needs no task group: the response
+    waits on the subscriber, and a single task watching ``receive`` closes
+    the subscriber when the client goes away. The subscription is opened
+    only once the response runs, so a request that never gets that far
+    leaves no subscriber behind.
+    """
+
+    def __init__(
+        self, filters: PropertyFilters, last_event_id: Optional[str] = None, bus: ListingEventBus = listing_events
+    ):
+        super().__init__(
+            iter(()),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        self.filters = filters
+        self.last_event_id = last_event_id
+        self.bus = bus
+
+    async def __call__(self, scope, receive, send) -> None:
+        subscriber = self.bus.subscribe(self.filters, self.last_event_id)
+        if subscriber is None:
+            busy = JSONResponse({"detail": "Too many open event streams"}, status_code=503)
+            await busy(scope, receive, send)
+            return
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            subscriber.close()
+
+        watcher = None
+        try:
+            watcher = asyncio.get_running_loop().create_task(watch_disconnect())
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            while (chunk := await self.bus.next_chunk(subscriber)) is not None:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self.bus.unsubscribe(subscriber)
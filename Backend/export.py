@@ -0,0 +1,117 @@
+"""
+Streaming listing exports (NDJSON and CSV)
+
+Active listings are read in keyset chunks ordered by ``id`` (each chunk
+is an index range scan starting after the last id of the previous one)
+and encoded chunk by chunk into a streaming response. The next chunk is
+fetched while the current one is being written, so at most two chunks
+are held in memory whatever the size of the export.
+"""
+
+import asyncio
+import csv
+import io
+import os
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
+
+import orjson
+
+from fields import FAVORITED, Fields, project_all, select_columns
+from filters import apply_filters
+from models import PropertyFilters
+from database import Database
+from serialization import RESPONSE_FIELDS, listings
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# Exports are anonymous, so the per-user favourite flag is never part of them
+EXPORT_FIELDS = tuple(name for name in RESPONSE_FIELDS if name != FAVORITED)
+
+# Array columns (and nearby_stations, as "station:metres") are flattened into one CSV cell
+CSV_LIST_SEPARATOR = "|"
+
+
+class ExportReader:
+    """Keyset-chunked reader over active listings, optionally for one owner"""
+
+    def __init__(
+        self,
+        db: Database,
+        filters: PropertyFilters,
+        fields: Fields,
+        owner_id: Optional[str] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+    ):
+        self.db = db
+        self.filters = filters
+        self.fields = None if fields is None else tuple(name for name in fields if name != FAVORITED)
+        self.header = self.fields if self.fields is not None else EXPORT_FIELDS
+        self.owner_id = owner_id
+        self.chunk_size = chunk_size
+        self.columns = select_columns(self.fields)
+
+    async def fetch(self, after: Optional[str]) -> List[Dict[str, Any]]:
+        query = self.db.table("properties").select(self.columns).eq("is_active", True)
+        if self.owner_id is not None:
+            query = query.eq("owner_id", self.owner_id)
+        query = apply_filters(query, self.filters)
+        if after is not None:
+            query = query.gt("id", after)
+        result = await query.order("id").limit(self.chunk_size).execute()
+        return result.data
+
+    async def chunks(self, first: List[Dict[str, Any]]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield ``first`` and every following chunk, prefetching one ahead"""
+        chunk = first
+        while chunk:
+            pending = None
+            if len(chunk) == self.chunk_size:
+                pending = asyncio.ensure_future(self.fetch(chunk[-1]["id"]))
+            try:
+                yield chunk
+            except BaseException:
+                if pending is not None:
+                    pending.cancel()
+                raise
+            chunk = await pending if pending is not None else []
+
+    def payload(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.fields is not None:
+            return project_all(rows, self.fields)
+        items = listings(rows)
+        for item in items:
+            del item[FAVORITED]
+        return items
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, dict):
+        return CSV_LIST_SEPARATOR.join(f"{key}:{item}" for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return CSV_LIST_SEPARATOR.join(str(item) for item in value)
+    return "" if value is None else value
+
+
+def _csv_encode(rows: List[Tuple[Any, ...]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\r\n").writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def encode(reader: ExportReader, first: List[Dict[str, Any]], format: ExportFormat) -> AsyncIterator[bytes]:
+    """Encoded export body, one bytes block per chunk"""
+    if format == "csv":
+        header = reader.header
+        yield _csv_encode([header])
+        async for chunk in reader.chunks(first):
+            yield _csv_encode([
+                tuple(_csv_cell(item.get(name)) for name in header)
+                for item in reader.payload(chunk)
+            ])
+    else:
+        async for chunk in reader.chunks(first):
+            yield b"".join(orjson.dumps(item) + b"\n" for item in reader.payload(chunk))
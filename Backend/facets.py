@@ -0,0 +1,216 @@
+"""
+Incrementally maintained facet counts and price histogram
+
+Every active listing contributes one count to a cell of a small data cube
+keyed by (property_type, listing_type, location, bedroom bucket, price
+bucket). Writes adjust a single cell, and a facet request walks the
+non-empty cells once, so its cost depends on the number of distinct
+cells rather than the number of listings.
+
+Filters the cube cannot answer exactly (bathrooms, size, transit, text search,
+price bounds between histogram edges, or bedroom bounds inside the "5+"
+bucket) are counted from the columnar snapshot instead.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models import PropertyFilters
+
+# "Nice" price edges, ten per decade from $100 to $100M, so typical
+# min/max price inputs (2000, 3500, 1000000, ...) fall on bucket edges
+_MANTISSAS = (1, 1.25, 1.5, 2, 2.5, 3, 4, 5, 6, 7.5)
+PRICE_EDGES: List[float] = [m * 10 ** e for e in range(2, 8) for m in _MANTISSAS] + [1e8]
+_EDGE_SET = set(PRICE_EDGES)
+
+MAX_BEDROOM_BUCKET = 5
+
+Cell = Tuple[str, str, Optional[str], int, int]
+
+FACET_DIMENSIONS = ("property_type", "listing_type", "location", "bedrooms")
+
+
+def price_key(price: float) -> int:
+    """Monotonic price key: ``2i`` strictly between edges i-1 and i, ``2i+1`` exactly on edge i.
+
+    Keeping on-edge prices apart lets both inclusive bounds (``>= edge`` and
+    ``<= edge``) be answered exactly from the cube.
+    """
+    i = bisect_left(PRICE_EDGES, price)
+    return 2 * i + 1 if i < len(PRICE_EDGES) and PRICE_EDGES[i] == price else 2 * i
+
+
+def price_bin(key: int) -> int:
+    """Histogram bin ``[edge i-1, edge i)`` for a price key (0 = below the first edge)"""
+    return (key + 1) // 2
+
+
+def bedroom_bucket(bedrooms: int) -> int:
+    return min(int(bedrooms), MAX_BEDROOM_BUCKET)
+
+
+def bedroom_label(bucket: int) -> str:
+    return f"{bucket}+" if bucket == MAX_BEDROOM_BUCKET else str(bucket)
+
+
+def bucket_bounds(bucket: int) -> Tuple[Optional[float], Optional[float]]:
+    low = PRICE_EDGES[bucket - 1] if bucket > 0 else None
+    high = PRICE_EDGES[bucket] if bucket < len(PRICE_EDGES) else None
+    return low, high
+
+
+def _cell(row: Dict[str, Any]) -> Cell:
+    return (
+        row["property_type"],
+        row["listing_type"],
+        row.get("location"),
+        bedroom_bucket(row["bedrooms"]),
+        price_key(float(row["price"])),
+    )
+
+
+class FacetIndex:
+    def __init__(self):
+        self._cells: Counter = Counter()
+        self._by_id: Dict[str, Cell] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    # Catalogue listener interface
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for row in rows:
+            self.upsert(row)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        self.remove(row["id"])
+        cell = _cell(row)
+        self._by_id[row["id"]] = cell
+        self._cells[cell] += 1
+
+    def remove(self, property_id: str) -> None:
+        cell = self._by_id.pop(property_id, None)
+        if cell is None:
+            return
+        self._cells[cell] -= 1
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    # Queries
+    @staticmethod
+    def supports(filters: PropertyFilters) -> bool:
+        """Whether the cube answers ``filters`` exactly"""
+        if filters.search or filters.min_bathrooms is not None or filters.max_bathrooms is not None:
+            return False
+        if filters.min_size is not None or filters.max_size is not None:
+            return False
+        if filters.station or filters.max_station_distance is not None:
+            return False
+        if filters.max_bedrooms is not None and filters.max_bedrooms >= MAX_BEDROOM_BUCKET:
+            return False
+        if filters.min_bedrooms is not None and filters.min_bedrooms > MAX_BEDROOM_BUCKET:
+            return False
+        for bound in (filters.min_price, filters.max_price):
+            if bound is not None and bound not in _EDGE_SET:
+                return False
+        return True
+
+    def counts(self, filters: PropertyFilters) -> Dict[str, Any]:
+        """Facet counts for ``filters``; each facet ignores its own filter"""
+        property_types = {t.value for t in filters.property_types}
+        locations = set(filters.locations)
+        listing_type = filters.listing_type.value if filters.listing_type else None
+        min_key = price_key(filters.min_price) if filters.min_price is not None else None
+        max_key = price_key(filters.max_price) if filters.max_price is not None else None
+
+        min_beds, max_beds = filters.min_bedrooms, filters.max_bedrooms
+        tests = (
+            lambda v: not property_types or v in property_types,
+            lambda v: listing_type is None or v == listing_type,
+            lambda v: not locations or v in locations,
+            lambda v: (min_beds is None or v >= min_beds) and (max_beds is None or v <= max_beds),
+        )
+        # Each dimension has few distinct values: test each value once
+        verdicts: List[Dict[Any, bool]] = [{} for _ in tests]
+
+        facets: List[Counter] = [Counter() for _ in FACET_DIMENSIONS]
+        histogram: Counter = Counter()
+        total = 0
+
+        for cell, count in self._cells.items():
+            failed = -1
+            for dim in range(4):
+                value = cell[dim]
+                ok = verdicts[dim].get(value)
+                if ok is None:
+                    ok = verdicts[dim][value] = tests[dim](value)
+                if not ok:
+                    if failed >= 0:
+                        break
+                    failed = dim
+            else:
+                pkey = cell[4]
+                price_ok = (min_key is None or pkey >= min_key) and (max_key is None or pkey <= max_key)
+                if failed < 0:
+                    # Matches every dimension filter: counts toward the
+                    # histogram, and toward everything else if the price fits
+                    histogram[price_bin(pkey)] += count
+                    if price_ok:
+                        total += count
+                        for dim in range(4):
+                            facets[dim][cell[dim]] += count
+                elif price_ok:
+                    # Fails only its own dimension: still counts in that facet
+                    facets[failed][cell[failed]] += count
+
+        return _format(total, dict(zip(FACET_DIMENSIONS, facets)), histogram, "aggregates")
+
+
+def _format(total: int, facets: Dict[str, Counter], histogram: Counter, source: str) -> Dict[str, Any]:
+    bins = []
+    for bucket in sorted(histogram):
+        low, high = bucket_bounds(bucket)
+        bins.append({"min": low, "max": high, "count": histogram[bucket]})
+    return {
+        "total": total,
+        "property_type": dict(facets["property_type"]),
+        "listing_type": dict(facets["listing_type"]),
+        "location": {k: v for k, v in facets["location"].items() if k is not None},
+        "bedrooms": {bedroom_label(k): v for k, v in sorted(facets["bedrooms"].items())},
+        "price_histogram": bins,
+        "source": source,
+    }
+
+
+def snapshot_counts(snapshot, filters: PropertyFilters, rows) -> Dict[str, Any]:
+    """Same result as ``FacetIndex.counts``, computed from the columnar snapshot"""
+    from snapshot import LISTING_TYPES, PROPERTY_TYPES
+
+    def without(**update) -> np.ndarray:
+        return snapshot.select(filters.model_copy(update=update), rows)
+
+    facets: Dict[str, Counter] = {}
+    slots = without(property_types=[])
+    facets["property_type"] = Counter({PROPERTY_TYPES[c]: int(n) for c, n in zip(*np.unique(snapshot.column("property_type", slots), return_counts=True))})
+    slots = without(listing_type=None)
+    facets["listing_type"] = Counter({LISTING_TYPES[c]: int(n) for c, n in zip(*np.unique(snapshot.column("listing_type", slots), return_counts=True))})
+    names = snapshot.location_names()
+    slots = without(locations=[])
+    facets["location"] = Counter({names.get(c): int(n) for c, n in zip(*np.unique(snapshot.column("location", slots), return_counts=True))})
+    slots = without(min_bedrooms=None, max_bedrooms=None)
+    beds = np.minimum(snapshot.column("bedrooms", slots), MAX_BEDROOM_BUCKET)
+    facets["bedrooms"] = Counter({int(c): int(n) for c, n in zip(*np.unique(beds, return_counts=True))})
+
+    slots = without(min_price=None, max_price=None)
+    buckets = np.searchsorted(np.array(PRICE_EDGES), snapshot.column("price", slots), side="right")
+    histogram = Counter({int(c): int(n) for c, n in zip(*np.unique(buckets, return_counts=True))})
+
+    total = len(snapshot.select(filters, rows))
+    return _format(total, facets, histogram, "snapshot")
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,95 @@
+"""
+Favourite listings and the per-user favourite-id cache
+
+Each user's set of favourited property ids is cached (write-through on
+add/remove, TTL-bounded so changes made through other workers show up),
+which lets listing responses carry ``is_favorited`` without an extra
+query per page. Listing a user's favourites embeds the properties in the
+favourites query, so hydration is a single joined round-trip.
+"""
+
+import os
+import uuid
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from cache import TTLCache
+from database import Database
+
+FAVORITES_CACHE_TTL = float(os.getenv("FAVORITES_CACHE_TTL", "60"))
+FAVORITES_CACHE_SIZE = int(os.getenv("FAVORITES_CACHE_SIZE", "10000"))
+
+_favorite_cache = TTLCache(FAVORITES_CACHE_SIZE, FAVORITES_CACHE_TTL, name="favorites")
+
+
+async def favorite_ids(db: Database, user_id: str) -> FrozenSet[str]:
+    """Ids of every property ``user_id`` has favourited"""
+    ids = _favorite_cache.get(user_id)
+    if ids is None:
+        result = await db.table("favorites").select("property_id").eq("user_id", user_id).execute()
+        ids = frozenset(row["property_id"] for row in result.data)
+        _favorite_cache.set(user_id, ids)
+    return ids
+
+
+def _property_id(property_id: str) -> Optional[str]:
+    """Canonical form of ``property_id``; None when it is not a uuid"""
+    try:
+        return str(uuid.UUID(property_id))
+    except ValueError:
+        return None
+
+
+async def add_favorite(db: Database, user_id: str, property_id: str) -> bool:
+    """Favourite a property (idempotent); False when it is not an active listing"""
+    property_id = _property_id(property_id)
+    if property_id is None:
+        return False
+    listing = await db.table("properties").select("id").eq("id", property_id).eq("is_active", True).limit(1).execute()
+    if not listing.data:
+        return False
+    await db.table("favorites").upsert(
+        {"user_id": user_id, "property_id": property_id},
+        on_conflict="user_id,property_id",
+    ).execute()
+    cached = _favorite_cache.get(user_id)
+    if cached is not None:
+        _favorite_cache.set(user_id, cached | {property_id})
+    return True
+
+
+async def remove_favorite(db: Database, user_id: str, property_id: str) -> bool:
+    """Un-favourite a property; False when it was not a favourite"""
+    property_id = _property_id(property_id)
+    if property_id is None:
+        return False
+    result = await db.table("favorites").delete().eq("user_id", user_id).eq("property_id", property_id).execute()
+    cached = _favorite_cache.get(user_id)
+    if cached is not None:
+        _favorite_cache.set(user_id, cached - {property_id})
+    return bool(result.data)
+
+
+async def list_favorites(db: Database, user_id: str, skip: int, limit: int) -> List[Dict[str, Any]]:
+    """Active favourited properties, most recently favourited first.
+
+    The properties are embedded in the favourites query (an inner join),
+    so a page costs one round-trip however many listings it holds.
+    """
+    result = await (
+        db.table("favorites")
+        .select("created_at,property:properties!inner(*)")
+        .eq("user_id", user_id)
+        .eq("property.is_active", True)
+        .order("created_at", desc=True)
+        .range(skip, skip + limit - 1)
+        .execute()
+    )
+    return [row["property"] for row in result.data]
+
+
+def invalidate_favorites(user_id: str) -> None:
+    _favorite_cache.invalidate(user_id)
+
+
+def cache_stats() -> dict:
+    return _favorite_cache.stats()
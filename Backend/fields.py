@@ -0,0 +1,76 @@
+"""
+Sparse fieldsets for listing responses
+
+``fields=`` takes either a comma-separated list of ``PropertyResponse``
+field names or the ``summary`` preset (the ``PropertySummary`` model: what
+list and card views render). The selected columns are pushed down into
+the PostgREST select, and projected responses are serialized straight
+from the row dicts instead of through per-row response models.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+
+from models import PropertyResponse, PropertySummary
+
+SUMMARY = "summary"
+
+# First image URL; a computed column in the database (see properties_schema.sql)
+THUMBNAIL = "thumbnail"
+
+# Filled in by the routes rather than read from the database
+FAVORITED = "is_favorited"
+VIRTUAL_FIELDS = frozenset({FAVORITED})
+
+PROPERTY_FIELDS = frozenset(PropertyResponse.model_fields) | {THUMBNAIL}
+SUMMARY_FIELDS = tuple(PropertySummary.model_fields)
+
+Fields = Optional[Tuple[str, ...]]
+
+
+def property_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated response fields, or 'summary' for the compact card projection",
+    ),
+) -> Fields:
+    """FastAPI dependency parsing ``fields=`` (None means the full listing)"""
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if names == [SUMMARY]:
+        return SUMMARY_FIELDS
+    unknown = sorted(set(names) - PROPERTY_FIELDS)
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "fields must not be empty"
+        )
+    return tuple(dict.fromkeys(names))
+
+
+def select_columns(fields: Fields, extra: Iterable[str] = ()) -> str:
+    """PostgREST ``select`` list for ``fields`` plus ``extra`` columns the route needs.
+
+    ``id`` and ``updated_at`` are always fetched (the favourite annotation
+    keys on the id, and response ETags are built from both) even when they
+    are not part of the response.
+    """
+    if fields is None:
+        return "*"
+    names = dict.fromkeys((*fields, *extra, "id", "updated_at"))
+    return ",".join(name for name in names if name not in VIRTUAL_FIELDS)
+
+
+def project(row: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Restrict a listing row to ``fields``"""
+    out = {name: row.get(name) for name in fields}
+    if THUMBNAIL in out and THUMBNAIL not in row:
+        # Catalogue rows carry the images array rather than the computed column
+        out[THUMBNAIL] = next(iter(row.get("images") or ()), None)
+    return out
+
+
+def project_all(rows: Iterable[Dict[str, Any]], fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    return [project(row, fields) for row in rows]
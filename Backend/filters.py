@@ -0,0 +1,149 @@
+"""
+Listing filters shared by the property routes
+
+``property_filters`` parses the query string into a ``PropertyFilters``
+model; ``apply_filters`` pushes it down into a PostgREST query and
+``matches`` evaluates it against a single row in memory. Transit filters
+compare the stored station distances (see ``transit``).
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Query, status
+
+from models import ListingType, PropertyFilters, PropertyType
+from rest_client import quote
+from transit import TRANSIT_RADIUS_M, near_station, resolve_station
+
+SEARCH_COLUMNS = ("title", "description", "address", "location")
+
+
+def _normalize_search(search: Optional[str]) -> Optional[str]:
+    if not search:
+        return None
+    search = re.sub(r"\s+", " ", search).strip()
+    return search or None
+
+
+def property_filters(
+    search: Optional[str] = Query(None, max_length=100, description="Text matched against title, description, address and location"),
+    listing_type: Optional[ListingType] = Query(None),
+    property_type: List[PropertyType] = Query([], description="Repeat to match any of several types"),
+    location: List[str] = Query([], description="Repeat to match any of several locations"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    bedrooms: Optional[int] = Query(None, ge=0, description="Minimum bedrooms"),
+    max_bedrooms: Optional[int] = Query(None, ge=0),
+    bathrooms: Optional[int] = Query(None, ge=0, description="Minimum bathrooms"),
+    max_bathrooms: Optional[int] = Query(None, ge=0),
+    min_size: Optional[float] = Query(None, ge=0),
+    max_size: Optional[float] = Query(None, ge=0),
+    station: Optional[str] = Query(None, description="MRT station id or name; listings within station_radius_m of it"),
+    station_radius_m: Optional[int] = Query(
+        None, ge=0, le=TRANSIT_RADIUS_M, description="Metres to the station, or to any station when no station is given"
+    ),
+) -> PropertyFilters:
+    """FastAPI dependency building the filter model from query parameters"""
+    station_key = None
+    if station:
+        station_key = resolve_station(station)
+        if station_key is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown station: {station}")
+    return PropertyFilters(
+        search=_normalize_search(search),
+        listing_type=listing_type,
+        property_types=sorted(set(property_type), key=lambda t: t.value),
+        locations=sorted(set(location)),
+        min_price=min_price,
+        max_price=max_price,
+        min_bedrooms=bedrooms,
+        max_bedrooms=max_bedrooms,
+        min_bathrooms=bathrooms,
+        max_bathrooms=max_bathrooms,
+        min_size=min_size,
+        max_size=max_size,
+        station=station_key,
+        max_station_distance=station_radius_m,
+    )
+
+
+def apply_filters(query, filters: PropertyFilters):
+    """Add the filter model's predicates to a PostgREST query"""
+    if filters.listing_type:
+        query = query.eq("listing_type", filters.listing_type)
+    if len(filters.property_types) == 1:
+        query = query.eq("property_type", filters.property_types[0])
+    elif filters.property_types:
+        query = query.in_("property_type", filters.property_types)
+    if len(filters.locations) == 1:
+        query = query.eq("location", filters.locations[0])
+    elif filters.locations:
+        query = query.in_("location", filters.locations)
+
+    ranges = (
+        ("price", filters.min_price, filters.max_price),
+        ("bedrooms", filters.min_bedrooms, filters.max_bedrooms),
+        ("bathrooms", filters.min_bathrooms, filters.max_bathrooms),
+        ("size", filters.min_size, filters.max_size),
+    )
+    for column, low, high in ranges:
+        if low is not None:
+            query = query.gte(column, low)
+        if high is not None:
+            query = query.lte(column, high)
+
+    if filters.station:
+        # A (station, distance_m) range in property_stations, the indexed
+        # copy of nearby_stations; the inner embed keeps listings with a match
+        limit = TRANSIT_RADIUS_M if filters.max_station_distance is None else filters.max_station_distance
+        query = (
+            query.embed("property_stations!inner()")
+            .eq("property_stations.station", filters.station)
+            .lte("property_stations.distance_m", limit)
+        )
+    elif filters.max_station_distance is not None:
+        query = query.lte("station_distance_m", filters.max_station_distance)
+
+    if filters.search:
+        pattern = quote(f"*{filters.search}*")
+        query = query.or_(",".join(f"{column}.ilike.{pattern}" for column in SEARCH_COLUMNS))
+    return query
+
+
+def matches(filters: PropertyFilters, row: Dict[str, Any]) -> bool:
+    """Evaluate the filter model against a property row (same semantics as apply_filters)"""
+    if filters.listing_type and row.get("listing_type") != filters.listing_type.value:
+        return False
+    if filters.property_types and row.get("property_type") not in {t.value for t in filters.property_types}:
+        return False
+    if filters.locations and row.get("location") not in filters.locations:
+        return False
+
+    ranges = (
+        ("price", filters.min_price, filters.max_price),
+        ("bedrooms", filters.min_bedrooms, filters.max_bedrooms),
+        ("bathrooms", filters.min_bathrooms, filters.max_bathrooms),
+        ("size", filters.min_size, filters.max_size),
+    )
+    for column, low, high in ranges:
+        value = row.get(column)
+        if value is None:
+            if low is not None or high is not None:
+                return False
+            continue
+        if low is not None and value < low:
+            return False
+        if high is not None and value > high:
+            return False
+
+    if (filters.station or filters.max_station_distance is not None) and not near_station(
+        row, filters.station, filters.max_station_distance
+    ):
+        return False
+
+    if filters.search:
+        needle = filters.search.lower()
+        if not any(needle in (row.get(column) or "").lower() for column in SEARCH_COLUMNS):
+            return False
+    return True
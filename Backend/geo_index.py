@@ -0,0 +1,245 @@
+"""
+Grid-based spatial index over listing coordinates
+
+Listings are bucketed into fixed lat/lng cells (~550m at Singapore's
+latitude). Radius, bounding-box and nearest-k queries only visit the cells
+that can contain a match. Each cell also keeps a running count and
+coordinate sum, so map clusters at coarse zoom levels are built from cell
+aggregates without touching individual listings. Kept up to date through
+the listing catalogue.
+"""
+
+import heapq
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+CELL_DEG = 0.005
+EARTH_RADIUS_M = 6_371_008.8
+METRES_PER_DEG_LAT = 111_320.0
+
+# Clusters are laid out on a grid of this many cells per 256px map tile
+CLUSTER_CELLS_PER_TILE = 4
+
+Cell = Tuple[int, int]
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(lat: float, lng: float) -> Cell:
+    return (math.floor(lat / CELL_DEG), math.floor(lng / CELL_DEG))
+
+
+def _coords(row: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    lat, lng = row.get("lat"), row.get("lng")
+    if lat is None or lng is None:
+        return None
+    return float(lat), float(lng)
+
+
+class GeoIndex:
+    def __init__(self):
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._cells: Dict[Cell, Set[str]] = {}
+        # Per-cell (count, sum lat, sum lng) for cluster aggregation
+        self._aggregates: Dict[Cell, List[float]] = {}
+        # Occupied cells per grid row and column, and the occupied extent
+        # (min row, max row, min col, max col) that bounds nearest()'s rings
+        self._rows: Dict[int, int] = {}
+        self._cols: Dict[int, int] = {}
+        self._bounds: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    # Catalogue listener interface
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for row in rows:
+            self.upsert(row)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        self.remove(row["id"])
+        coords = _coords(row)
+        if coords is None:
+            return
+        cell = _cell(*coords)
+        self._points[row["id"]] = coords
+        if cell not in self._cells:
+            self._occupy(cell)
+        self._cells.setdefault(cell, set()).add(row["id"])
+        agg = self._aggregates.setdefault(cell, [0, 0.0, 0.0])
+        agg[0] += 1
+        agg[1] += coords[0]
+        agg[2] += coords[1]
+
+    def remove(self, property_id: str) -> None:
+        coords = self._points.pop(property_id, None)
+        if coords is None:
+            return
+        cell = _cell(*coords)
+        members = self._cells[cell]
+        members.discard(property_id)
+        if not members:
+            del self._cells[cell]
+            del self._aggregates[cell]
+            self._vacate(cell)
+        else:
+            agg = self._aggregates[cell]
+            agg[0] -= 1
+            agg[1] -= coords[0]
+            agg[2] -= coords[1]
+
+    def _occupy(self, cell: Cell) -> None:
+        i, j = cell
+        self._rows[i] = self._rows.get(i, 0) + 1
+        self._cols[j] = self._cols.get(j, 0) + 1
+        if self._bounds is None:
+            self._bounds = [i, i, j, j]
+        else:
+            b = self._bounds
+            b[0], b[1], b[2], b[3] = min(b[0], i), max(b[1], i), min(b[2], j), max(b[3], j)
+
+    def _vacate(self, cell: Cell) -> None:
+        i, j = cell
+        for counts, key, lo in ((self._rows, i, 0), (self._cols, j, 2)):
+            counts[key] -= 1
+            if counts[key]:
+                continue
+            del counts[key]
+            # Only an emptied edge row/column moves the bounds
+            if counts and key in (self._bounds[lo], self._bounds[lo + 1]):
+                self._bounds[lo], self._bounds[lo + 1] = min(counts), max(counts)
+        if not self._cells:
+            self._bounds = None
+
+    # Queries
+    def _cells_in(self, south: float, west: float, north: float, east: float) -> Iterator[Cell]:
+        lo_lat, lo_lng = _cell(south, west)
+        hi_lat, hi_lng = _cell(north, east)
+        if (hi_lat - lo_lat + 1) * (hi_lng - lo_lng + 1) > len(self._cells):
+            # Viewport covers more grid cells than are occupied: scan occupied ones
+            for cell in self._cells:
+                if lo_lat <= cell[0] <= hi_lat and lo_lng <= cell[1] <= hi_lng:
+                    yield cell
+            return
+        for i in range(lo_lat, hi_lat + 1):
+            for j in range(lo_lng, hi_lng + 1):
+                if (i, j) in self._cells:
+                    yield (i, j)
+
+    def within_bbox(self, south: float, west: float, north: float, east: float) -> List[str]:
+        found = []
+        for cell in self._cells_in(south, west, north, east):
+            for pid in self._cells[cell]:
+                lat, lng = self._points[pid]
+                if south <= lat <= north and west <= lng <= east:
+                    found.append(pid)
+        return found
+
+    def within_radius(self, lat: float, lng: float, radius_m: float) -> List[Tuple[str, float]]:
+        """``(property_id, distance_m)`` pairs within ``radius_m``, nearest first"""
+        dlat = radius_m / METRES_PER_DEG_LAT
+        dlng = radius_m / (METRES_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        found = []
+        for cell in self._cells_in(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            for pid in self._cells[cell]:
+                distance = haversine_m(lat, lng, *self._points[pid])
+                if distance <= radius_m:
+                    found.append((pid, distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def nearest(self, lat: float, lng: float, k: int, accept=None) -> List[Tuple[str, float]]:
+        """The ``k`` nearest listings, searching outward ring by ring.
+
+        ``accept`` optionally filters candidates by id.
+        """
+        if not self._points:
+            return []
+        ci, cj = _cell(lat, lng)
+        best: List[Tuple[float, str]] = []  # max-heap via negated distance
+        cell_m = CELL_DEG * METRES_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6)
+        lo_i, hi_i, lo_j, hi_j = self._bounds
+        max_ring = max(abs(ci - lo_i), abs(ci - hi_i), abs(cj - lo_j), abs(cj - hi_j)) + 1
+        for ring in range(max_ring + 1):
+            # Unvisited cells are at least (ring - 1) cell widths from the point
+            if len(best) >= k and -best[0][0] <= (ring - 1) * cell_m:
+                break
+            for i in range(ci - ring, ci + ring + 1):
+                for j in range(cj - ring, cj + ring + 1):
+                    if max(abs(i - ci), abs(j - cj)) != ring:
+                        continue
+                    for pid in self._cells.get((i, j), ()):
+                        if accept is not None and not accept(pid):
+                            continue
+                        distance = haversine_m(lat, lng, *self._points[pid])
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, pid))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, pid))
+        return sorted(((pid, -neg) for neg, pid in best), key=lambda item: item[1])
+
+    def clusters(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        zoom: int,
+        ids: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Group listings in the viewport into zoom-dependent grid clusters.
+
+        Returns dicts with ``lat``/``lng`` (centroid), ``count`` and, for
+        single-listing clusters, ``property_id``. When ``ids`` is given only
+        those listings are clustered (used for filtered views); otherwise the
+        per-cell aggregates are used directly.
+        """
+        cluster_deg = 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+        groups: Dict[Cell, List[Any]] = {}
+
+        def add(key: Cell, count: int, sum_lat: float, sum_lng: float, pid: Optional[str]):
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [count, sum_lat, sum_lng, pid]
+            else:
+                group[0] += count
+                group[1] += sum_lat
+                group[2] += sum_lng
+                group[3] = None
+
+        # Coarse zoom: merge whole grid cells. Cells straddling the viewport
+        # edge are counted in full, which is invisible at these scales.
+        if ids is None and cluster_deg >= CELL_DEG:
+            for cell in self._cells_in(south, west, north, east):
+                count, sum_lat, sum_lng = self._aggregates[cell]
+                lat, lng = sum_lat / count, sum_lng / count
+                pid = next(iter(self._cells[cell])) if count == 1 else None
+                add((math.floor(lat / cluster_deg), math.floor(lng / cluster_deg)), count, sum_lat, sum_lng, pid)
+        else:
+            members = ids if ids is not None else self.within_bbox(south, west, north, east)
+            for pid in members:
+                coords = self._points.get(pid)
+                if coords is None:
+                    continue
+                lat, lng = coords
+                if not (south <= lat <= north and west <= lng <= east):
+                    continue
+                add((math.floor(lat / cluster_deg), math.floor(lng / cluster_deg)), 1, lat, lng, pid)
+
+        return [
+            {"lat": sum_lat / count, "lng": sum_lng / count, "count": count, "property_id": pid}
+            for count, sum_lat, sum_lng, pid in groups.values()
+        ]
+
+    def coords(self, property_id: str) -> Optional[Tuple[float, float]]:
+        return self._points.get(property_id)
+
+
+geo_index = GeoIndex()
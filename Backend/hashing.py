@@ -0,0 +1,92 @@
+"""
+Password hashing off the event loop
+
+bcrypt costs ~250ms of CPU per call, so hashing and verification run in a
+dedicated process pool. The number of in-flight jobs is bounded: once the
+queue is full new requests are rejected with 503 instead of piling up
+behind a login burst.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from metrics import bcrypt_duration, timed
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", str(HASH_WORKERS * 4)))
+HASH_RETRY_AFTER = os.getenv("HASH_RETRY_AFTER", "1")
+
+# Hashes with a different cost than BCRYPT_ROUNDS are flagged for rehash
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _executor
+
+
+async def _submit(operation: str, fn, *args):
+    global _pending
+    if _pending >= HASH_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": HASH_RETRY_AFTER},
+        )
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        with timed("bcrypt", bcrypt_duration, operation):
+            return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the worker pool"""
+    return await _submit("hash", _hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password in the worker pool.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    uses outdated cost parameters and should be replaced.
+    """
+    return await _submit("verify", _verify_and_update, password, hashed_password)
+
+
+def pool_stats() -> dict:
+    return {"workers": HASH_WORKERS, "queue_size": HASH_QUEUE_SIZE, "pending": _pending}
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,171 @@
+"""
+Conditional GET and precompressed bodies for listing responses
+
+Listing responses carry a strong ``ETag`` derived from the ids and
+``updated_at`` values of the rows they contain (plus whatever else shapes
+the body, such as ``fields`` or favourite flags), so it can be checked
+against ``If-None-Match`` before anything is serialized. Serialized
+bodies are kept per (ETag, content-coding) in a small LRU, so a popular
+page is encoded and compressed once and then served as stored bytes.
+"""
+
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from cache import TTLCache
+from metrics import serialization_duration, timed
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+HTTP_MAX_AGE = int(os.getenv("HTTP_MAX_AGE", "10"))
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+BODY_CACHE_SIZE = int(os.getenv("BODY_CACHE_SIZE", "500"))
+BODY_CACHE_TTL = float(os.getenv("BODY_CACHE_TTL", "300"))
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_bodies = TTLCache(BODY_CACHE_SIZE, BODY_CACHE_TTL, name="bodies")
+
+
+def etag_for(rows: Iterable[Dict[str, Any]], *variant: Any) -> str:
+    """Strong validator for a result set: row ids and ``updated_at``, plus ``variant``"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in variant:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+    for row in rows:
+        digest.update(f"{row.get('id')}@{row.get('updated_at')}\0".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def last_modified(rows: Iterable[Dict[str, Any]]) -> Optional[str]:
+    latest = None
+    for row in rows:
+        value = row.get("updated_at")
+        if not value:
+            continue
+        stamp = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if latest is None or stamp > latest:
+            latest = stamp
+    if latest is None:
+        return None
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+    return format_datetime(latest.astimezone(timezone.utc), usegmt=True)
+
+
+def _negotiate(accept_encoding: str) -> str:
+    accepted = {}
+    for token in accept_encoding.split(","):
+        name, _, params = token.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return "identity"
+
+
+def _tagged(etag: str, encoding: str) -> str:
+    """Per-coding ETag: each content-coding is its own representation"""
+    return etag if encoding == "identity" else f'{etag[:-1]}-{encoding}"'
+
+
+def _matched(if_none_match: Optional[str], etag: str, encoding: str) -> Optional[str]:
+    """The ETag to send with a 304, or None when ``If-None-Match`` does not match.
+
+    Any content-coding's tag of the same result matches, and that tag is
+    echoed back: it is the representation the client holds, so the 304
+    needs neither the body nor its serialized size.
+    """
+    if not if_none_match:
+        return None
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return _tagged(etag, encoding)
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        opaque = candidate.strip('"')
+        name, _, coding = opaque.rpartition("-")
+        if opaque == base or (name == base and coding in ("gzip", "br")):
+            return f'"{opaque}"'
+    return None
+
+
+def _encode(payload: Any, encoding: str) -> Tuple[bytes, str]:
+    """Serialized (and, past ``COMPRESS_MIN_BYTES``, compressed) body and its coding"""
+    with timed("serialize", serialization_duration, "json"):
+        body = orjson.dumps(payload)
+    if encoding == "identity" or len(body) < COMPRESS_MIN_BYTES:
+        return body, "identity"
+    with timed("compress", serialization_duration, encoding):
+        if encoding == "br":
+            return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), encoding
+
+
+def cached_json(
+    request: Request,
+    build: Callable[[], Any],
+    etag: str,
+    public: bool,
+    modified: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """JSON response for ``build()`` with validators, 304 handling and stored bodies.
+
+    ``build`` is only called when no body is stored for this ETag and
+    coding, and never for a ``304``.
+    ``public`` responses may be cached by shared caches; others (which
+    include per-user data) are private and always revalidated.
+    """
+    encoding = _negotiate(request.headers.get("accept-encoding", ""))
+    out = {
+        "Cache-Control": f"public, max-age={HTTP_MAX_AGE}" if public else "private, no-cache",
+        "Vary": "Accept-Encoding, Authorization",
+    }
+    if modified:
+        out["Last-Modified"] = modified
+    out.update(headers or {})
+
+    matched = _matched(request.headers.get("if-none-match"), etag, encoding)
+    if matched is not None:
+        out["ETag"] = matched
+        return Response(status_code=304, headers=out)
+
+    key = (etag, encoding)
+    stored = _bodies.get(key)
+    if stored is None:
+        with timed("serialize", serialization_duration, "build"):
+            payload = build()
+        stored = _encode(payload, encoding)
+        _bodies.set(key, stored)
+    body, encoding = stored
+
+    out["ETag"] = _tagged(etag, encoding)
+    if encoding != "identity":
+        out["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=out)
+
+
+def cache_stats() -> dict:
+    return _bodies.stats()
@@ -4,13 +4,30 @@ FastAPI backend for Property Hunter application
 """
 
 from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
-from routes import auth_router, properties_router, users_router
-from database import get_supabase_client
+from routes import auth_router, properties_router, users_router, favorites_router, saved_searches_router, stats_router, stations_router
+from database import DB_BACKEND, get_db, close_db
+import hashing
+import metrics
+from auth import cache_stats as auth_cache_stats
+from favorites import cache_stats as favorites_cache_stats
+from http_cache import cache_stats as body_cache_stats
+from catalog import catalog
+from search_index import search_index
+from geo_index import geo_index
+from snapshot import snapshot
+from facets import facet_index
+from similar_index import similar_index
+from market_stats import market_stats
+from saved_searches import match_index
+from events import listing_events
+from routes.properties import page_cache
 
 # Load environment variables
 load_dotenv()
@@ -21,11 +38,54 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Property Hunter Backend starting up...")
     print("✅ FastAPI server initialized")
-    print("✅ Supabase client connected")
+    print("✅ Supabase client connected" if DB_BACKEND == "postgrest" else f"✅ Direct SQL engine ({DB_BACKEND})")
+    catalog.register(search_index)
+    catalog.register(geo_index)
+    catalog.register(snapshot)
+    catalog.register(facet_index)
+    catalog.register(similar_index)
+    catalog.register(market_stats)
+    catalog.register(page_cache)
+    refresher = None
+    if os.getenv("CATALOG_PRELOAD", "true").lower() == "true":
+        try:
+            count = await catalog.load(get_db())
+            print(f"✅ Listing catalog loaded ({count} active listings)")
+        except Exception as e:
+            print(f"⚠️  Listing catalog not loaded, in-memory indexes disabled: {e}")
+        refresher = asyncio.create_task(refresh_catalog_periodically())
+    try:
+        count = await match_index.load(get_db())
+        print(f"✅ Saved searches indexed ({count} searches)")
+    except Exception as e:
+        print(f"⚠️  Saved searches not indexed, new listings will not be matched: {e}")
     yield
     # Shutdown
+    listing_events.close()
+    if refresher:
+        refresher.cancel()
+    await close_db()
+    hashing.shutdown()
     print("🛑 Property Hunter Backend shutting down...")
 
+async def refresh_catalog_periodically():
+    """Fully rebuild the listing catalogue and its indexes on an interval.
+
+    Picks up writes made through other workers (listings and saved
+    searches) and compacts the snapshot and the match index.
+    """
+    interval = float(os.getenv("CATALOG_REFRESH_SECONDS", "300"))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await catalog.load(get_db())
+        except Exception as e:
+            print(f"⚠️  Listing catalog refresh failed: {e}")
+        try:
+            await match_index.load(get_db())
+        except Exception as e:
+            print(f"⚠️  Saved search index refresh failed: {e}")
+
 app = FastAPI(
     title="Property Hunter API",
     description="Backend API for Property Hunter application",
@@ -40,8 +100,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Latency/status metrics (outermost, so the whole stack is timed)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Security
 security = HTTPBearer()
 
@@ -49,6 +113,10 @@ security = HTTPBearer()
 app.include_router(auth_router, prefix="/api/auth", tags=["authentication"])
 app.include_router(users_router, prefix="/api/users", tags=["users"])
 app.include_router(properties_router, prefix="/api/properties", tags=["properties"])
+app.include_router(favorites_router, prefix="/api/favorites", tags=["favorites"])
+app.include_router(saved_searches_router, prefix="/api/saved-searches", tags=["saved searches"])
+app.include_router(stats_router, prefix="/api/stats", tags=["statistics"])
+app.include_router(stations_router, prefix="/api/stations", tags=["stations"])
 
 @app.get("/")
 async def root():
@@ -63,9 +131,9 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     try:
-        supabase = get_supabase_client()
-        # Test Supabase connection
-        result = supabase.auth.get_session()
+        db = get_db()
+        # Test PostgREST connection
+        await db.table("properties").select("id").limit(1).execute()
         return {
             "status": "healthy",
             "database": "connected",
@@ -77,6 +145,25 @@ async def health_check():
             detail=f"Service unhealthy: {str(e)}"
         )
 
+@app.get("/health/cache")
+async def cache_health():
+    """Hit/miss counters for the in-process caches"""
+    return {
+        "auth": auth_cache_stats(),
+        "favorites": favorites_cache_stats(),
+        "pages": page_cache.stats(),
+        "bodies": body_cache_stats(),
+        "saved_searches": match_index.stats(),
+        "events": listing_events.stats(),
+        "similar": similar_index.stats(),
+        "market_stats": market_stats.stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Request, database, bcrypt, serialization and event stream metrics (Prometheus text format)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
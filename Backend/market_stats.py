@@ -0,0 +1,237 @@
+"""
+Market statistics per listing segment from mergeable quantile sketches
+
+Every active listing is counted in its segment, keyed by (location,
+property_type, listing_type, bedroom bucket), and in the fifteen roll-ups
+that leave some of those dimensions open ("any bedrooms in Tampines", "all
+HDB rentals", ...). Each segment keeps a quantile sketch of price and one
+of price per square foot, so a statistics request is a dictionary lookup
+whose cost does not depend on the number of listings.
+
+The sketch is a log-bucketed histogram (as in DDSketch): a value x is
+counted in bucket ceil(log_gamma(x)), and every quantile it reports is
+within STATS_RELATIVE_ACCURACY of the true one. Unlike sampling sketches it
+supports removal, so a listing that changes price simply moves between
+buckets, and two sketches merge by adding their bucket counts, which is how
+the roll-ups are built when the catalogue is reloaded.
+"""
+
+import math
+import os
+from bisect import bisect_right
+from itertools import accumulate, product
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from facets import bedroom_bucket, bedroom_label
+
+STATS_RELATIVE_ACCURACY = float(os.getenv("STATS_RELATIVE_ACCURACY", "0.01"))
+
+QUANTILES = (("p10", 0.1), ("p25", 0.25), ("median", 0.5), ("p75", 0.75), ("p90", 0.9))
+
+DIMENSIONS = ("location", "property_type", "listing_type", "bedrooms")
+
+# Stands for "any value" in a roll-up segment key (None is a real
+# location: listings without one)
+ANY = object()
+
+Segment = Tuple[Any, Any, Any, Any]
+
+# Which dimensions each segment of a listing keeps: all 16 subsets, the
+# listing's own segment first
+_MASKS = [mask for mask in product((True, False), repeat=len(DIMENSIONS))]
+
+
+class QuantileSketch:
+    """Relative-error quantiles over positive values, with removal and merging"""
+
+    __slots__ = ("bins", "count", "total", "_cdf")
+
+    gamma = (1 + STATS_RELATIVE_ACCURACY) / (1 - STATS_RELATIVE_ACCURACY)
+    _log_gamma = math.log(gamma)
+
+    def __init__(self):
+        self.bins: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self._cdf: Optional[Tuple[List[int], List[int]]] = None
+
+    @classmethod
+    def key(cls, value: float) -> int:
+        return math.ceil(math.log(value) / cls._log_gamma)
+
+    @classmethod
+    def value(cls, key: int) -> float:
+        """Representative value of a bucket: within the relative accuracy of all its values"""
+        return 2 * cls.gamma ** key / (cls.gamma + 1)
+
+    def add(self, value: float) -> None:
+        key = self.key(value)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        self._cdf = None
+
+    def remove(self, value: float) -> None:
+        key = self.key(value)
+        left = self.bins[key] - 1
+        if left:
+            self.bins[key] = left
+        else:
+            del self.bins[key]
+        self.count -= 1
+        self.total -= value
+        self._cdf = None
+
+    def merge(self, other: "QuantileSketch") -> None:
+        bins = self.bins
+        for key, n in other.bins.items():
+            bins[key] = bins.get(key, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self._cdf = None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        if self._cdf is None:
+            keys = sorted(self.bins)
+            self._cdf = (keys, list(accumulate(self.bins[k] for k in keys)))
+        keys, cumulative = self._cdf
+        # The value at 0-based rank ceil(q * (count - 1)), as numpy's
+        # method="higher": rounding the rank down biases upper quantiles of
+        # small segments low (p90 of three listings is the largest one)
+        rank = math.ceil(q * (self.count - 1))
+        return self.value(keys[bisect_right(cumulative, rank)])
+
+    def summary(self) -> Optional[Dict[str, float]]:
+        if not self.count:
+            return None
+        result = {"count": self.count, "mean": round(self.total / self.count, 2)}
+        for name, q in QUANTILES:
+            result[name] = round(self.quantile(q), 2)
+        return result
+
+
+class _Stats:
+    __slots__ = ("count", "price", "price_per_sqft")
+
+    def __init__(self):
+        self.count = 0
+        self.price = QuantileSketch()
+        self.price_per_sqft = QuantileSketch()
+
+    def merge(self, other: "_Stats") -> None:
+        self.count += other.count
+        self.price.merge(other.price)
+        self.price_per_sqft.merge(other.price_per_sqft)
+
+
+def _segment(row: Dict[str, Any]) -> Segment:
+    return (row.get("location"), row["property_type"], row["listing_type"], bedroom_bucket(row["bedrooms"]))
+
+
+def _values(row: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    price = float(row["price"]) if row.get("price") else None
+    size = row.get("size")
+    return price, (price / float(size) if price and size else None)
+
+
+def _rollups(segment: Segment) -> List[Segment]:
+    return [tuple(v if keep else ANY for v, keep in zip(segment, mask)) for mask in _MASKS]
+
+
+class MarketStats:
+    def __init__(self):
+        self._segments: Dict[Segment, _Stats] = {}
+        self._by_id: Dict[str, Tuple[Segment, Optional[float], Optional[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    # Catalogue listener interface
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for row in rows:
+            entry = self._by_id[row["id"]] = (_segment(row), *_values(row))
+            self._add(entry, [entry[0]])
+        # Build each roll-up by merging the listing segments under it
+        leaves = list(self._segments.items())
+        for segment, stats in leaves:
+            for rollup in _rollups(segment)[1:]:
+                target = self._segments.get(rollup)
+                if target is None:
+                    target = self._segments[rollup] = _Stats()
+                target.merge(stats)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        entry = (_segment(row), *_values(row))
+        if self._by_id.get(row["id"]) == entry:
+            return
+        self.remove(row["id"])
+        self._by_id[row["id"]] = entry
+        self._add(entry, _rollups(entry[0]))
+
+    def remove(self, property_id: str) -> None:
+        entry = self._by_id.pop(property_id, None)
+        if entry is None:
+            return
+        _, price, per_sqft = entry
+        for segment in _rollups(entry[0]):
+            stats = self._segments[segment]
+            stats.count -= 1
+            if not stats.count:
+                del self._segments[segment]
+                continue
+            if price is not None:
+                stats.price.remove(price)
+            if per_sqft is not None:
+                stats.price_per_sqft.remove(per_sqft)
+
+    def _add(self, entry, segments: List[Segment]) -> None:
+        _, price, per_sqft = entry
+        for segment in segments:
+            stats = self._segments.get(segment)
+            if stats is None:
+                stats = self._segments[segment] = _Stats()
+            stats.count += 1
+            if price is not None:
+                stats.price.add(price)
+            if per_sqft is not None:
+                stats.price_per_sqft.add(per_sqft)
+
+    # Queries
+    def get(
+        self,
+        location: Optional[str] = None,
+        property_type: Optional[str] = None,
+        listing_type: Optional[str] = None,
+        bedrooms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Count and price / price-per-sqft distribution of the active listings in a segment.
+
+        Dimensions left as None match any value; ``bedrooms`` of 5 or more
+        means the "5+" bucket.
+        """
+        bucket = bedroom_bucket(bedrooms) if bedrooms is not None else None
+        key = tuple(ANY if v is None else v for v in (location, property_type, listing_type, bucket))
+        stats = self._segments.get(key)
+        return {
+            "location": location,
+            "property_type": property_type,
+            "listing_type": listing_type,
+            "bedrooms": bedroom_label(bucket) if bucket is not None else None,
+            "count": stats.count if stats else 0,
+            "price": stats.price.summary() if stats else None,
+            "price_per_sqft": stats.price_per_sqft.summary() if stats else None,
+            "relative_accuracy": STATS_RELATIVE_ACCURACY,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "listings": len(self._by_id),
+            "segments": len(self._segments),
+            "buckets": sum(len(s.price.bins) + len(s.price_per_sqft.bins) for s in self._segments.values()),
+        }
+
+
+market_stats = MarketStats()
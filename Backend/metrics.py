@@ -0,0 +1,190 @@
+"""
+Request, database and CPU-phase metrics in Prometheus text format
+
+``MetricsMiddleware`` records per-route latency histograms, status codes
+and in-flight requests. Code paths worth attributing (database calls,
+bcrypt, response serialization) wrap themselves in ``timed``, which feeds
+a histogram and also adds the duration to the current request's phase
+totals; with ``SERVER_TIMING`` enabled those totals are sent back in a
+``Server-Timing`` header. ``render`` produces the ``/metrics`` body.
+
+Labels are kept low-cardinality: routes are recorded by their path
+template (``/api/properties/{property_id}``), never the raw URL.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Seconds; covers sub-millisecond cache hits up to multi-second exports
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, count in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {count:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (non-cumulative; last is +Inf), sum]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"),
+)
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+db_duration = Histogram("db_request_duration_seconds", "Database calls by table and operation", ("table", "operation"))
+db_errors = Counter("db_errors_total", "Failed PostgREST calls by table and operation", ("table", "operation"))
+bcrypt_duration = Histogram("bcrypt_duration_seconds", "Password hashing and verification, including queueing", ("operation",))
+password_rehash_errors = Counter("password_rehash_errors_total", "Failed upgrades of outdated password hashes at login", ("error",))
+serialization_duration = Histogram("serialization_duration_seconds", "Response encoding by stage", ("stage",))
+sse_subscribers = Gauge("sse_subscribers", "Open listing event streams")
+sse_events = Counter("sse_events_total", "Listing events published by type", ("type",))
+sse_dropped = Counter("sse_subscribers_dropped_total", "Event streams closed because the client fell behind")
+
+REGISTRY = (
+    http_request_duration, http_requests, http_in_flight,
+    db_duration, db_errors, bcrypt_duration, password_rehash_errors, serialization_duration,
+    sse_subscribers, sse_events, sse_dropped,
+)
+
+# Per-request phase totals: phase -> [seconds, calls]
+_phases: ContextVar[Optional[Dict[str, list]]] = ContextVar("phases", default=None)
+
+
+@contextmanager
+def timed(phase: str, histogram: Histogram, *labels: str) -> Iterator[None]:
+    """Time the block into ``histogram`` and the current request's ``phase``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, *labels)
+        phases = _phases.get()
+        if phases is not None:
+            entry = phases.setdefault(phase, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def server_timing(phases: Dict[str, list], total: float) -> str:
+    parts = [f'{phase};dur={seconds * 1000:.1f};desc="{calls}x"' for phase, (seconds, calls) in phases.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests per route"""
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        phases: Dict[str, list] = {}
+        token = _phases.set(phases)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    value = server_timing(phases, time.perf_counter() - start)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode())]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            _phases.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - start, method, path)
+            http_requests.inc(method, path, str(status_code))
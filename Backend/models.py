@@ -2,10 +2,11 @@
 Pydantic models for Property Hunter API
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
+from transit import resolve_station
 
 class UserType(str, Enum):
     HUNTER = "hunter"
@@ -83,6 +84,7 @@ class PropertyBase(BaseModel):
     features: List[str] = Field(default_factory=list)
     amenities: List[str] = Field(default_factory=list)
     images: List[str] = Field(default_factory=list)
+    location: Optional[str] = Field(None, max_length=100)
     lat: Optional[float] = None
     lng: Optional[float] = None
 
@@ -104,12 +106,30 @@ class PropertyUpdate(BaseModel):
     features: Optional[List[str]] = None
     amenities: Optional[List[str]] = None
     images: Optional[List[str]] = None
+    location: Optional[str] = Field(None, max_length=100)
     lat: Optional[float] = None
     lng: Optional[float] = None
     contact_name: Optional[str] = Field(None, min_length=1, max_length=100)
     contact_phone: Optional[str] = Field(None, pattern=r'^\d{8}$')
     contact_email: Optional[str] = None
 
+class BulkPropertyUpdate(PropertyUpdate):
+    id: str
+
+class BulkDeactivateRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
 class Property(PropertyBase):
     id: str
     owner_id: str
@@ -134,8 +154,12 @@ class PropertyResponse(BaseModel):
     features: List[str]
     amenities: List[str]
     images: List[str]
+    location: Optional[str] = None
     lat: Optional[float] = None
     lng: Optional[float] = None
+    nearest_station: Optional[str] = None
+    station_distance_m: Optional[int] = None
+    nearby_stations: Optional[Dict[str, int]] = None
     owner_id: str
     contact_name: str
     contact_phone: str
@@ -143,6 +167,145 @@ class PropertyResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     is_active: bool = True
+    # Set for authenticated requests
+    is_favorited: Optional[bool] = None
+
+class PropertySummary(BaseModel):
+    """Compact listing for list and card views"""
+    id: str
+    title: str
+    address: str
+    price: float
+    bedrooms: int
+    bathrooms: int
+    size: float
+    property_type: PropertyType
+    listing_type: ListingType
+    location: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    nearest_station: Optional[str] = None
+    station_distance_m: Optional[int] = None
+    thumbnail: Optional[str] = None
+    created_at: datetime
+    is_favorited: Optional[bool] = None
+
+class PropertyBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+
+class PropertyBatchResponse(BaseModel):
+    properties: List[PropertyResponse]
+    missing: List[str]
+    inactive: List[str]
+
+class PropertyFilters(BaseModel):
+    """Listing filter model (mirrors the frontend FilterOptions)"""
+    search: Optional[str] = None
+    listing_type: Optional[ListingType] = None
+    property_types: List[PropertyType] = Field(default_factory=list)
+    locations: List[str] = Field(default_factory=list)
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_bedrooms: Optional[int] = None
+    max_bedrooms: Optional[int] = None
+    min_bathrooms: Optional[int] = None
+    max_bathrooms: Optional[int] = None
+    min_size: Optional[float] = None
+    max_size: Optional[float] = None
+    # Within max_station_distance metres of this station (id or name), or
+    # of any station when only max_station_distance is set
+    station: Optional[str] = None
+    max_station_distance: Optional[int] = Field(None, ge=0)
+
+    @field_validator("station")
+    @classmethod
+    def _station_id(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        station = resolve_station(value)
+        if station is None:
+            raise ValueError(f"Unknown station: {value}")
+        return station
+
+class SavedSearchCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    filters: PropertyFilters
+
+class SavedSearchResponse(BaseModel):
+    id: str
+    name: str
+    filters: PropertyFilters
+    created_at: datetime
+
+class SearchMatchResponse(BaseModel):
+    search_id: str
+    matched_at: datetime
+    property: PropertyResponse
+
+class MapCluster(BaseModel):
+    lat: float
+    lng: float
+    count: int
+    property_id: Optional[str] = None
+
+class Viewport(BaseModel):
+    south: float = Field(..., ge=-90, le=90)
+    west: float = Field(..., ge=-180, le=180)
+    north: float = Field(..., ge=-90, le=90)
+    east: float = Field(..., ge=-180, le=180)
+    zoom: int = Field(..., ge=0, le=22)
+
+    @model_validator(mode="after")
+    def _ordered_edges(self):
+        if self.south > self.north:
+            raise ValueError("south must not be greater than north")
+        if self.west > self.east:
+            raise ValueError("west must not be greater than east")
+        return self
+
+class ViewportResponse(BaseModel):
+    total: int
+    zoom: int
+    clusters: List[MapCluster]
+
+class PriceBin(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int
+
+class FacetsResponse(BaseModel):
+    total: int
+    property_type: Dict[str, int]
+    listing_type: Dict[str, int]
+    location: Dict[str, int]
+    bedrooms: Dict[str, int]
+    price_histogram: List[PriceBin]
+    source: str
+
+class Distribution(BaseModel):
+    count: int
+    mean: float
+    p10: float
+    p25: float
+    median: float
+    p75: float
+    p90: float
+
+class MarketStatsResponse(BaseModel):
+    location: Optional[str] = None
+    property_type: Optional[PropertyType] = None
+    listing_type: Optional[ListingType] = None
+    bedrooms: Optional[str] = None
+    count: int
+    price: Optional[Distribution] = None
+    price_per_sqft: Optional[Distribution] = None
+    relative_accuracy: float
+
+class StationResponse(BaseModel):
+    id: str
+    name: str
+    lat: float
+    lng: float
 
 # Token Models
 class Token(BaseModel):
@@ -0,0 +1,99 @@
+"""
+Keyset (cursor) pagination helpers for PostgREST queries
+
+A cursor encodes the sort key values of the last row of a page. The next
+page is fetched with a ``WHERE (key) < (cursor)`` style filter instead of
+``OFFSET``, so every page costs the same index range scan regardless of
+depth, and rows inserted meanwhile do not shift later pages.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Literal, Sequence, Tuple
+
+from rest_client import quote
+
+# Sort name -> ((column, descending), ...); the last column must be unique
+SORTS: Dict[str, Tuple[Tuple[str, bool], ...]] = {
+    "newest": (("created_at", True), ("id", True)),
+    "price_asc": (("price", False), ("id", False)),
+    "price_desc": (("price", True), ("id", True)),
+    "size_asc": (("size", False), ("id", False)),
+    "size_desc": (("size", True), ("id", True)),
+    # Nearest station first; listings without coordinates are left out
+    "transit": (("station_distance_m", False), ("id", False)),
+}
+
+SortOption = Literal["newest", "price_asc", "price_desc", "size_asc", "size_desc", "transit"]
+
+DEFAULT_SORT = "newest"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def sort_key(sort: str, row: Dict[str, Any]) -> List[Any]:
+    return [row[column] for column, _ in SORTS[sort]]
+
+
+def encode_cursor(sort: str, row: Dict[str, Any]) -> str:
+    values = sort_key(sort, row)
+    raw = json.dumps({"s": sort, "v": values}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort: str, cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if payload.get("s") != sort or len(values) != len(SORTS[sort]):
+        raise InvalidCursor("Cursor does not match the requested sort order")
+    return values
+
+
+def keyset_filter(keys: Sequence[Tuple[str, bool]], values: Sequence[Any]) -> str:
+    """Build the PostgREST ``or`` expression selecting rows after ``values``.
+
+    For keys (a, b) this is ``a > va OR (a = va AND b > vb)`` with the
+    comparison flipped for descending columns.
+    """
+    branches = []
+    for i, (column, desc) in enumerate(keys):
+        op = "lt" if desc else "gt"
+        equals = [f"{c}.eq.{quote(v)}" for (c, _), v in zip(keys[:i], values[:i])]
+        condition = f"{column}.{op}.{quote(values[i])}"
+        branches.append(f"and({','.join(equals + [condition])})" if equals else condition)
+    return ",".join(branches)
+
+
+def apply_sort(query, sort: str):
+    if sort == "transit":
+        query = query.gte("station_distance_m", 0)
+    for column, desc in SORTS[sort]:
+        query = query.order(column, desc=desc)
+    return query
+
+
+def apply_cursor(query, sort: str, cursor: str):
+    return apply_keyset(query, sort, decode_cursor(sort, cursor))
+
+
+def apply_keyset(query, sort: str, values: Sequence[Any]):
+    """Restrict ``query`` to rows strictly after the sort key ``values``"""
+    keys = SORTS[sort]
+    # The redundant bound on the leading column lets Postgres turn the
+    # OR-expanded predicate into a plain index range scan.
+    column, desc = keys[0]
+    query = query.lte(column, values[0]) if desc else query.gte(column, values[0])
+    return query.or_(keyset_filter(keys, values))
+
+
+def next_cursor(sort: str, rows: List[Dict[str, Any]], limit: int):
+    """Cursor for the page after ``rows``, or None when this was the last page"""
+    if len(rows) < limit:
+        return None
+    return encode_cursor(sort, rows[-1])
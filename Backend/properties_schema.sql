@@ -10,7 +10,7 @@ CREATE TABLE IF NOT EXISTS properties (
     bedrooms INTEGER NOT NULL CHECK (bedrooms >= 0),
     bathrooms INTEGER NOT NULL CHECK (bathrooms >= 0),
     size DECIMAL(10, 2) NOT NULL CHECK (size > 0),
-    location VARCHAR(100) NOT NULL,
+    location VARCHAR(100), -- Optional, as in database_schema.sql and PropertyBase
     address VARCHAR(500) NOT NULL,
     images TEXT[] DEFAULT '{}', -- Array of image URLs
     features TEXT[] DEFAULT '{}', -- Array of features
@@ -20,6 +20,9 @@ CREATE TABLE IF NOT EXISTS properties (
     contact_email VARCHAR(255) NOT NULL,
     lat DECIMAL(10, 7), -- Latitude coordinate
     lng DECIMAL(10, 7), -- Longitude coordinate
+    nearest_station VARCHAR(50), -- Closest MRT station id (see transit.py)
+    station_distance_m INTEGER, -- Metres to nearest_station
+    nearby_stations JSONB, -- {station id: metres} within TRANSIT_RADIUS_M
     is_active BOOLEAN DEFAULT true,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
@@ -31,9 +34,119 @@ CREATE INDEX IF NOT EXISTS idx_properties_listing_type ON properties(listing_typ
 CREATE INDEX IF NOT EXISTS idx_properties_property_type ON properties(property_type);
 CREATE INDEX IF NOT EXISTS idx_properties_price ON properties(price);
 CREATE INDEX IF NOT EXISTS idx_properties_location ON properties(location);
+-- Tables created by an older copy of this file declared location NOT NULL
+ALTER TABLE properties ALTER COLUMN location DROP NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_properties_is_active ON properties(is_active);
 CREATE INDEX IF NOT EXISTS idx_properties_created_at ON properties(created_at);
 
+-- Keyset pagination indexes: sort key plus id as a unique tiebreaker, active rows only.
+-- price_desc walks idx_properties_active_price_id backwards.
+CREATE INDEX IF NOT EXISTS idx_properties_active_created_id ON properties(created_at DESC, id DESC) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_properties_active_price_id ON properties(price, id) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_properties_active_size_id ON properties(size, id) WHERE is_active = true;
+
+-- Transit columns, filled on every write and by backfill_transit.py for existing rows.
+-- station_distance_m serves the "any station within N metres" filter and sort=transit.
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS nearest_station VARCHAR(50);
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS station_distance_m INTEGER;
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS nearby_stations JSONB;
+CREATE INDEX IF NOT EXISTS idx_properties_active_station_id ON properties(station_distance_m, id) WHERE is_active = true;
+
+-- nearby_stations as one row per (listing, station), for the "within N metres
+-- of station X" filter: a range scan on (station, distance_m) instead of
+-- reading nearby_stations->X from every row. Queried through PostgREST as a
+-- filter-only embed (select=...,property_stations!inner()) and kept in step
+-- with nearby_stations by the trigger below.
+CREATE TABLE IF NOT EXISTS property_stations (
+    property_id UUID NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+    station VARCHAR(50) NOT NULL,
+    distance_m INTEGER NOT NULL,
+    PRIMARY KEY (property_id, station)
+);
+CREATE INDEX IF NOT EXISTS idx_property_stations_station_distance ON property_stations(station, distance_m, property_id);
+
+CREATE OR REPLACE FUNCTION sync_property_stations()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM property_stations WHERE property_id = NEW.id;
+    INSERT INTO property_stations (property_id, station, distance_m)
+    SELECT NEW.id, s.key, s.value::INTEGER FROM jsonb_each_text(NEW.nearby_stations) AS s;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS sync_property_stations ON properties;
+CREATE TRIGGER sync_property_stations
+    AFTER INSERT OR UPDATE OF nearby_stations ON properties
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_property_stations();
+
+-- Listings written before the table existed
+INSERT INTO property_stations (property_id, station, distance_m)
+SELECT p.id, s.key, s.value::INTEGER FROM properties p, jsonb_each_text(p.nearby_stations) AS s
+ON CONFLICT DO NOTHING;
+
+-- Trigram indexes so the text search (ILIKE '%term%') does not scan the table
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_properties_title_trgm ON properties USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_properties_address_trgm ON properties USING gin (address gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_properties_description_trgm ON properties USING gin (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_properties_location_trgm ON properties USING gin (location gin_trgm_ops);
+
+-- Computed column: first image URL, selectable as "thumbnail" through PostgREST
+-- (used by the fields=summary projection instead of shipping every image URL)
+CREATE OR REPLACE FUNCTION thumbnail(properties)
+RETURNS TEXT AS $$
+    SELECT $1.images[1];
+$$ LANGUAGE SQL STABLE;
+
+-- Bulk writes (POST/PUT /api/properties/bulk, /bulk/deactivate).
+-- Ownership is part of each statement: rows not owned by p_owner_id are
+-- left untouched and simply not returned. Fields missing or null in an
+-- update item keep their current value.
+CREATE OR REPLACE FUNCTION bulk_update_properties(p_owner_id UUID, p_items JSONB)
+RETURNS SETOF properties AS $$
+    UPDATE properties p SET
+        title = COALESCE(i.title, p.title),
+        description = COALESCE(i.description, p.description),
+        address = COALESCE(i.address, p.address),
+        price = COALESCE(i.price, p.price),
+        bedrooms = COALESCE(i.bedrooms, p.bedrooms),
+        bathrooms = COALESCE(i.bathrooms, p.bathrooms),
+        size = COALESCE(i.size, p.size),
+        property_type = COALESCE(i.property_type, p.property_type),
+        listing_type = COALESCE(i.listing_type, p.listing_type),
+        features = COALESCE(i.features, p.features),
+        amenities = COALESCE(i.amenities, p.amenities),
+        images = COALESCE(i.images, p.images),
+        location = COALESCE(i.location, p.location),
+        lat = COALESCE(i.lat, p.lat),
+        lng = COALESCE(i.lng, p.lng),
+        nearest_station = COALESCE(i.nearest_station, p.nearest_station),
+        station_distance_m = COALESCE(i.station_distance_m, p.station_distance_m),
+        nearby_stations = COALESCE(i.nearby_stations, p.nearby_stations),
+        contact_name = COALESCE(i.contact_name, p.contact_name),
+        contact_phone = COALESCE(i.contact_phone, p.contact_phone),
+        contact_email = COALESCE(i.contact_email, p.contact_email)
+    FROM jsonb_to_recordset(p_items) AS i(
+        id UUID, title TEXT, description TEXT, address TEXT, price NUMERIC,
+        bedrooms INTEGER, bathrooms INTEGER, size NUMERIC, property_type TEXT,
+        listing_type TEXT, features TEXT[], amenities TEXT[], images TEXT[],
+        location TEXT, lat NUMERIC, lng NUMERIC, nearest_station TEXT,
+        station_distance_m INTEGER, nearby_stations JSONB, contact_name TEXT,
+        contact_phone TEXT, contact_email TEXT
+    )
+    WHERE p.id = i.id AND p.owner_id = p_owner_id
+    RETURNING p.*;
+$$ LANGUAGE SQL;
+
+CREATE OR REPLACE FUNCTION bulk_deactivate_properties(p_owner_id UUID, p_ids UUID[])
+RETURNS TABLE (id UUID) AS $$
+    UPDATE properties SET is_active = false
+    WHERE properties.id = ANY(p_ids) AND properties.owner_id = p_owner_id
+    RETURNING properties.id;
+$$ LANGUAGE SQL;
+
 -- Create a function to automatically update the updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -51,6 +164,13 @@ CREATE TRIGGER update_properties_updated_at
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE properties ENABLE ROW LEVEL SECURITY;
+ALTER TABLE property_stations ENABLE ROW LEVEL SECURITY;
+
+-- Station distances are public; embedding them still goes through the
+-- properties policies. Only sync_property_stations() writes them.
+CREATE POLICY "Station distances are viewable by everyone"
+    ON property_stations FOR SELECT
+    USING (true);
 
 -- Create RLS policies
 -- Allow everyone to read active properties
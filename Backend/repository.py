@@ -0,0 +1,94 @@
+"""
+Users and listing writes, independent of the storage engine
+
+Every function takes a ``database.Database``, the storage interface that
+both the Supabase PostgREST client and the direct-SQL engine in
+``sql_client`` implement, so the functions are written once; steps that
+belong together run in ``db.transaction()``, which is a real database
+transaction on the SQL engine. Favourites live in ``favorites`` (with
+their cache) and listing reads stay in the routes, where they are shaped
+by fields and filters.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from database import Database
+from rest_client import APIError
+
+
+class EmailTaken(Exception):
+    """Registration for an email address that already has an account"""
+
+
+# Users
+async def get_user(db: Database, user_id: str) -> Optional[Dict[str, Any]]:
+    result = await db.table("users").select("*").eq("id", user_id).limit(1).execute()
+    return result.data[0] if result.data else None
+
+
+async def get_user_by_email(db: Database, email: str) -> Optional[Dict[str, Any]]:
+    result = await db.table("users").select("*").eq("email", email).limit(1).execute()
+    return result.data[0] if result.data else None
+
+
+async def create_user(db: Database, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a user; raises ``EmailTaken`` when the email is already registered"""
+    try:
+        async with db.transaction():
+            existing = await db.table("users").select("id").eq("email", row["email"]).limit(1).execute()
+            if existing.data:
+                raise EmailTaken(row["email"])
+            result = await db.table("users").insert(row).execute()
+    except APIError as e:
+        # Lost a race with a concurrent registration: the unique index decides
+        if e.code == "23505":
+            raise EmailTaken(row["email"]) from e
+        raise
+    if not result.data:
+        raise APIError("Failed to create user")
+    return result.data[0]
+
+
+async def update_user(db: Database, user_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    result = await db.table("users").update(changes).eq("id", user_id).execute()
+    return result.data[0] if result.data else None
+
+
+async def delete_user(db: Database, user_id: str) -> bool:
+    result = await db.table("users").delete().eq("id", user_id).select("id").execute()
+    return bool(result.data)
+
+
+async def listing_ids(db: Database, owner_id: str) -> List[str]:
+    """Ids of ``owner_id``'s active listings"""
+    result = await db.table("properties").select("id").eq("owner_id", owner_id).eq("is_active", True).execute()
+    return [row["id"] for row in result.data]
+
+
+async def listing_coordinates(db: Database, owner_id: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """``{id: {"lat": ..., "lng": ...}}`` for ``owner_id``'s listings among ``ids``"""
+    result = await db.table("properties").select("id,lat,lng").in_("id", ids).eq("owner_id", owner_id).execute()
+    return {row["id"]: row for row in result.data}
+
+
+# Listing writes (ownership is part of each statement's filter)
+async def create_listing(db: Database, row: Dict[str, Any]) -> Dict[str, Any]:
+    result = await db.table("properties").insert(row).execute()
+    if not result.data:
+        raise APIError("Failed to create property")
+    return result.data[0]
+
+
+async def update_listing(db: Database, property_id: str, owner_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The updated row, or None when it does not exist or is not ``owner_id``'s"""
+    result = await db.table("properties").update(changes).eq("id", property_id).eq("owner_id", owner_id).execute()
+    return result.data[0] if result.data else None
+
+
+async def deactivate_listing(db: Database, property_id: str, owner_id: str) -> bool:
+    """Soft-delete; False when the listing does not exist or is not ``owner_id``'s"""
+    result = await (
+        db.table("properties").update({"is_active": False})
+        .eq("id", property_id).eq("owner_id", owner_id).select("id").execute()
+    )
+    return bool(result.data)
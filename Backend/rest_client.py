@@ -0,0 +1,313 @@
+"""
+Async PostgREST client used by the API routes
+
+Mirrors the fluent interface of the Supabase query builder
+(``db.table("users").select("*").eq("id", x).execute()``) but every
+request goes through one shared ``httpx.AsyncClient``, so route handlers
+can ``await`` the round-trip instead of blocking the event loop.
+"""
+
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from metrics import db_duration, db_errors, timed
+
+# Status codes that are safe to retry for idempotent requests
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class APIError(Exception):
+    """Error returned by PostgREST (or raised after retries are exhausted)"""
+
+    def __init__(self, message: str, code: Optional[str] = None, status_code: Optional[int] = None, details: Any = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.status_code = status_code
+        self.details = details
+
+
+class APIResponse:
+    """Result of an executed query (same shape as supabase-py's response)"""
+
+    def __init__(self, data: List[Dict[str, Any]], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    if isinstance(value, Enum):
+        return str(value.value)
+    return str(value)
+
+
+def quote(value: Any) -> str:
+    """Double-quote a value for use inside PostgREST ``in``/``or`` expressions"""
+    text = _format_value(value)
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _format_list(values: Iterable[Any]) -> str:
+    formatted = []
+    for value in values:
+        text = _format_value(value)
+        if any(c in text for c in ',()"\\ '):
+            text = quote(value)
+        formatted.append(text)
+    return "(" + ",".join(formatted) + ")"
+
+
+def _json_ready(data: Any) -> Any:
+    """Convert Enum members to their values so httpx can encode the payload"""
+    if isinstance(data, dict):
+        return {k: _json_ready(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_json_ready(v) for v in data]
+    if isinstance(data, Enum):
+        return data.value
+    return data
+
+
+class AsyncQuery:
+    """Builder for a single PostgREST request"""
+
+    def __init__(self, client: "AsyncPostgrestClient", table: str):
+        self._client = client
+        self._table = table
+        self._method = "GET"
+        # Metrics label: select / insert / upsert / update / delete / rpc
+        self._operation = "select"
+        self._params: List[Tuple[str, str]] = []
+        self._headers: Dict[str, str] = {}
+        self._json: Any = None
+
+    # Verbs
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "AsyncQuery":
+        self._params.append(("select", columns))
+        if count:
+            self._prefer(f"count={count}")
+        return self
+
+    def embed(self, resource: str) -> "AsyncQuery":
+        """Add ``resource`` (e.g. ``property_stations!inner()``) to the select list"""
+        for i, (key, value) in enumerate(self._params):
+            if key == "select":
+                self._params[i] = ("select", f"{value},{resource}")
+                return self
+        self._params.append(("select", f"*,{resource}"))
+        return self
+
+    def insert(self, data: Any, upsert: bool = False, on_conflict: Optional[str] = None) -> "AsyncQuery":
+        self._method = "POST"
+        self._operation = "upsert" if upsert else "insert"
+        self._json = _json_ready(data)
+        self._prefer("return=representation")
+        if upsert:
+            self._prefer("resolution=merge-duplicates")
+            if on_conflict:
+                self._params.append(("on_conflict", on_conflict))
+        return self
+
+    def upsert(self, data: Any, on_conflict: Optional[str] = None) -> "AsyncQuery":
+        return self.insert(data, upsert=True, on_conflict=on_conflict)
+
+    def update(self, data: Dict[str, Any]) -> "AsyncQuery":
+        self._method = "PATCH"
+        self._operation = "update"
+        self._json = _json_ready(data)
+        self._prefer("return=representation")
+        return self
+
+    def delete(self) -> "AsyncQuery":
+        self._method = "DELETE"
+        self._operation = "delete"
+        self._prefer("return=representation")
+        return self
+
+    # Filters
+    def _filter(self, column: str, op: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, f"{op}.{_format_value(value)}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "lte", value)
+
+    def ilike(self, column: str, pattern: str) -> "AsyncQuery":
+        return self._filter(column, "ilike", pattern)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "AsyncQuery":
+        self._params.append((column, f"in.{_format_list(values)}"))
+        return self
+
+    def or_(self, filters: str) -> "AsyncQuery":
+        self._params.append(("or", f"({filters})"))
+        return self
+
+    # Modifiers
+    def order(self, column: str, desc: bool = False) -> "AsyncQuery":
+        direction = "desc" if desc else "asc"
+        for i, (key, value) in enumerate(self._params):
+            if key == "order":
+                self._params[i] = ("order", f"{value},{column}.{direction}")
+                return self
+        self._params.append(("order", f"{column}.{direction}"))
+        return self
+
+    def limit(self, count: int) -> "AsyncQuery":
+        self._params.append(("limit", str(count)))
+        return self
+
+    def range(self, start: int, end: int) -> "AsyncQuery":
+        self._params.append(("offset", str(start)))
+        self._params.append(("limit", str(end - start + 1)))
+        return self
+
+    def _prefer(self, value: str) -> None:
+        current = self._headers.get("Prefer")
+        self._headers["Prefer"] = f"{current},{value}" if current else value
+
+    async def execute(self) -> APIResponse:
+        with timed("db", db_duration, self._table, self._operation):
+            try:
+                return await self._client.request(
+                    self._method,
+                    f"/{self._table}",
+                    params=self._params,
+                    headers=self._headers,
+                    json=self._json,
+                )
+            except APIError:
+                db_errors.inc(self._table, self._operation)
+                raise
+
+
+class AsyncPostgrestClient:
+    """Shared async HTTP client with a bounded keep-alive pool, timeouts and retries"""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.1,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={
+                "apikey": api_key,
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            },
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=httpx.Timeout(timeout),
+            transport=transport,
+        )
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self, name)
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> AsyncQuery:
+        """Call a Postgres function (``POST /rpc/<function>``)"""
+        query = AsyncQuery(self, f"rpc/{function}")
+        query._method = "POST"
+        query._operation = "rpc"
+        query._json = _json_ready(params or {})
+        return query
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[List[Tuple[str, str]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+    ) -> APIResponse:
+        # Reads can be retried on any transport error; writes only when the
+        # request never reached the server.
+        idempotent = method == "GET"
+        attempt = 0
+        while True:
+            try:
+                response = await self._http.request(method, path, params=params, headers=headers, json=json)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                if attempt >= self.retries:
+                    raise APIError(f"Database unreachable: {e}") from e
+            except httpx.TransportError as e:
+                if not idempotent or attempt >= self.retries:
+                    raise APIError(f"Database request failed: {e}") from e
+            else:
+                retryable = response.status_code in RETRYABLE_STATUS and idempotent
+                if not retryable or attempt >= self.retries:
+                    return self._parse(response)
+            attempt += 1
+            await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> APIResponse:
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"message": response.text}
+            raise APIError(
+                body.get("message", response.reason_phrase),
+                code=body.get("code"),
+                status_code=response.status_code,
+                details=body.get("details"),
+            )
+
+        data: Any = response.json() if response.content else []
+        if isinstance(data, dict):
+            data = [data]
+
+        count = None
+        content_range = response.headers.get("content-range")
+        if content_range and "/" in content_range:
+            total = content_range.split("/")[-1]
+            if total.isdigit():
+                count = int(total)
+        return APIResponse(data=data, count=count)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Group queries that must commit together.
+
+        PostgREST runs every request in its own transaction, so over HTTP
+        this only marks the block; multi-statement atomicity needs an
+        ``rpc`` function. ``AsyncSqlClient.transaction`` is a real one.
+        """
+        yield
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
@@ -2,5 +2,9 @@
 from .auth import router as auth_router
 from .users import router as users_router
 from .properties import router as properties_router
+from .favorites import router as favorites_router
+from .saved_searches import router as saved_searches_router
+from .stats import router as stats_router
+from .stations import router as stations_router
 
-__all__ = ["auth_router", "users_router", "properties_router"]
+__all__ = ["auth_router", "users_router", "properties_router", "favorites_router", "saved_searches_router", "stats_router", "stations_router"]
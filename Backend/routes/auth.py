@@ -3,22 +3,25 @@ Authentication routes
 """
 
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPAuthorizationCredentials
 from datetime import timedelta
 from models import UserCreate, UserLogin, UserResponse, Token, MessageResponse
-from auth import create_access_token, verify_password, get_password_hash, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
-from database import get_supabase_client
+from auth import create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from hashing import hash_password, verify_password
+from metrics import password_rehash_errors
+from database import get_db
+from repository import EmailTaken, create_user, get_user_by_email, update_user
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate):
     """Register a new user"""
-    supabase = get_supabase_client()
+    db = get_db()
     
-    # Check if user already exists
-    existing_user = supabase.table("users").select("id").eq("email", user_data.email).execute()
-    if existing_user.data:
+    # Cheap early rejection before paying for a hash; create_user re-checks
+    if await get_user_by_email(db, user_data.email) is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -36,27 +39,19 @@ async def register(user_data: UserCreate):
         user_data.phone = None
         user_data.agent_license = None
     
-    # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    # Hash password (in the worker pool, off the event loop)
+    hashed_password = await hash_password(user_data.password)
     
-    # Create user in Supabase
+    # Create the user; the email check and the insert run in one transaction
     try:
-        result = supabase.table("users").insert({
+        user = await create_user(db, {
             "name": user_data.name,
             "email": user_data.email,
             "user_type": user_data.user_type,
             "phone": user_data.phone,
             "agent_license": user_data.agent_license,
             "password_hash": hashed_password
-        }).execute()
-        
-        if not result.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create user"
-            )
-        
-        user = result.data[0]
+        })
         return UserResponse(
             id=user["id"],
             name=user["name"],
@@ -67,6 +62,11 @@ async def register(user_data: UserCreate):
             created_at=user["created_at"]
         )
         
+    except EmailTaken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -76,25 +76,32 @@ async def register(user_data: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(login_data: UserLogin):
     """Login user and return access token"""
-    supabase = get_supabase_client()
+    db = get_db()
     
     # Get user by email
-    result = supabase.table("users").select("*").eq("email", login_data.email).execute()
-    if not result.data:
+    user = await get_user_by_email(db, login_data.email)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
-    user = result.data[0]
-    
     # Verify password
-    if not verify_password(login_data.password, user["password_hash"]):
+    valid, new_hash = await verify_password(login_data.password, user["password_hash"])
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    # Transparently upgrade hashes created with old cost parameters
+    if new_hash:
+        try:
+            await update_user(db, user["id"], {"password_hash": new_hash})
+        except Exception as e:
+            # The login still succeeds; the old hash stays valid and is retried next time
+            password_rehash_errors.inc(type(e).__name__)
+    
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -107,7 +114,8 @@ async def login(login_data: UserLogin):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: UserResponse = Depends(get_current_user)):
     """Get current user information"""
-    return current_user
+    # Already validated (and usually cached) by get_current_user
+    return ORJSONResponse(current_user.model_dump(mode="json"))
 
 @router.post("/logout", response_model=MessageResponse)
 async def logout(current_user: UserResponse = Depends(get_current_user)):
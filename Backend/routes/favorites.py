@@ -0,0 +1,95 @@
+"""
+Favorite listings routes
+"""
+
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import ORJSONResponse
+from typing import Dict, List
+from models import PropertyResponse, MessageResponse, UserResponse
+from auth import get_current_user
+from database import get_db
+from favorites import add_favorite, favorite_ids, list_favorites, remove_favorite
+from rest_client import APIError
+from serialization import listings
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Postgres foreign_key_violation: the property does not exist
+FOREIGN_KEY_VIOLATION = "23503"
+
+@router.get("/", response_model=List[PropertyResponse])
+async def get_favorites(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """The current user's favourited active properties, most recent first"""
+    try:
+        rows = await list_favorites(get_db(), current_user.id, skip, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch favorites: {str(e)}"
+        )
+    payload = listings(rows)
+    for item in payload:
+        item["is_favorited"] = True
+    return ORJSONResponse(payload)
+
+@router.get("/check", response_model=Dict[str, bool])
+async def check_favorites(
+    ids: List[str] = Query(..., max_length=500, description="Repeat for each property id"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Whether each of the given properties is a favourite of the current user"""
+    try:
+        favorites = await favorite_ids(get_db(), current_user.id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch favorites: {str(e)}"
+        )
+    return {pid: pid in favorites for pid in ids}
+
+@router.post("/{property_id}", response_model=MessageResponse)
+async def favorite_property(
+    property_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Add a property to the current user's favourites"""
+    try:
+        added = await add_favorite(get_db(), current_user.id, property_id)
+    except APIError as e:
+        # The listing can still be deleted between the check and the insert
+        if e.code != FOREIGN_KEY_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to add favorite: {e.message}"
+            )
+        added = False
+    if not added:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property not found"
+        )
+    return MessageResponse(message="Property added to favorites")
+
+@router.delete("/{property_id}", response_model=MessageResponse)
+async def unfavorite_property(
+    property_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Remove a property from the current user's favourites"""
+    try:
+        removed = await remove_favorite(get_db(), current_user.id, property_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to remove favorite: {str(e)}"
+        )
+    if not removed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property is not in favorites"
+        )
+    return MessageResponse(message="Property removed from favorites")
@@ -2,78 +2,586 @@
 Property management routes
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Optional
-from models import PropertyCreate, PropertyUpdate, PropertyResponse, MessageResponse, UserResponse
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends, Query, Body, Request, Response
+import asyncio
+import os
+import uuid
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Any, Dict, FrozenSet, List, Optional
+from pydantic import ValidationError
+from models import (
+    PropertyCreate, PropertyUpdate, PropertyResponse, PropertyFilters, MessageResponse, UserResponse,
+    MapCluster, Viewport, ViewportResponse, FacetsResponse,
+    BulkPropertyUpdate, BulkDeactivateRequest, BulkItemResult, BulkResponse,
+    PropertyBatchRequest, PropertyBatchResponse,
+)
 from auth import get_current_user, get_current_user_optional
-from database import get_supabase_client
+from cache import QueryCache
+from catalog import catalog
+from events import EventStreamResponse, listing_events
+from database import get_db
+from bulk import BULK_MAX_ITEMS, create_listings, deactivate_listings, listing_row, update_listings, validate
+from export import MEDIA_TYPES, ExportFormat, ExportReader, encode
+from facets import facet_index, snapshot_counts
+from http_cache import cached_json, etag_for, last_modified
+from fields import FAVORITED, Fields, project_all, property_fields, select_columns
+from favorites import favorite_ids
+from saved_searches import record_matches
+from serialization import listings
+from filters import apply_filters, matches, property_filters
+from geo_index import geo_index
+from search_index import search_index
+from similar_index import similar_index
+from transit import moves_one_coordinate, with_transit
+from snapshot import SNAPSHOT_ENABLED, snapshot
+from repository import create_listing, deactivate_listing, listing_coordinates, update_listing
+from pagination import SORTS, DEFAULT_SORT, InvalidCursor, SortOption, apply_keyset, apply_sort, decode_cursor, next_cursor
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Multi-get limits: ids per request, and ids per PostgREST ``in`` query
+# (keeps the query string within common proxy limits)
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "300"))
+BATCH_QUERY_CHUNK = 150
+
+# Browse-page result cache, invalidated on every listing write in this
+# worker (registered as a catalogue listener in main); the TTL bounds how
+# long writes made through other workers can go unseen
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "10"))
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "1000"))
+page_cache = QueryCache(PAGE_CACHE_SIZE, PAGE_CACHE_TTL, name="pages")
 
 @router.get("/", response_model=List[PropertyResponse])
 async def get_properties(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    property_type: Optional[str] = Query(None),
-    listing_type: Optional[str] = Query(None),
-    min_price: Optional[float] = Query(None, ge=0),
-    max_price: Optional[float] = Query(None, ge=0),
-    bedrooms: Optional[int] = Query(None, ge=0),
-    bathrooms: Optional[int] = Query(None, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
+    sort: SortOption = Query(DEFAULT_SORT),
+    filters: PropertyFilters = Depends(property_filters),
+    fields: Fields = Depends(property_fields),
     current_user: Optional[UserResponse] = Depends(get_current_user_optional)
 ):
-    """Get properties with optional filters"""
-    supabase = get_supabase_client()
+    """Get properties with optional filters.
+
+    Accepts the full frontend filter model: text search, multi-valued
+    ``property_type`` and ``location``, min/max bounds on price,
+    bedrooms, bathrooms and size, and transit proximity (``station`` /
+    ``station_radius_m``). Only the requested page is returned.
+
+    Pages are ordered by ``sort``. The ``X-Next-Cursor`` response header
+    carries a cursor for the following page (absent on the last page);
+    passing it back as ``cursor`` uses keyset pagination, which stays fast
+    at any depth. ``skip`` is kept for offset-based clients.
+
+    ``fields`` (a comma-separated field list, or ``summary`` for the
+    ``PropertySummary`` card projection) limits the columns fetched and
+    returned.
+
+    Responses carry an ``ETag`` built from the listed ids and their
+    ``updated_at``; a matching ``If-None-Match`` gets an empty 304.
+    """
+    try:
+        after = decode_cursor(sort, cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Build query
-    query = supabase.table("properties").select("*").eq("is_active", True)
+    try:
+        # The sort columns are always fetched so the next cursor can be built
+        columns = select_columns(fields, extra=[column for column, _ in SORTS[sort]])
+        offset = 0 if after else skip
+        key = (filters.model_dump_json(), sort, limit, offset, tuple(after) if after else None, columns)
+        rows = await page_cache.get_or_load(key, lambda: _fetch_page(filters, sort, limit, skip, after, columns))
+        cursor_out = next_cursor(sort, rows, limit)
+        headers = {"X-Next-Cursor": cursor_out} if cursor_out else None
+        return await _listings(request, rows, current_user, fields, headers)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch properties: {str(e)}"
+        )
+
+async def _fetch_page(
+    filters: PropertyFilters, sort: str, limit: int, skip: int, after: Optional[list], columns: str = "*"
+) -> List[dict]:
+    """One page of active listing rows, from the columnar snapshot when it is loaded"""
+    if SNAPSHOT_ENABLED and catalog.loaded:
+        ids = snapshot.query(filters, sort, limit, offset=0 if after else skip, after=after, rows=catalog.rows)
+        return [catalog.rows[pid] for pid in ids]
+
+    db = get_db()
     
-    # Apply filters
-    if property_type:
-        query = query.eq("property_type", property_type)
-    if listing_type:
-        query = query.eq("listing_type", listing_type)
-    if min_price:
-        query = query.gte("price", min_price)
-    if max_price:
-        query = query.lte("price", max_price)
-    if bedrooms:
-        query = query.gte("bedrooms", bedrooms)
-    if bathrooms:
-        query = query.gte("bathrooms", bathrooms)
+    # Build query
+    query = db.table("properties").select(columns).eq("is_active", True)
+    query = apply_filters(query, filters)
     
-    # Apply pagination
-    query = query.range(skip, skip + limit - 1)
+    # Apply ordering and pagination
+    query = apply_sort(query, sort)
+    if after:
+        query = apply_keyset(query, sort, after).limit(limit)
+    else:
+        query = query.range(skip, skip + limit - 1)
     
+    result = await query.execute()
+    return result.data
+
+@router.get("/search", response_model=List[PropertyResponse])
+async def search_properties(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    filters: PropertyFilters = Depends(property_filters),
+    fields: Fields = Depends(property_fields),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Ranked full-text search over active listings.
+
+    Matches title, description, address, location, features and amenities
+    with BM25 ranking, prefix matching on the last word and one-typo
+    tolerance. The usual listing filters narrow the results further.
+    """
+    filters = filters.model_copy(update={"search": None})
+
+    if not catalog.loaded:
+        # Index not built in this worker yet: fall back to an unranked ILIKE query
+        db = get_db()
+        query = db.table("properties").select(select_columns(fields)).eq("is_active", True)
+        query = apply_filters(query, filters.model_copy(update={"search": q}))
+        try:
+            result = await query.range(skip, skip + limit - 1).execute()
+            return await _listings(request, result.data, current_user, fields)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to search properties: {str(e)}"
+            )
+
+    # Filters become one vectorized mask; only the BM25 hits are looked up in it
+    candidates = snapshot.matching(filters) if filters != PropertyFilters() else None
+    hits = search_index.search(q, limit=skip + limit, candidates=candidates)
+    return await _listings(request, [catalog.rows[pid] for pid, _ in hits[skip:]], current_user, fields)
+
+async def _listings(
+    request: Request, rows: List[dict], user: Optional[UserResponse], fields: Fields = None,
+    headers: Optional[dict] = None, variant: tuple = (),
+) -> Response:
+    """Trusted rows as full listings, or projected when ``fields`` is set.
+
+    Conditional and cached through ``http_cache``: the ETag covers the
+    rows, the fieldset, the favourite flags, ``headers`` and ``variant``
+    (anything else that shapes the body), so the payload is only built
+    when the client's copy is stale and no encoded body is stored.
+    """
+    favorites = await _favorites_of(user, fields)
+    flags = None if favorites is None else [row["id"] in favorites for row in rows]
+    etag = etag_for(rows, fields, flags, headers, variant)
+    return cached_json(
+        request,
+        lambda: _listing_payload(rows, fields, favorites),
+        etag,
+        public=user is None,
+        modified=last_modified(rows),
+        headers=headers,
+    )
+
+def _listing_payload(rows: List[dict], fields: Fields, favorites: Optional[FrozenSet[str]]) -> List[dict]:
+    """Response dicts for trusted rows.
+
+    For signed-in users each listing carries ``is_favorited``, read from the
+    cached favourite-id set.
+    """
+    payload = project_all(rows, fields) if fields is not None else listings(rows)
+    if favorites is not None:
+        for item, row in zip(payload, rows):
+            item[FAVORITED] = row["id"] in favorites
+    return payload
+
+async def _favorites_of(user: Optional[UserResponse], fields: Fields) -> Optional[FrozenSet[str]]:
+    if user is None or (fields is not None and FAVORITED not in fields):
+        return None
+    try:
+        return await favorite_ids(get_db(), user.id)
+    except Exception:
+        # The annotation is best-effort: listings are still served without it
+        return None
+
+def _require_catalog():
+    if not catalog.loaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Listing index is not ready yet"
+        )
+
+def _accept(filters: PropertyFilters):
+    """Predicate over catalogue ids for the given filters (None when unfiltered)"""
+    if filters == PropertyFilters():
+        return None
+    return lambda pid: matches(filters, catalog.rows[pid])
+
+@router.get("/nearby", response_model=List[PropertyResponse])
+async def get_nearby_properties(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(1000, gt=0, le=50000),
+    limit: int = Query(100, ge=1, le=500),
+    filters: PropertyFilters = Depends(property_filters),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Listings within ``radius_m`` metres of a point, nearest first"""
+    _require_catalog()
+    accept = _accept(filters)
+    results = []
+    for pid, _ in geo_index.within_radius(lat, lng, radius_m):
+        if accept is None or accept(pid):
+            results.append(catalog.rows[pid])
+            if len(results) >= limit:
+                break
+    return await _listings(request, results, current_user)
+
+@router.get("/within", response_model=List[PropertyResponse])
+async def get_properties_in_bbox(
+    request: Request,
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    limit: int = Query(500, ge=1, le=1000),
+    filters: PropertyFilters = Depends(property_filters),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Listings inside a bounding box"""
+    _require_catalog()
+    accept = _accept(filters)
+    results = []
+    for pid in geo_index.within_bbox(south, west, north, east):
+        if accept is None or accept(pid):
+            results.append(catalog.rows[pid])
+            if len(results) >= limit:
+                break
+    return await _listings(request, results, current_user)
+
+@router.get("/nearest", response_model=List[PropertyResponse])
+async def get_nearest_properties(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100),
+    filters: PropertyFilters = Depends(property_filters),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """The ``k`` listings nearest to a point"""
+    _require_catalog()
+    hits = geo_index.nearest(lat, lng, k, accept=_accept(filters))
+    return await _listings(request, [catalog.rows[pid] for pid, _ in hits], current_user)
+
+def viewport(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+) -> Viewport:
+    """Viewport query parameters; inverted edges are a 422 like any other bad query"""
     try:
-        result = query.execute()
-        properties = []
-        for prop in result.data:
-            properties.append(PropertyResponse(**prop))
-        return properties
+        return Viewport(south=south, west=west, north=north, east=east, zoom=zoom)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("query", *error["loc"])} for error in e.errors(include_url=False, include_context=False)]
+        )
+
+@router.get("/viewport", response_model=ViewportResponse)
+async def get_viewport_clusters(
+    view: Viewport = Depends(viewport),
+    filters: PropertyFilters = Depends(property_filters),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Map markers for a viewport, clustered server-side by zoom level.
+
+    Clusters holding a single listing carry its ``property_id``.
+    """
+    _require_catalog()
+    accept = _accept(filters)
+    bounds = (view.south, view.west, view.north, view.east)
+    ids = None
+    if accept is not None:
+        ids = [pid for pid in geo_index.within_bbox(*bounds) if accept(pid)]
+    clusters = geo_index.clusters(*bounds, view.zoom, ids=ids)
+    return ViewportResponse(
+        total=sum(c["count"] for c in clusters),
+        zoom=view.zoom,
+        clusters=[MapCluster(**c) for c in clusters],
+    )
+
+@router.get("/facets", response_model=FacetsResponse)
+async def get_property_facets(
+    filters: PropertyFilters = Depends(property_filters),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Counts per property type, listing type, location and bedroom bucket,
+    plus a price histogram, for the current filters.
+
+    Each facet is counted with every filter except its own, so the counts
+    show what selecting another value would return. Answered from the
+    facet aggregates when the filters allow it, otherwise from the snapshot.
+    """
+    _require_catalog()
+    if facet_index.supports(filters):
+        return FacetsResponse(**facet_index.counts(filters))
+    return FacetsResponse(**snapshot_counts(snapshot, filters, catalog.rows))
+
+def _require_agent(user: UserResponse):
+    if user.user_type != "agent":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only agents can create properties"
+        )
+
+def _check_batch(items: list):
+    if not items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No items given")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ITEMS} items per request"
+        )
+
+def _apply(kind: str, row: Dict[str, Any]) -> None:
+    """Publish a written row to the event stream and update the catalogue"""
+    listing_events.publish(kind, row, catalog.get(row["id"]))
+    catalog.upsert(row)
+
+def _removed(property_id: str) -> None:
+    listing_events.publish("deactivate", {"id": property_id}, catalog.get(property_id))
+    catalog.remove(property_id)
+
+def _written(kind: str, rows: List[Dict[str, Any]]):
+    """Bulk ``on_row`` callback: apply the row and keep it for matching"""
+    def on_row(row: Dict[str, Any]) -> None:
+        _apply(kind, row)
+        rows.append(row)
+    return on_row
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    results.sort(key=lambda r: r.index)
+    failed = sum(1 for r in results if r.status in ("invalid", "error", "not_found"))
+    return BulkResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_create_properties(
+    background_tasks: BackgroundTasks,
+    items: List[Dict[str, Any]] = Body(..., description="PropertyCreate objects"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Create many properties at once (agents only).
+
+    Each item is validated on its own and reported in ``results`` by its
+    position; valid items are inserted in chunked multi-row statements.
+    """
+    _require_agent(current_user)
+    _check_batch(items)
+    valid, errors = validate(items, PropertyCreate)
+    db = get_db()
+    written = []
+    results = await create_listings(db, current_user.id, valid, _written("create", written))
+    background_tasks.add_task(record_matches, db, written)
+    return _bulk_response(errors + results)
+
+@router.put("/bulk", response_model=BulkResponse)
+async def bulk_update_properties(
+    background_tasks: BackgroundTasks,
+    items: List[Dict[str, Any]] = Body(..., description="PropertyUpdate objects, each with the listing id"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Update many properties at once (owner only).
+
+    Ownership is checked in the update statement itself: ids that do not
+    exist or belong to someone else come back as ``not_found``.
+    """
+    _check_batch(items)
+    valid, errors = validate(items, BulkPropertyUpdate)
+    db = get_db()
+    written = []
+    results = await update_listings(db, current_user.id, valid, _written("update", written))
+    background_tasks.add_task(record_matches, db, written)
+    return _bulk_response(errors + results)
+
+@router.post("/bulk/deactivate", response_model=BulkResponse)
+async def bulk_deactivate_properties(
+    request: BulkDeactivateRequest,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Soft-delete many properties at once (owner only)"""
+    _check_batch(request.ids)
+    results = await deactivate_listings(get_db(), current_user.id, request.ids, _removed)
+    return _bulk_response(results)
+
+async def _fetch_by_ids(ids: List[str], fields: Fields) -> Dict[str, dict]:
+    """Rows for ``ids`` (inactive ones included), keyed by the id as requested.
+
+    Shared by ``get_property`` and the multi-get so both resolve ids the
+    same way; ids that are not UUIDs cannot exist and are never queried.
+    """
+    canonical: Dict[str, str] = {}
+    for pid in ids:
+        try:
+            canonical[str(uuid.UUID(pid))] = pid
+        except ValueError:
+            continue
+    if not canonical:
+        return {}
+
+    db = get_db()
+    columns = select_columns(fields, extra=["id", "is_active"])
+    keys = list(canonical)
+    results = await asyncio.gather(*(
+        db.table("properties").select(columns).in_("id", keys[i:i + BATCH_QUERY_CHUNK]).execute()
+        for i in range(0, len(keys), BATCH_QUERY_CHUNK)
+    ))
+    return {canonical[row["id"]]: row for result in results for row in result.data}
+
+async def _get_properties_batch(
+    request: Request, ids: List[str], fields: Fields, user: Optional[UserResponse]
+) -> Response:
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} ids per request"
+        )
+    try:
+        rows = await _fetch_by_ids(ids, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch properties: {str(e)}"
         )
+    found, missing, inactive = [], [], []
+    for pid in ids:
+        row = rows.get(pid)
+        if row is None:
+            missing.append(pid)
+        elif not row.get("is_active", True):
+            inactive.append(pid)
+        else:
+            found.append(row)
+    favorites = await _favorites_of(user, fields)
+    flags = None if favorites is None else [row["id"] in favorites for row in found]
+    return cached_json(
+        request,
+        lambda: {"properties": _listing_payload(found, fields, favorites), "missing": missing, "inactive": inactive},
+        etag_for(found, fields, flags, missing, inactive),
+        public=user is None,
+        modified=last_modified(found),
+    )
+
+@router.get("/batch", response_model=PropertyBatchResponse)
+async def get_properties_batch(
+    request: Request,
+    ids: List[str] = Query(..., description="Repeat for each property id; results keep this order"),
+    fields: Fields = Depends(property_fields),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Get several properties by id in one request.
+
+    Active properties come back in the requested order; unknown ids are
+    listed in ``missing`` and deactivated ones in ``inactive``.
+    """
+    return await _get_properties_batch(request, ids, fields, current_user)
+
+@router.post("/batch", response_model=PropertyBatchResponse)
+async def post_properties_batch(
+    request: Request,
+    body: PropertyBatchRequest,
+    fields: Fields = Depends(property_fields),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Same as ``GET /batch``, with the ids in the body (for long id lists)"""
+    return await _get_properties_batch(request, body.ids, fields, current_user)
+
+async def _export(reader: ExportReader, format: ExportFormat, filename: str) -> StreamingResponse:
+    # The first chunk is read before the response starts, so a failing
+    # query still gets a proper error status
+    try:
+        first = await reader.fetch(None)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export properties: {str(e)}"
+        )
+    return StreamingResponse(
+        encode(reader, first, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
+
+@router.get("/export")
+async def export_properties(
+    format: ExportFormat = Query("ndjson"),
+    filters: PropertyFilters = Depends(property_filters),
+    fields: Fields = Depends(property_fields)
+):
+    """Stream every active listing as NDJSON (one listing per line) or CSV.
+
+    Rows are read in keyset chunks of ``EXPORT_CHUNK_SIZE`` and written as
+    they arrive, so memory use does not grow with the catalogue. Accepts
+    the listing filters and ``fields``.
+    """
+    return await _export(ExportReader(get_db(), filters, fields), format, "listings")
+
+@router.get("/user/{user_id}/export")
+async def export_user_properties(
+    user_id: str,
+    format: ExportFormat = Query("ndjson"),
+    filters: PropertyFilters = Depends(property_filters),
+    fields: Fields = Depends(property_fields)
+):
+    """Stream one owner's active listings as NDJSON or CSV"""
+    return await _export(ExportReader(get_db(), filters, fields, owner_id=user_id), format, "listings")
+
+@router.get("/stream")
+async def stream_property_events(
+    request: Request,
+    filters: PropertyFilters = Depends(property_filters),
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id (as the Last-Event-ID header)")
+):
+    """Server-Sent Events feed of listing changes.
+
+    Sends ``create``, ``update`` (data: the listing) and ``deactivate``
+    (data: ``{"id": ...}``) events for listings matching the listing
+    filters before or after the change. A reconnecting ``EventSource``
+    resumes after its ``Last-Event-ID``; when that is too old a ``reset``
+    event asks the client to refetch. Answers 503 when too many streams
+    are open.
+    """
+    return EventStreamResponse(filters, request.headers.get("last-event-id") or last_event_id)
 
 @router.get("/{property_id}", response_model=PropertyResponse)
 async def get_property(
+    request: Request,
     property_id: str,
+    fields: Fields = Depends(property_fields),
     current_user: Optional[UserResponse] = Depends(get_current_user_optional)
 ):
     """Get a specific property by ID"""
-    supabase = get_supabase_client()
-    
     try:
-        result = supabase.table("properties").select("*").eq("id", property_id).eq("is_active", True).execute()
-        if not result.data:
+        row = (await _fetch_by_ids([property_id], fields)).get(property_id)
+        if row is None or not row.get("is_active", True):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Property not found"
             )
         
-        return PropertyResponse(**result.data[0])
+        favorites = await _favorites_of(current_user, fields)
+        return cached_json(
+            request,
+            lambda: _listing_payload([row], fields, favorites)[0],
+            etag_for([row], fields, None if favorites is None else row["id"] in favorites),
+            public=current_user is None,
+            modified=last_modified([row]),
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -82,49 +590,44 @@ async def get_property(
             detail=f"Failed to fetch property: {str(e)}"
         )
 
+@router.get("/{property_id}/similar", response_model=List[PropertyResponse])
+async def get_similar_properties(
+    request: Request,
+    property_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    fields: Fields = Depends(property_fields),
+    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+):
+    """Active listings most like this one (same listing type), most similar first.
+
+    Compares price, size, bedrooms, bathrooms, property type, location and
+    features/amenities through the in-memory similarity index.
+    """
+    _require_catalog()
+    hits = similar_index.similar(property_id, limit)
+    if hits is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property not found"
+        )
+    return await _listings(request, [catalog.rows[pid] for pid, _ in hits], current_user, fields)
+
 @router.post("/", response_model=PropertyResponse)
 async def create_property(
     property_data: PropertyCreate,
+    background_tasks: BackgroundTasks,
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Create a new property (agents only)"""
-    if current_user.user_type != "agent":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only agents can create properties"
-        )
+    _require_agent(current_user)
     
-    supabase = get_supabase_client()
+    db = get_db()
     
     try:
-        result = supabase.table("properties").insert({
-            "title": property_data.title,
-            "description": property_data.description,
-            "address": property_data.address,
-            "price": property_data.price,
-            "bedrooms": property_data.bedrooms,
-            "bathrooms": property_data.bathrooms,
-            "size": property_data.size,
-            "property_type": property_data.property_type,
-            "listing_type": property_data.listing_type,
-            "features": property_data.features,
-            "amenities": property_data.amenities,
-            "images": property_data.images,
-            "lat": property_data.lat,
-            "lng": property_data.lng,
-            "contact_name": property_data.contact_name,
-            "contact_phone": property_data.contact_phone,
-            "contact_email": property_data.contact_email,
-            "owner_id": current_user.id
-        }).execute()
-        
-        if not result.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create property"
-            )
-        
-        return PropertyResponse(**result.data[0])
+        row = await create_listing(db, listing_row(property_data, current_user.id))
+        _apply("create", row)
+        background_tasks.add_task(record_matches, db, [row])
+        return PropertyResponse(**row)
     except HTTPException:
         raise
     except Exception as e:
@@ -137,31 +640,33 @@ async def create_property(
 async def update_property(
     property_id: str,
     property_update: PropertyUpdate,
+    background_tasks: BackgroundTasks,
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Update a property (owner only)"""
-    supabase = get_supabase_client()
+    db = get_db()
     
-    # Check if property exists and user owns it
-    result = supabase.table("properties").select("*").eq("id", property_id).eq("owner_id", current_user.id).execute()
-    if not result.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Property not found or you don't have permission to update it"
-        )
-    
-    # Prepare update data
+    # Prepare update data; moving the listing recomputes its station distances
     update_data = {k: v for k, v in property_update.dict().items() if v is not None}
     
     try:
-        result = supabase.table("properties").update(update_data).eq("id", property_id).execute()
-        if not result.data:
+        stored = None
+        if moves_one_coordinate(update_data):
+            # The other coordinate is the stored one
+            coordinates = await listing_coordinates(db, current_user.id, [property_id])
+            stored = next(iter(coordinates.values()), {})
+        with_transit(update_data, stored)
+        # Ownership is part of the update's filter: no separate lookup
+        row = await update_listing(db, property_id, current_user.id, update_data)
+        if row is None:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update property"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Property not found or you don't have permission to update it"
             )
         
-        return PropertyResponse(**result.data[0])
+        _apply("update", row)
+        background_tasks.add_task(record_matches, db, [row])
+        return PropertyResponse(**row)
     except HTTPException:
         raise
     except Exception as e:
@@ -176,20 +681,19 @@ async def delete_property(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Delete a property (owner only)"""
-    supabase = get_supabase_client()
-    
-    # Check if property exists and user owns it
-    result = supabase.table("properties").select("id").eq("id", property_id).eq("owner_id", current_user.id).execute()
-    if not result.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Property not found or you don't have permission to delete it"
-        )
+    db = get_db()
     
     try:
-        # Soft delete by setting is_active to False
-        supabase.table("properties").update({"is_active": False}).eq("id", property_id).execute()
+        # Soft delete by setting is_active to False, scoped to the owner
+        if not await deactivate_listing(db, property_id, current_user.id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Property not found or you don't have permission to delete it"
+            )
+        _removed(property_id)
         return MessageResponse(message="Property deleted successfully")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -198,16 +702,17 @@ async def delete_property(
 
 @router.get("/user/{user_id}", response_model=List[PropertyResponse])
 async def get_user_properties(
+    request: Request,
     user_id: str,
+    fields: Fields = Depends(property_fields),
     current_user: Optional[UserResponse] = Depends(get_current_user_optional)
 ):
     """Get properties by a specific user"""
-    supabase = get_supabase_client()
+    db = get_db()
     
     try:
-        result = supabase.table("properties").select("*").eq("owner_id", user_id).eq("is_active", True).execute()
-        properties = [PropertyResponse(**prop) for prop in result.data]
-        return properties
+        result = await db.table("properties").select(select_columns(fields)).eq("owner_id", user_id).eq("is_active", True).execute()
+        return await _listings(request, result.data, current_user, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
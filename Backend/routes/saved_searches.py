@@ -0,0 +1,95 @@
+"""
+Saved search routes
+"""
+
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional
+from models import MessageResponse, SavedSearchCreate, SavedSearchResponse, SearchMatchResponse, UserResponse
+from auth import get_current_user
+from database import get_db
+from rest_client import APIError
+from saved_searches import SAVED_SEARCHES_PER_USER, create_search, delete_search, list_matches, list_searches
+from serialization import listing
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Postgres invalid_text_representation: not a valid uuid
+INVALID_TEXT = "22P02"
+
+@router.get("/", response_model=List[SavedSearchResponse])
+async def get_saved_searches(current_user: UserResponse = Depends(get_current_user)):
+    """The current user's saved searches, newest first"""
+    try:
+        return await list_searches(get_db(), current_user.id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch saved searches: {str(e)}"
+        )
+
+@router.post("/", response_model=SavedSearchResponse)
+async def save_search(
+    search: SavedSearchCreate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Save a set of listing filters; new and updated listings matching it are recorded"""
+    try:
+        row = await create_search(
+            get_db(), current_user.id, search.name, search.filters.model_dump(mode="json", exclude_defaults=True)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save search: {str(e)}"
+        )
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {SAVED_SEARCHES_PER_USER} saved searches per user"
+        )
+    return row
+
+@router.get("/matches", response_model=List[SearchMatchResponse])
+async def get_search_matches(
+    search_id: Optional[str] = Query(None, description="Only matches of this saved search"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Active listings that matched the current user's saved searches, most recent first"""
+    try:
+        rows = await list_matches(get_db(), current_user.id, skip, limit, search_id)
+    except APIError as e:
+        if e.code == INVALID_TEXT:
+            return []
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch matches: {e.message}"
+        )
+    return ORJSONResponse([
+        {"search_id": row["search_id"], "matched_at": row["matched_at"], "property": listing(row["property"])}
+        for row in rows
+    ])
+
+@router.delete("/{search_id}", response_model=MessageResponse)
+async def remove_saved_search(
+    search_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Delete a saved search and its recorded matches"""
+    try:
+        removed = await delete_search(get_db(), current_user.id, search_id)
+    except APIError as e:
+        if e.code != INVALID_TEXT:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to delete saved search: {e.message}"
+            )
+        removed = False
+    if not removed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Saved search not found"
+        )
+    return MessageResponse(message="Saved search deleted")
@@ -0,0 +1,18 @@
+"""
+MRT station routes
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from typing import List
+from models import StationResponse
+from transit import STATIONS
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+_STATIONS = [station._asdict() for station in STATIONS]
+
+@router.get("/", response_model=List[StationResponse])
+async def get_stations():
+    """Every MRT station in the bundled gazetteer; ``id`` is what the ``station`` listing filter takes"""
+    return _STATIONS
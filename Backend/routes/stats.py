@@ -0,0 +1,37 @@
+"""
+Market statistics routes
+"""
+
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+from models import ListingType, MarketStatsResponse, PropertyType
+from catalog import catalog
+from market_stats import market_stats
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+@router.get("/", response_model=MarketStatsResponse)
+async def get_market_stats(
+    location: Optional[str] = None,
+    property_type: Optional[PropertyType] = None,
+    listing_type: Optional[ListingType] = None,
+    bedrooms: Optional[int] = Query(None, ge=0)
+):
+    """Listing count and price / price-per-sqft quantiles for a market segment.
+
+    Omitted parameters match any value (bedrooms of 5 or more is the "5+"
+    bucket). Served from sketches kept up to date by the listing write
+    routes; quantiles are within ``relative_accuracy`` of the exact values.
+    """
+    if not catalog.loaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Listing index is not ready yet"
+        )
+    return market_stats.get(
+        location,
+        property_type.value if property_type else None,
+        listing_type.value if listing_type else None,
+        bedrooms
+    )
@@ -4,7 +4,13 @@ User management routes
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from models import UserResponse, UserUpdate, MessageResponse
-from auth import get_current_user
+from auth import get_current_user, invalidate_principal
+from database import get_db
+from favorites import invalidate_favorites
+from catalog import catalog
+from repository import delete_user, listing_ids, update_user
+from routes.properties import _removed
+from saved_searches import match_index
 
 router = APIRouter()
 
@@ -19,12 +25,62 @@ async def update_user_profile(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Update user profile"""
-    # This would update user profile in Supabase
-    # For now, return current user
-    return current_user
+    update_data = {k: v for k, v in user_update.dict().items() if v is not None}
+    if not update_data:
+        return current_user
+
+    db = get_db()
+
+    try:
+        user = await update_user(db, current_user.id, update_data)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to update user profile"
+            )
+
+        return UserResponse(
+            id=user["id"],
+            name=user["name"],
+            email=user["email"],
+            user_type=user["user_type"],
+            phone=user.get("phone"),
+            agent_license=user.get("agent_license"),
+            created_at=user["created_at"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update user profile: {str(e)}"
+        )
+    finally:
+        invalidate_principal(current_user.id)
 
 @router.delete("/profile", response_model=MessageResponse)
 async def delete_user_profile(current_user: UserResponse = Depends(get_current_user)):
-    """Delete user profile"""
-    # This would delete user from Supabase
-    return MessageResponse(message="User profile deleted successfully")
+    """Delete user profile.
+
+    The account's listings go with it (the foreign key cascades), so they
+    are also taken out of this worker's catalogue and indexes, with a
+    deactivate event each, as a listing delete would.
+    """
+    db = get_db()
+
+    try:
+        owned = set(await listing_ids(db, current_user.id))
+        owned.update(pid for pid, row in catalog.rows.items() if row.get("owner_id") == current_user.id)
+        await delete_user(db, current_user.id)
+        for property_id in owned:
+            _removed(property_id)
+        return MessageResponse(message="User profile deleted successfully")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete user profile: {str(e)}"
+        )
+    finally:
+        invalidate_principal(current_user.id)
+        invalidate_favorites(current_user.id)
+        match_index.remove_user(current_user.id)
@@ -0,0 +1,529 @@
+"""
+Saved searches and the match engine for new and updated listings
+
+A saved search is a user's ``PropertyFilters``. When a listing is created
+or updated, ``match_index.match(row)`` finds the searches it satisfies
+without looking at the others:
+
+- searches are partitioned by property type and listing type (a search
+  without one goes in that dimension's wildcard partition) and, inside a
+  partition, by bedroom band, so a listing only visits the partitions it
+  can match;
+- each partition keeps its searches' price ranges in centered interval
+  trees, so a stabbing query at the listing's price returns just the
+  searches whose range contains it, in O(log n + k);
+- the remaining predicates (bedrooms past ``BEDROOM_CAP``, bathrooms,
+  size, locations, transit, text) are checked on those candidates only,
+  over NumPy columns.
+
+A write therefore costs roughly O(matching searches), not O(all
+searches). Partitions take new searches through a small buffer that
+becomes a tree when full, and trees of similar size are merged (the
+logarithmic method), so adding a search never rebuilds a large tree.
+Deleted searches are tombstoned and dropped at the next merge.
+"""
+
+import os
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from database import Database
+from filters import SEARCH_COLUMNS
+from rest_client import APIError
+from transit import near_station
+
+SAVED_SEARCHES_PER_USER = int(os.getenv("SAVED_SEARCHES_PER_USER", "25"))
+SAVED_SEARCH_LOAD_CHUNK = int(os.getenv("SAVED_SEARCH_LOAD_CHUNK", "5000"))
+MATCH_INSERT_CHUNK = 1000
+
+# Postgres foreign_key_violation
+FOREIGN_KEY_VIOLATION = "23503"
+
+# Bedroom bands are clamped here; counts above it share the top band
+BEDROOM_CAP = 6
+# Searches buffered per partition before they are built into a tree
+BUFFER_SIZE = 256
+# Intervals per tree leaf (scanned with one vectorised comparison)
+LEAF_SIZE = 64
+
+# Numeric bounds kept per search; absent bounds are -inf / +inf
+_BOUNDS = ("price", "bedrooms", "bathrooms", "size")
+
+_Node = Tuple[Any, ...]
+
+
+def _build(lo: np.ndarray, hi: np.ndarray, idx: np.ndarray) -> Optional[_Node]:
+    """Centered interval tree over ``[lo, hi]`` intervals labelled ``idx``.
+
+    Inner nodes are ``(center, lo ascending, idx by lo, -hi ascending,
+    idx by hi, left, right)`` holding the intervals that contain
+    ``center``; leaves are ``(None, lo, hi, idx)``.
+    """
+    if not len(idx):
+        return None
+    if len(idx) <= LEAF_SIZE:
+        return (None, lo, hi, idx)
+    ends = np.concatenate((lo, hi))
+    finite = ends[np.isfinite(ends)]
+    center = float(np.median(finite)) if len(finite) else 0.0
+    left = hi < center
+    right = lo > center
+    mid = ~(left | right)
+    by_lo = np.argsort(lo[mid], kind="stable")
+    by_hi = np.argsort(-hi[mid], kind="stable")
+    return (
+        center,
+        lo[mid][by_lo], idx[mid][by_lo],
+        -hi[mid][by_hi], idx[mid][by_hi],
+        _build(lo[left], hi[left], idx[left]),
+        _build(lo[right], hi[right], idx[right]),
+    )
+
+
+def _stab(node: Optional[_Node], point: float, out: List[np.ndarray]) -> None:
+    """Append the labels of every interval containing ``point`` to ``out``"""
+    while node is not None:
+        center = node[0]
+        if center is None:
+            hit = (node[1] <= point) & (node[2] >= point)
+            if hit.any():
+                out.append(node[3][hit])
+            return
+        if point < center:
+            k = np.searchsorted(node[1], point, side="right")
+            if k:
+                out.append(node[2][:k])
+            node = node[5]
+        elif point > center:
+            k = np.searchsorted(node[3], -point, side="right")
+            if k:
+                out.append(node[4][:k])
+            node = node[6]
+        else:
+            out.append(node[2])
+            return
+
+
+class _IntervalSet:
+    """Price intervals of one partition: a write buffer plus merged trees"""
+
+    def __init__(self):
+        self.buffer: List[Tuple[float, float, int]] = []
+        # (lo, hi, idx, root), largest first
+        self.trees: List[Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[_Node]]] = []
+
+    def __len__(self) -> int:
+        return len(self.buffer) + sum(len(t[2]) for t in self.trees)
+
+    def add(self, lo: float, hi: float, idx: int, alive: np.ndarray) -> None:
+        self.buffer.append((lo, hi, idx))
+        if len(self.buffer) >= BUFFER_SIZE:
+            lows, highs, labels = (np.array(column) for column in zip(*self.buffer))
+            self.buffer = []
+            self._push(lows.astype(np.float64), highs.astype(np.float64), labels.astype(np.int64), alive)
+
+    def bulk(self, lo: np.ndarray, hi: np.ndarray, idx: np.ndarray) -> None:
+        self.trees = [(lo, hi, idx, _build(lo, hi, idx))]
+        self.buffer = []
+
+    def _push(self, lo: np.ndarray, hi: np.ndarray, idx: np.ndarray, alive: np.ndarray) -> None:
+        self.trees.append((lo, hi, idx, _build(lo, hi, idx)))
+        while len(self.trees) >= 2 and len(self.trees[-2][2]) <= 2 * len(self.trees[-1][2]):
+            a, b = self.trees.pop(), self.trees.pop()
+            lo = np.concatenate((b[0], a[0]))
+            hi = np.concatenate((b[1], a[1]))
+            idx = np.concatenate((b[2], a[2]))
+            keep = alive[idx]
+            lo, hi, idx = lo[keep], hi[keep], idx[keep]
+            self.trees.append((lo, hi, idx, _build(lo, hi, idx)))
+
+    def stab(self, point: float, out: List[np.ndarray]) -> None:
+        for tree in self.trees:
+            _stab(tree[3], point, out)
+        if self.buffer:
+            hits = [idx for lo, hi, idx in self.buffer if lo <= point <= hi]
+            if hits:
+                out.append(np.array(hits, dtype=np.int64))
+
+
+def _band(low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+    lo = min(int(low), BEDROOM_CAP) if low is not None else 0
+    hi = min(int(high), BEDROOM_CAP) if high is not None else BEDROOM_CAP
+    return lo, hi
+
+
+def _uuid_words(value: str) -> Tuple[int, int]:
+    """A UUID as two 64-bit words (a row of the id columns)"""
+    return divmod(int(str(value).replace("-", ""), 16), 1 << 64)
+
+
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# Where the 32 hex digits go in the 36-character form
+_DIGITS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+def _uuid_strs(words: np.ndarray) -> List[str]:
+    """Canonical UUID strings for rows of an id column, formatted in one pass"""
+    raw = words.astype(">u8").view(np.uint8).reshape(-1, 16)
+    chars = np.full((len(raw), 36), ord("-"), dtype=np.uint8)
+    chars[:, _DIGITS] = np.stack((_HEX[raw >> 4], _HEX[raw & 15]), axis=2).reshape(-1, 32)
+    text = chars.tobytes().decode("ascii")
+    return [text[i:i + 36] for i in range(0, len(text), 36)]
+
+
+class _Parsed:
+    """One search's index entry, before it is given a slot"""
+
+    __slots__ = ("search_id", "user_id", "bounds", "locations", "text", "transit", "keys")
+
+    def __init__(self, row: Dict[str, Any]):
+        filters = row["filters"]
+        if isinstance(filters, BaseModel):
+            filters = filters.model_dump(mode="json")
+        get = filters.get
+        self.search_id = _uuid_words(row["id"])
+        self.user_id = _uuid_words(row["user_id"])
+        self.bounds = [
+            (-np.inf if get(f"min_{name}") is None else float(get(f"min_{name}")),
+             np.inf if get(f"max_{name}") is None else float(get(f"max_{name}")))
+            for name in _BOUNDS
+        ]
+        self.locations = frozenset(get("locations")) if get("locations") else None
+        self.text = get("search").lower() if get("search") else None
+        has_transit = get("station") or get("max_station_distance") is not None
+        self.transit = (get("station"), get("max_station_distance")) if has_transit else None
+        band = _band(get("min_bedrooms"), get("max_bedrooms"))
+        if self.bounds[0][0] > self.bounds[0][1] or band[0] > band[1]:
+            self.keys = []  # an empty range: matches nothing, so not indexed
+        else:
+            listing_type = get("listing_type")
+            self.keys = [((t, listing_type), band) for t in get("property_types") or [None]]
+
+
+class MatchIndex:
+    """Predicate index over every saved search, queried with one listing at a time"""
+
+    def __init__(self):
+        self.loaded = False
+        self._clear(0)
+
+    def _clear(self, capacity: int) -> None:
+        capacity = max(capacity, 1024)
+        self.size = 0
+        self.live = 0
+        self.search_ids = np.zeros((capacity, 2), dtype=np.uint64)
+        self.user_ids = np.zeros((capacity, 2), dtype=np.uint64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.low = {name: np.full(capacity, -np.inf) for name in _BOUNDS}
+        self.high = {name: np.full(capacity, np.inf) for name in _BOUNDS}
+        # Location sets as bitmasks over the first 64 location names seen
+        self.location_bits: Dict[str, int] = {}
+        self.location_mask = np.zeros(capacity, dtype=np.uint64)
+        # Rare predicates (text, uncommon locations, transit), checked one by one
+        self.rare = np.zeros(capacity, dtype=bool)
+        self.locations: Dict[int, frozenset] = {}
+        self.text: Dict[int, str] = {}
+        self.transit: Dict[int, Tuple[Optional[str], Optional[int]]] = {}
+        # (property_type, listing_type) -> bedroom band -> price intervals
+        self.partitions: Dict[Tuple[Optional[str], Optional[str]], Dict[Tuple[int, int], _IntervalSet]] = {}
+
+    def __len__(self) -> int:
+        return self.live
+
+    def _grow(self) -> None:
+        extra = len(self.alive)
+        self.search_ids = np.concatenate((self.search_ids, np.zeros((extra, 2), dtype=np.uint64)))
+        self.user_ids = np.concatenate((self.user_ids, np.zeros((extra, 2), dtype=np.uint64)))
+        self.alive = np.concatenate((self.alive, np.zeros(extra, dtype=bool)))
+        self.rare = np.concatenate((self.rare, np.zeros(extra, dtype=bool)))
+        self.location_mask = np.concatenate((self.location_mask, np.zeros(extra, dtype=np.uint64)))
+        for name in _BOUNDS:
+            self.low[name] = np.concatenate((self.low[name], np.full(extra, -np.inf)))
+            self.high[name] = np.concatenate((self.high[name], np.full(extra, np.inf)))
+
+    def _rare(self, i: int, entry: _Parsed) -> None:
+        if entry.locations is not None:
+            for name in entry.locations:
+                if name not in self.location_bits and len(self.location_bits) < 64:
+                    self.location_bits[name] = len(self.location_bits)
+            if all(name in self.location_bits for name in entry.locations):
+                mask = 0
+                for name in entry.locations:
+                    mask |= 1 << self.location_bits[name]
+                self.location_mask[i] = mask
+            else:
+                self.locations[i] = entry.locations
+        if entry.text is not None:
+            self.text[i] = entry.text
+        if entry.transit is not None:
+            self.transit[i] = entry.transit
+        self.rare[i] = i in self.locations or i in self.text or i in self.transit
+
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Rebuild from every saved search (``id``, ``user_id``, ``filters`` rows)"""
+        entries = [_Parsed(row) for row in rows]
+        n = len(entries)
+        self._clear(n)
+        if n:
+            self.search_ids[:n] = [e.search_id for e in entries]
+            self.user_ids[:n] = [e.user_id for e in entries]
+            bounds = np.array([e.bounds for e in entries], dtype=np.float64)
+            for k, name in enumerate(_BOUNDS):
+                self.low[name][:n] = bounds[:, k, 0]
+                self.high[name][:n] = bounds[:, k, 1]
+        self.alive[:n] = True
+        self.size = self.live = n
+        grouped: Dict[Tuple[Any, Tuple[int, int]], List[int]] = {}
+        for i, entry in enumerate(entries):
+            if entry.locations is not None or entry.text is not None or entry.transit is not None:
+                self._rare(i, entry)
+            for key in entry.keys:
+                grouped.setdefault(key, []).append(i)
+        for (partition, band), slots in grouped.items():
+            idx = np.array(slots, dtype=np.int64)
+            intervals = _IntervalSet()
+            intervals.bulk(self.low["price"][idx], self.high["price"][idx], idx)
+            self.partitions.setdefault(partition, {})[band] = intervals
+        self.loaded = True
+
+    def add(self, row: Dict[str, Any]) -> int:
+        """Index one search; returns its slot"""
+        entry = _Parsed(row)
+        if self.size == len(self.alive):
+            self._grow()
+        i = self.size
+        self.size += 1
+        self.live += 1
+        self.search_ids[i] = entry.search_id
+        self.user_ids[i] = entry.user_id
+        self.alive[i] = True
+        for name, (low, high) in zip(_BOUNDS, entry.bounds):
+            self.low[name][i] = low
+            self.high[name][i] = high
+        self._rare(i, entry)
+        for partition, band in entry.keys:
+            bands = self.partitions.setdefault(partition, {})
+            intervals = bands.get(band)
+            if intervals is None:
+                intervals = bands[band] = _IntervalSet()
+            intervals.add(self.low["price"][i], self.high["price"][i], i, self.alive)
+        return i
+
+    def _drop(self, mask: np.ndarray) -> None:
+        for i in np.flatnonzero(mask & self.alive[: self.size]).tolist():
+            self.discard(i)
+
+    def discard(self, i: int) -> None:
+        """Drop the search in slot ``i``"""
+        if not self.alive[i]:
+            return
+        self.alive[i] = False
+        self.rare[i] = False
+        self.location_mask[i] = 0
+        self.live -= 1
+        self.locations.pop(i, None)
+        self.text.pop(i, None)
+        self.transit.pop(i, None)
+
+    def remove(self, search_id: str) -> None:
+        self._drop((self.search_ids[: self.size] == _uuid_words(search_id)).all(axis=1))
+
+    def remove_user(self, user_id: str) -> None:
+        """Drop every search of a deleted account"""
+        self._drop((self.user_ids[: self.size] == _uuid_words(user_id)).all(axis=1))
+
+    def candidates(self, row: Dict[str, Any]) -> np.ndarray:
+        """Slots of the searches whose type, listing type, bedroom band and price admit ``row``"""
+        price = row.get("price")
+        if price is None:
+            return np.zeros(0, dtype=np.int64)
+        bedrooms = min(int(row.get("bedrooms") or 0), BEDROOM_CAP)
+        out: List[np.ndarray] = []
+        for property_type in (row.get("property_type"), None):
+            for listing_type in (row.get("listing_type"), None):
+                bands = self.partitions.get((property_type, listing_type))
+                if not bands:
+                    continue
+                for (low, high), intervals in bands.items():
+                    if low <= bedrooms <= high:
+                        intervals.stab(float(price), out)
+        if not out:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(out)
+
+    def match(self, row: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """``(search_id, user_id)`` of every saved search ``row`` satisfies.
+
+        Same semantics as ``filters.matches``; searches saved by the
+        listing's owner are skipped.
+        """
+        slots = self.match_slots(row)
+        return list(zip(_uuid_strs(self.search_ids[slots]), _uuid_strs(self.user_ids[slots])))
+
+    def match_slots(self, row: Dict[str, Any]) -> np.ndarray:
+        """Slots of the searches ``row`` satisfies (``match`` without the id formatting)"""
+        slots = self.candidates(row)
+        slots = slots[self.alive[slots]]
+        keep = np.ones(len(slots), dtype=bool)
+        for name in ("bedrooms", "bathrooms", "size"):
+            value = row.get(name)
+            low, high = self.low[name][slots], self.high[name][slots]
+            if value is None:
+                keep &= np.isneginf(low) & np.isposinf(high)
+            else:
+                keep &= (low <= value) & (high >= value)
+        if row.get("owner_id"):
+            keep &= (self.user_ids[slots] != _uuid_words(row["owner_id"])).any(axis=1)
+
+        location = row.get("location")
+        masks = self.location_mask[slots]
+        bit = self.location_bits.get(location)
+        if bit is None:
+            keep &= masks == 0
+        else:
+            keep &= (masks == 0) | ((masks & np.uint64(1 << bit)) != 0)
+
+        # Text, uncommon locations and transit: only the few candidates that use them
+        haystacks = [(row.get(column) or "").lower() for column in SEARCH_COLUMNS]
+        contains: Dict[str, bool] = {}
+        for k in np.flatnonzero(keep & self.rare[slots]).tolist():
+            i = int(slots[k])
+            wanted = self.locations.get(i)
+            if wanted is not None and location not in wanted:
+                keep[k] = False
+                continue
+            transit = self.transit.get(i)
+            if transit is not None and not near_station(row, *transit):
+                keep[k] = False
+                continue
+            needle = self.text.get(i)
+            if needle is not None:
+                if needle not in contains:
+                    contains[needle] = any(needle in text for text in haystacks)
+                keep[k] = contains[needle]
+
+        return slots[keep]
+
+    def stats(self) -> Dict[str, Any]:
+        sets = [s for bands in self.partitions.values() for s in bands.values()]
+        return {
+            "loaded": self.loaded,
+            "searches": self.live,
+            "partitions": len(sets),
+            "trees": sum(len(s.trees) for s in sets),
+            "buffered": sum(len(s.buffer) for s in sets),
+        }
+
+    async def load(self, db: Database) -> int:
+        """Replace the index with every saved search, fetched in keyset chunks by id"""
+        rows: List[Dict[str, Any]] = []
+        last = None
+        while True:
+            query = db.table("saved_searches").select("id,user_id,filters").order("id")
+            if last is not None:
+                query = query.gt("id", last)
+            result = await query.limit(SAVED_SEARCH_LOAD_CHUNK).execute()
+            rows.extend(result.data)
+            if len(result.data) < SAVED_SEARCH_LOAD_CHUNK:
+                break
+            last = result.data[-1]["id"]
+        self.reset(rows)
+        return len(rows)
+
+
+match_index = MatchIndex()
+
+
+# Storage
+async def list_searches(db: Database, user_id: str) -> List[Dict[str, Any]]:
+    result = await (
+        db.table("saved_searches").select("id,name,filters,created_at")
+        .eq("user_id", user_id).order("created_at", desc=True).execute()
+    )
+    return result.data
+
+
+async def create_search(db: Database, user_id: str, name: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Save a search and index it; None when the user is at ``SAVED_SEARCHES_PER_USER``.
+
+    The cap is checked by the ``create_saved_search`` database function in
+    the same transaction as the insert, so concurrent requests cannot
+    overshoot it (``db.transaction()`` is not atomic over PostgREST).
+    """
+    result = await db.rpc("create_saved_search", {
+        "p_user_id": user_id, "p_name": name, "p_filters": filters, "p_limit": SAVED_SEARCHES_PER_USER,
+    }).execute()
+    if not result.data:
+        return None
+    row = result.data[0]
+    match_index.add(row)
+    return row
+
+
+async def delete_search(db: Database, user_id: str, search_id: str) -> bool:
+    result = await (
+        db.table("saved_searches").delete()
+        .eq("id", search_id).eq("user_id", user_id).select("id").execute()
+    )
+    if result.data:
+        match_index.remove(search_id)
+    return bool(result.data)
+
+
+async def list_matches(
+    db: Database, user_id: str, skip: int, limit: int, search_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Recorded matches on active listings, most recent first (listing embedded)"""
+    query = (
+        db.table("search_matches")
+        .select("search_id,matched_at,property:properties!inner(*)")
+        .eq("user_id", user_id)
+        .eq("property.is_active", True)
+    )
+    if search_id:
+        query = query.eq("search_id", search_id)
+    result = await query.order("matched_at", desc=True).range(skip, skip + limit - 1).execute()
+    return result.data
+
+
+async def record_matches(db: Database, rows: Iterable[Dict[str, Any]]) -> int:
+    """Match written listings against every saved search and store the hits.
+
+    Runs after the response (as a background task): a failure here must
+    not fail the listing write. Failed inserts still show up in the
+    ``db_errors_total`` metric.
+    """
+    if not match_index.loaded:
+        return 0
+    found = []
+    for row in rows:
+        if row.get("is_active", True):
+            found.extend(
+                {"search_id": search_id, "user_id": user_id, "property_id": row["id"]}
+                for search_id, user_id in match_index.match(row)
+            )
+    recorded = 0
+    for i in range(0, len(found), MATCH_INSERT_CHUNK):
+        chunk = found[i:i + MATCH_INSERT_CHUNK]
+        try:
+            recorded += await _store_matches(db, chunk)
+        except APIError as e:
+            if e.code != FOREIGN_KEY_VIOLATION:
+                continue
+            # A search deleted through another worker (the index catches up
+            # at the next refresh): store the rest of the chunk row by row
+            for match in chunk:
+                try:
+                    recorded += await _store_matches(db, [match])
+                except APIError:
+                    pass
+    return recorded
+
+
+async def _store_matches(db: Database, matches: List[Dict[str, Any]]) -> int:
+    # Re-matching on update keeps the first matched_at
+    await db.table("search_matches").upsert(matches, on_conflict="search_id,property_id").execute()
+    return len(matches)
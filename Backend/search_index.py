@@ -0,0 +1,235 @@
+"""
+In-memory full-text index over listings
+
+Tokenized inverted index over title, description, address, location,
+features and amenities with BM25 ranking. Query terms are expanded to
+indexed terms by prefix (for the last, still-being-typed word) and by a
+single edit (so "tampnes" or "serangon" still find the right estate),
+with expansions scored slightly below exact hits. Kept up to date through
+the listing catalogue.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Container, Dict, Iterable, List, Optional, Set, Tuple
+
+# Field weights (BM25F-style: weighted term frequencies, one length norm)
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "location": 2.5,
+    "address": 2.0,
+    "features": 1.5,
+    "amenities": 1.5,
+    "description": 1.0,
+}
+
+K1 = 1.2
+B = 0.75
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+MIN_FUZZY_LENGTH = 4
+MAX_PREFIX_EXPANSIONS = 50
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _deletes(term: str) -> Set[str]:
+    """All variants of ``term`` with one character removed"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True when a and b differ by at most one insert, delete, substitute or swap"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def _document_terms(row: Dict[str, Any]) -> Dict[str, float]:
+    weighted: Dict[str, float] = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS.items():
+        value = row.get(field)
+        if not value:
+            continue
+        text = " ".join(value) if isinstance(value, list) else str(value)
+        for token in tokenize(text):
+            weighted[token] += weight
+    return weighted
+
+
+class SearchIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._total_len = 0.0
+        # Deletion neighbourhood: one-char-deleted variant -> indexed terms
+        self._deletes: Dict[str, Set[str]] = defaultdict(set)
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    # Catalogue listener interface
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for row in rows:
+            self._add(row)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        self.remove(row["id"])
+        self._add(row)
+
+    def remove(self, property_id: str) -> None:
+        terms = self._doc_terms.pop(property_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(property_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[property_id]
+            if not postings:
+                del self._postings[term]
+                self._forget_term(term)
+
+    def _add(self, row: Dict[str, Any]) -> None:
+        doc_id = row["id"]
+        terms = _document_terms(row)
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._learn_term(term)
+            postings[doc_id] = tf
+
+    def _learn_term(self, term: str) -> None:
+        self._vocab_dirty = True
+        if len(term) >= MIN_FUZZY_LENGTH - 1:
+            for variant in _deletes(term):
+                self._deletes[variant].add(term)
+
+    def _forget_term(self, term: str) -> None:
+        self._vocab_dirty = True
+        if len(term) >= MIN_FUZZY_LENGTH - 1:
+            for variant in _deletes(term):
+                bucket = self._deletes.get(variant)
+                if bucket is not None:
+                    bucket.discard(term)
+                    if not bucket:
+                        del self._deletes[variant]
+
+    # Query term expansion
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        start = bisect_left(self._vocab, prefix)
+        found = []
+        for term in self._vocab[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            found.append(term)
+        return found
+
+    def _fuzzy_terms(self, token: str) -> Set[str]:
+        if len(token) < MIN_FUZZY_LENGTH:
+            return set()
+        candidates: Set[str] = set(self._deletes.get(token, ()))
+        for variant in _deletes(token):
+            if variant in self._postings:
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))
+        return {term for term in candidates if term != token and _within_one_edit(token, term)}
+
+    def expand(self, token: str, is_last: bool) -> Dict[str, float]:
+        """Indexed terms matching ``token`` with their score weights"""
+        expansions: Dict[str, float] = {}
+        if token in self._postings:
+            expansions[token] = EXACT_WEIGHT
+        if is_last:
+            for term in self._prefix_terms(token):
+                expansions.setdefault(term, PREFIX_WEIGHT)
+        for term in self._fuzzy_terms(token):
+            expansions.setdefault(term, FUZZY_WEIGHT)
+        return expansions
+
+    # Ranking
+    def search(self, query: str, limit: int = 20, candidates: Optional[Container[str]] = None) -> List[Tuple[str, float]]:
+        """Return ``(property_id, score)`` pairs, best first.
+
+        Every query token must match (exactly, by prefix or by one edit).
+        ``candidates`` optionally restricts results to a set of ids (any
+        container supporting ``in``).
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self._doc_len:
+            return []
+
+        n_docs = len(self._doc_len)
+        avg_len = self._total_len / n_docs
+        scores: Optional[Dict[str, float]] = None
+
+        # Rarest tokens first keeps the running intersection small
+        expanded = [self.expand(token, i == len(tokens) - 1) for i, token in enumerate(tokens)]
+        order = sorted(range(len(tokens)), key=lambda i: sum(len(self._postings[t]) for t in expanded[i]))
+
+        for i in order:
+            token_scores: Dict[str, float] = {}
+            for term, weight in expanded[i].items():
+                postings = self._postings[term]
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                # Walk whichever side is smaller: the postings list, or the
+                # documents that survived the previous tokens
+                if scores is not None and len(scores) < df:
+                    pairs = ((doc_id, postings[doc_id]) for doc_id in scores if doc_id in postings)
+                else:
+                    pairs = postings.items()
+                for doc_id, tf in pairs:
+                    if scores is not None and doc_id not in scores:
+                        continue
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+                    norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * self._doc_len[doc_id] / avg_len))
+                    score = weight * idf * norm
+                    # A token counts once per document: keep its best expansion
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: scores[doc_id] + s for doc_id, s in token_scores.items()}
+            if not scores:
+                return []
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+
+search_index = SearchIndex()
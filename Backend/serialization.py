@@ -0,0 +1,38 @@
+"""
+Trusted-data fast path for listing responses
+
+Rows read from our own database (directly or through the listing
+catalogue, which is loaded from it) already satisfy ``PropertyResponse``,
+so read endpoints skip building a model per row and FastAPI's second
+validation pass against ``response_model``. ``listing`` copies exactly the
+response fields and the result is encoded with orjson through
+``ORJSONResponse``. ``response_model`` stays on the routes for the OpenAPI
+schema; writes still go through the models.
+"""
+
+from typing import Any, Dict, Iterable, List
+
+from models import PropertyResponse
+
+RESPONSE_FIELDS = tuple(PropertyResponse.model_fields)
+
+# TEXT[] columns may come back NULL; the response model declares lists
+_LIST_FIELDS = ("features", "amenities", "images")
+_DEFAULTS = {
+    name: field.default
+    for name, field in PropertyResponse.model_fields.items()
+    if not field.is_required()
+}
+
+
+def listing(row: Dict[str, Any]) -> Dict[str, Any]:
+    """``PropertyResponse``-shaped dict for a trusted listing row"""
+    out = {name: row.get(name, _DEFAULTS.get(name)) for name in RESPONSE_FIELDS}
+    for name in _LIST_FIELDS:
+        if out[name] is None:
+            out[name] = []
+    return out
+
+
+def listings(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [listing(row) for row in rows]
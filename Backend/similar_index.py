@@ -0,0 +1,321 @@
+"""
+Feature vectors of active listings for "similar listings"
+
+Every active listing is encoded as a fixed-length float32 vector:
+
+- price (log, standardized per listing type, since rents and sale prices
+  live on different scales), size (log), bedrooms and bathrooms, each
+  standardized over the catalogue;
+- position in km from the catalogue's centre, scaled by ``GEO_SCALE_KM``;
+- property type, one-hot;
+- features and amenities, multi-hot over the ``TAG_VOCABULARY`` most
+  common tags, scaled to unit length;
+
+each multiplied by its ``WEIGHTS`` entry. Similarity is the (negated)
+Euclidean distance between vectors, among listings of the same listing
+type. The vectors sit in one matrix, so a query is one matrix-vector
+product plus a partial sort; past ``SIMILAR_ANN_MIN_LISTINGS`` the rows
+are also bucketed by k-means centroid and a query only scores the
+buckets of the ``SIMILAR_ANN_PROBES`` nearest centroids.
+
+Kept current through the listing catalogue: written rows are re-encoded
+in place with the scaling of the last full rebuild, which happens on
+every catalogue reload.
+"""
+
+import math
+import os
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from snapshot import LISTING_TYPES, PROPERTY_TYPES
+
+SIMILAR_ANN_MIN_LISTINGS = int(os.getenv("SIMILAR_ANN_MIN_LISTINGS", "150000"))
+SIMILAR_ANN_PROBES = int(os.getenv("SIMILAR_ANN_PROBES", "12"))
+
+TAG_VOCABULARY = 64
+GEO_SCALE_KM = 5.0
+KM_PER_DEG = 111.32
+
+WEIGHTS = {
+    "price": 2.0,
+    "size": 1.0,
+    "bedrooms": 1.0,
+    "bathrooms": 0.5,
+    "geo": 1.0,
+    "property_type": 1.0,
+    "tags": 1.0,
+}
+
+# Vector layout
+_PRICE, _SIZE, _BEDROOMS, _BATHROOMS, _NORTH, _EAST = range(6)
+_TYPES = 6
+_TAGS = _TYPES + len(PROPERTY_TYPES)
+DIMENSIONS = _TAGS + TAG_VOCABULARY
+
+INITIAL_CAPACITY = 1024
+# k-means over a sample: enough rows per centroid, bounded build time
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_CENTROID = 40
+ASSIGN_CHUNK = 8192
+
+
+def _raw_tags(row: Dict[str, Any]) -> Iterator[str]:
+    return chain(row.get("features") or (), row.get("amenities") or ())
+
+
+def _standardize(values: np.ndarray) -> Tuple[float, float]:
+    if not len(values):
+        return 0.0, 1.0
+    std = float(values.std())
+    return float(values.mean()), std if std > 1e-9 else 1.0
+
+
+class _Scaling:
+    """Centre and spread of each numeric input, fitted on a full catalogue"""
+
+    def __init__(self, rows: Sequence[Dict[str, Any]] = ()):
+        listing_types = np.array([LISTING_TYPES.index(r["listing_type"]) for r in rows], dtype=np.int8)
+        prices = np.log1p(np.array([float(r["price"]) for r in rows]))
+        self.price = [_standardize(prices[listing_types == code]) for code in range(len(LISTING_TYPES))]
+        self.size = _standardize(np.log1p(np.array([float(r["size"]) for r in rows])))
+        self.bedrooms = _standardize(np.array([float(r["bedrooms"]) for r in rows]))
+        self.bathrooms = _standardize(np.array([float(r["bathrooms"]) for r in rows]))
+        coords = np.array([(r["lat"], r["lng"]) for r in rows if r.get("lat") is not None and r.get("lng") is not None])
+        self.lat, self.lng = coords.mean(axis=0) if len(coords) else (0.0, 0.0)
+        self.km_per_deg_lng = KM_PER_DEG * math.cos(math.radians(self.lat))
+
+
+class _Buckets:
+    """k-means buckets over the vectors: an inverted-file approximate index"""
+
+    def __init__(self, vectors: np.ndarray, slots: np.ndarray, capacity: int):
+        count = max(1, int(math.sqrt(len(slots))))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(slots, min(len(slots), count * KMEANS_SAMPLE_PER_CENTROID), replace=False)]
+        centroids = sample[rng.choice(len(sample), count, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = self._nearest(centroids, sample)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            sizes = np.bincount(nearest, minlength=count)
+            filled = sizes > 0
+            centroids[filled] = sums[filled] / sizes[filled, None]
+        self.centroids = centroids
+        self.centroid_norms = (centroids ** 2).sum(axis=1)
+        self.assigned = np.full(capacity, -1, dtype=np.int32)
+        for start in range(0, len(slots), ASSIGN_CHUNK):
+            chunk = slots[start:start + ASSIGN_CHUNK]
+            self.assigned[chunk] = self._nearest(centroids, vectors[chunk])
+        order = slots[np.argsort(self.assigned[slots], kind="stable")]
+        bounds = np.searchsorted(self.assigned[order], np.arange(count + 1))
+        self.members = [order[bounds[c]:bounds[c + 1]] for c in range(count)]
+        # Slots (re)assigned since the build; stale entries are filtered by ``assigned``
+        self.added: List[List[int]] = [[] for _ in range(count)]
+
+    @staticmethod
+    def _nearest(centroids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        distances = (centroids ** 2).sum(axis=1)[None, :] - 2 * vectors @ centroids.T
+        return distances.argmin(axis=1).astype(np.int32)
+
+    def grow(self, capacity: int) -> None:
+        assigned = np.full(capacity, -1, dtype=np.int32)
+        assigned[:len(self.assigned)] = self.assigned
+        self.assigned = assigned
+
+    def assign(self, slot: int, vector: np.ndarray) -> None:
+        bucket = int(np.argmin(self.centroid_norms - 2 * self.centroids @ vector))
+        if self.assigned[slot] != bucket:
+            self.assigned[slot] = bucket
+            self.added[bucket].append(slot)
+
+    def candidates(self, vector: np.ndarray, probes: int) -> np.ndarray:
+        distances = self.centroid_norms - 2 * self.centroids @ vector
+        probes = min(probes, len(distances))
+        buckets = np.argpartition(distances, probes - 1)[:probes]
+        parts = []
+        for bucket in buckets.tolist():
+            parts.append(self.members[bucket])
+            if self.added[bucket]:
+                parts.append(np.array(self.added[bucket], dtype=np.int64))
+        slots = np.unique(np.concatenate(parts))
+        return slots[np.isin(self.assigned[slots], buckets)]
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self._capacity = 0
+        self._size = 0
+        self.vectors = np.zeros((0, DIMENSIONS), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+        # Listing type code per slot, -1 for removed slots
+        self.listing_type = np.zeros(0, dtype=np.int8)
+        self._ids: List[Optional[str]] = []
+        self._index: Dict[str, int] = {}
+        self._tags: Dict[str, int] = {}
+        # Column per tag as written (None: not in the vocabulary)
+        self._raw_columns: Dict[str, Optional[int]] = {}
+        self._scaling = _Scaling()
+        self._buckets: Optional[_Buckets] = None
+        self._grow(INITIAL_CAPACITY)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _grow(self, capacity: int) -> None:
+        vectors = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+        vectors[:self._size] = self.vectors[:self._size]
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[:self._size] = self.norms[:self._size]
+        listing_type = np.full(capacity, -1, dtype=np.int8)
+        listing_type[:self._size] = self.listing_type[:self._size]
+        self.vectors, self.norms, self.listing_type = vectors, norms, listing_type
+        if self._buckets is not None:
+            self._buckets.grow(capacity)
+        self._capacity = capacity
+
+    def encode(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Feature vectors of ``rows`` (one per row) with the current scaling"""
+        s = self._scaling
+        out = np.zeros((len(rows), DIMENSIONS), dtype=np.float32)
+        if not rows:
+            return out
+        numbers = np.array(
+            [(r["price"], r["size"], r["bedrooms"], r["bathrooms"],
+              np.nan if r.get("lat") is None else r["lat"], np.nan if r.get("lng") is None else r["lng"])
+             for r in rows],
+            dtype=np.float64,
+        )
+        listing_types = np.array([LISTING_TYPES.index(r["listing_type"]) for r in rows])
+        property_types = np.array([PROPERTY_TYPES.index(r["property_type"]) for r in rows])
+
+        price_mean, price_std = (np.array(v)[listing_types] for v in zip(*s.price))
+        out[:, _PRICE] = (np.log1p(numbers[:, 0]) - price_mean) / price_std * WEIGHTS["price"]
+        out[:, _SIZE] = (np.log1p(numbers[:, 1]) - s.size[0]) / s.size[1] * WEIGHTS["size"]
+        out[:, _BEDROOMS] = (numbers[:, 2] - s.bedrooms[0]) / s.bedrooms[1] * WEIGHTS["bedrooms"]
+        out[:, _BATHROOMS] = (numbers[:, 3] - s.bathrooms[0]) / s.bathrooms[1] * WEIGHTS["bathrooms"]
+        # Listings without coordinates sit at the centre
+        geo = WEIGHTS["geo"] / GEO_SCALE_KM
+        out[:, _NORTH] = np.nan_to_num((numbers[:, 4] - s.lat) * KM_PER_DEG * geo)
+        out[:, _EAST] = np.nan_to_num((numbers[:, 5] - s.lng) * s.km_per_deg_lng * geo)
+        out[np.arange(len(rows)), _TYPES + property_types] = WEIGHTS["property_type"]
+
+        tag_rows, tag_columns, tag_values = [], [], []
+        for i, row in enumerate(rows):
+            columns = self._tag_columns(row)
+            if columns:
+                tag_rows.extend([i] * len(columns))
+                tag_columns.extend(columns)
+                tag_values.extend([WEIGHTS["tags"] / math.sqrt(len(columns))] * len(columns))
+        out[tag_rows, tag_columns] = tag_values
+        return out
+
+    def _tag_column(self, tag: str) -> Optional[int]:
+        column = self._tags.get(tag)
+        if column is None and len(self._tags) < TAG_VOCABULARY:
+            column = self._tags[tag] = _TAGS + len(self._tags)
+        return column
+
+    def _tag_columns(self, row: Dict[str, Any]) -> Set[int]:
+        """Vocabulary columns of the row's features and amenities (new tags join while there is room)"""
+        columns = set()
+        for raw in _raw_tags(row):
+            column = self._raw_columns.get(raw, -1)
+            if column == -1:
+                tag = raw.strip().lower()
+                column = self._raw_columns[raw] = self._tag_column(tag) if tag else None
+            if column is not None:
+                columns.add(column)
+        return columns
+
+    # Catalogue listener interface
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        rows = list(rows)
+        self.__init__()
+        self._scaling = _Scaling(rows)
+        counts: Counter = Counter()
+        for raw, count in Counter(raw for row in rows for raw in _raw_tags(row)).items():
+            if raw.strip():
+                counts[raw.strip().lower()] += count
+        for tag, _ in counts.most_common(TAG_VOCABULARY):
+            self._tag_column(tag)
+        if len(rows) > self._capacity:
+            self._grow(len(rows))
+        n = len(rows)
+        self.vectors[:n] = self.encode(rows)
+        self.norms[:n] = (self.vectors[:n] ** 2).sum(axis=1)
+        self.listing_type[:n] = [LISTING_TYPES.index(r["listing_type"]) for r in rows]
+        self._ids = [r["id"] for r in rows]
+        self._index = {pid: slot for slot, pid in enumerate(self._ids)}
+        self._size = n
+        if n >= SIMILAR_ANN_MIN_LISTINGS:
+            self._buckets = _Buckets(self.vectors, np.arange(n), self._capacity)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        slot = self._index.get(row["id"])
+        if slot is None:
+            if self._size == self._capacity:
+                self._grow(self._capacity * 2)
+            slot = self._size
+            self._size += 1
+            self._ids.append(row["id"])
+            self._index[row["id"]] = slot
+        vector = self.encode([row])[0]
+        self.vectors[slot] = vector
+        self.norms[slot] = vector @ vector
+        self.listing_type[slot] = LISTING_TYPES.index(row["listing_type"])
+        if self._buckets is not None:
+            self._buckets.assign(slot, vector)
+
+    def remove(self, property_id: str) -> None:
+        slot = self._index.pop(property_id, None)
+        if slot is not None:
+            self.listing_type[slot] = -1
+            self._ids[slot] = None
+
+    # Queries
+    def similar(self, property_id: str, k: int, exact: bool = False) -> Optional[List[Tuple[str, float]]]:
+        """The ``k`` listings of the same listing type nearest to ``property_id``.
+
+        Returns ``(id, distance)`` pairs, nearest first, or None for an
+        unknown listing. ``exact`` skips the approximate buckets.
+        """
+        slot = self._index.get(property_id)
+        if slot is None:
+            return None
+        vector = self.vectors[slot]
+        if self._buckets is not None and not exact:
+            slots = self._buckets.candidates(vector, SIMILAR_ANN_PROBES)
+        else:
+            slots = np.arange(self._size)
+        if len(slots) == self._size:
+            # Every row: score the matrix as it is rather than a gathered copy
+            distances = self.norms[:self._size] - 2 * (self.vectors[:self._size] @ vector)
+        else:
+            distances = self.norms[slots] - 2 * (self.vectors[slots] @ vector)
+        distances[(self.listing_type[slots] != self.listing_type[slot]) | (slots == slot)] = np.inf
+        k = min(k, int(np.isfinite(distances).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab; ``distances`` lacks the query's own term
+        own = float(self.norms[slot])
+        return [
+            (self._ids[i], math.sqrt(max(0.0, d + own)))
+            for i, d in zip(slots[top].tolist(), distances[top].tolist())
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listings": len(self._index),
+            "dimensions": DIMENSIONS,
+            "tags": len(self._tags),
+            "buckets": 0 if self._buckets is None else len(self._buckets.members),
+        }
+
+
+similar_index = SimilarityIndex()
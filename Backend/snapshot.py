@@ -0,0 +1,310 @@
+"""
+Columnar NumPy snapshot of active listings for the browse path
+
+Keeps the filterable/sortable columns of every active listing in NumPy
+arrays so ``GET /api/properties`` can be answered with vectorized masks
+and partial sorts instead of a PostgREST round-trip. Writes update the
+arrays in place through the listing catalogue (new rows are appended,
+removed rows are tombstoned); a full rebuild happens whenever the
+catalogue is reloaded, which also compacts the tombstones.
+
+Transit filters use the stored station distances: the nearest-station
+distance is a column, and each station keeps the slots within
+``TRANSIT_RADIUS_M`` of it with their distances, so a "near station X"
+filter touches only that station's listings.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from filters import SEARCH_COLUMNS
+from models import PropertyFilters
+from pagination import SORTS
+from transit import TRANSIT_RADIUS_M
+
+PROPERTY_TYPES = ("hdb", "condo", "landed")
+LISTING_TYPES = ("rent", "sale")
+
+INITIAL_CAPACITY = 1024
+
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+
+
+def _timestamp_us(value: Any) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1_000_000)
+    return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1_000_000)
+
+
+def _id_key(property_id: str) -> int:
+    """Order-preserving 63-bit key for the id tiebreaker.
+
+    UUIDs sort by their hex digits in Postgres, so the first 15 hex digits
+    give the same order (collisions past that are practically impossible).
+    """
+    digits = property_id.replace("-", "")[:15]
+    try:
+        return int(digits.ljust(15, "0"), 16)
+    except ValueError:
+        return int.from_bytes(property_id.encode()[:7].ljust(7, b"\0"), "big")
+
+
+_COLUMNS = {
+    "price": np.float64,
+    "size": np.float64,
+    "bedrooms": np.int32,
+    "bathrooms": np.int32,
+    "property_type": np.int8,
+    "listing_type": np.int8,
+    "location": np.int32,
+    "lat": np.float64,
+    "lng": np.float64,
+    "station_distance_m": np.float64,
+    "created_at": np.int64,
+    "id": np.int64,
+}
+
+
+class Selection:
+    """Membership test by listing id against a filter mask over the snapshot slots"""
+
+    __slots__ = ("_index", "_mask")
+
+    def __init__(self, index: Dict[str, int], mask: np.ndarray):
+        self._index = index
+        self._mask = mask
+
+    def __contains__(self, property_id: str) -> bool:
+        slot = self._index.get(property_id)
+        return slot is not None and bool(self._mask[slot])
+
+
+class ListingSnapshot:
+    def __init__(self):
+        self._capacity = 0
+        self._size = 0
+        self._cols: Dict[str, np.ndarray] = {}
+        self._valid = np.zeros(0, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._index: Dict[str, int] = {}
+        self._locations: Dict[str, int] = {}
+        # station id -> {slot: metres}, and each slot's stations
+        self._stations: Dict[str, Dict[int, int]] = {}
+        self._slot_stations: Dict[int, Dict[str, int]] = {}
+        self._station_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._grow(INITIAL_CAPACITY)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _grow(self, capacity: int) -> None:
+        for name, dtype in _COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if name in self._cols:
+                column[:self._size] = self._cols[name][:self._size]
+            self._cols[name] = column
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:self._size] = self._valid[:self._size]
+        self._valid = valid
+        self._capacity = capacity
+
+    def _location_code(self, location: Optional[str]) -> int:
+        if not location:
+            return -1
+        code = self._locations.get(location)
+        if code is None:
+            code = self._locations[location] = len(self._locations)
+        return code
+
+    def _write(self, slot: int, row: Dict[str, Any]) -> None:
+        cols = self._cols
+        cols["price"][slot] = float(row["price"])
+        cols["size"][slot] = float(row["size"])
+        cols["bedrooms"][slot] = int(row["bedrooms"])
+        cols["bathrooms"][slot] = int(row["bathrooms"])
+        cols["property_type"][slot] = PROPERTY_TYPES.index(row["property_type"])
+        cols["listing_type"][slot] = LISTING_TYPES.index(row["listing_type"])
+        cols["location"][slot] = self._location_code(row.get("location"))
+        cols["lat"][slot] = np.nan if row.get("lat") is None else float(row["lat"])
+        cols["lng"][slot] = np.nan if row.get("lng") is None else float(row["lng"])
+        distance = row.get("station_distance_m")
+        cols["station_distance_m"][slot] = np.nan if distance is None else float(distance)
+        self._set_stations(slot, row.get("nearby_stations") or {})
+        cols["created_at"][slot] = _timestamp_us(row["created_at"])
+        cols["id"][slot] = _id_key(row["id"])
+        self._valid[slot] = True
+
+    def _set_stations(self, slot: int, nearby: Dict[str, int]) -> None:
+        previous = self._slot_stations.pop(slot, {})
+        if previous == nearby:
+            if nearby:
+                self._slot_stations[slot] = previous
+            return
+        for station in previous:
+            del self._stations[station][slot]
+            self._station_arrays.pop(station, None)
+        for station, metres in nearby.items():
+            self._stations.setdefault(station, {})[slot] = metres
+            self._station_arrays.pop(station, None)
+        if nearby:
+            self._slot_stations[slot] = dict(nearby)
+
+    def _near(self, station: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Slots within ``TRANSIT_RADIUS_M`` of ``station`` and their distances"""
+        arrays = self._station_arrays.get(station)
+        if arrays is None:
+            postings = self._stations.get(station, {})
+            arrays = self._station_arrays[station] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+        return arrays
+
+    # Catalogue listener interface
+    def reset(self, rows: Iterable[Dict[str, Any]]) -> None:
+        rows = list(rows)
+        self.__init__()
+        if len(rows) > self._capacity:
+            self._grow(len(rows))
+        for row in rows:
+            self.upsert(row)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        slot = self._index.get(row["id"])
+        if slot is None:
+            if self._size == self._capacity:
+                self._grow(self._capacity * 2)
+            slot = self._size
+            self._size += 1
+            self._ids.append(row["id"])
+            self._index[row["id"]] = slot
+        self._write(slot, row)
+
+    def remove(self, property_id: str) -> None:
+        slot = self._index.pop(property_id, None)
+        if slot is not None:
+            self._valid[slot] = False
+            self._ids[slot] = None
+            self._set_stations(slot, {})
+
+    # Queries
+    def mask(self, filters: PropertyFilters) -> np.ndarray:
+        """Boolean mask over slots for the structured (non-text) filters"""
+        n = self._size
+        cols = {name: column[:n] for name, column in self._cols.items()}
+        mask = self._valid[:n].copy()
+        if filters.listing_type:
+            mask &= cols["listing_type"] == LISTING_TYPES.index(filters.listing_type.value)
+        if filters.property_types:
+            codes = [PROPERTY_TYPES.index(t.value) for t in filters.property_types]
+            mask &= np.isin(cols["property_type"], codes)
+        if filters.locations:
+            codes = [self._locations[loc] for loc in filters.locations if loc in self._locations]
+            mask &= np.isin(cols["location"], codes)
+        ranges = (
+            ("price", filters.min_price, filters.max_price),
+            ("bedrooms", filters.min_bedrooms, filters.max_bedrooms),
+            ("bathrooms", filters.min_bathrooms, filters.max_bathrooms),
+            ("size", filters.min_size, filters.max_size),
+        )
+        for name, low, high in ranges:
+            if low is not None:
+                mask &= cols[name] >= low
+            if high is not None:
+                mask &= cols[name] <= high
+        if filters.station:
+            slots, metres = self._near(filters.station)
+            limit = TRANSIT_RADIUS_M if filters.max_station_distance is None else filters.max_station_distance
+            near = np.zeros(n, dtype=bool)
+            near[slots[metres <= limit]] = True
+            mask &= near
+        elif filters.max_station_distance is not None:
+            mask &= cols["station_distance_m"] <= filters.max_station_distance
+        return mask
+
+    def _search(self, slots: np.ndarray, search: Optional[str], rows) -> np.ndarray:
+        if not search:
+            return slots
+        needle = search.lower()
+        return np.fromiter(
+            (s for s in slots if any(needle in (rows[self._ids[s]].get(c) or "").lower() for c in SEARCH_COLUMNS)),
+            dtype=np.int64,
+        )
+
+    def select(self, filters: PropertyFilters, rows: Optional[Dict[str, Dict[str, Any]]] = None) -> np.ndarray:
+        """Slots of every listing matching ``filters`` (text search included)"""
+        return self._search(np.flatnonzero(self.mask(filters)), filters.search, rows)
+
+    def matching(self, filters: PropertyFilters) -> Selection:
+        """The listings matching the structured filters, checked by id in O(1).
+
+        Costs one vectorized mask, so callers that already have a short list
+        of ids (search hits) can filter it without visiting every row.
+        """
+        return Selection(self._index, self.mask(filters))
+
+    def column(self, name: str, slots: np.ndarray) -> np.ndarray:
+        return self._cols[name][slots]
+
+    def location_names(self) -> Dict[int, str]:
+        return {code: name for name, code in self._locations.items()}
+
+    def _sort_arrays(self, sort: str) -> Tuple[np.ndarray, bool, np.ndarray]:
+        column, desc = SORTS[sort][0]
+        n = self._size
+        return self._cols[column][:n], desc, self._cols["id"][:n]
+
+    def _key_values(self, sort: str, values: Sequence[Any]) -> Tuple[float, int]:
+        column = SORTS[sort][0][0]
+        primary = _timestamp_us(values[0]) if column == "created_at" else float(values[0])
+        return primary, _id_key(str(values[1]))
+
+    def query(
+        self,
+        filters: PropertyFilters,
+        sort: str,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Sequence[Any]] = None,
+        rows: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> List[str]:
+        """Ids of one page of matching listings in ``sort`` order.
+
+        ``after`` holds keyset values (as in a cursor) to start after;
+        otherwise ``offset`` rows are skipped. ``rows`` (the catalogue) is
+        needed only for text search, which is checked row by row on the
+        rows that survive the vectorized filters.
+        """
+        mask = self.mask(filters)
+        primary, desc, ids = self._sort_arrays(sort)
+        if SORTS[sort][0][0] == "station_distance_m":
+            # Listings without a station distance (no coordinates) are not listed
+            mask &= ~np.isnan(primary)
+
+        if after is not None:
+            key, id_key = self._key_values(sort, after)
+            if desc:
+                mask &= (primary < key) | ((primary == key) & (ids < id_key))
+            else:
+                mask &= (primary > key) | ((primary == key) & (ids > id_key))
+
+        slots = self._search(np.flatnonzero(mask), filters.search, rows)
+
+        wanted = offset + limit
+        if len(slots) == 0 or wanted <= 0:
+            return []
+        keys = -primary[slots] if desc else primary[slots]
+        tiebreak = -ids[slots] if desc else ids[slots]
+        if wanted < len(slots):
+            # Partial sort: keep everything up to the wanted-th key (ties included)
+            threshold = np.partition(keys, wanted - 1)[wanted - 1]
+            keep = keys <= threshold
+            slots, keys, tiebreak = slots[keep], keys[keep], tiebreak[keep]
+        order = np.lexsort((tiebreak, keys))[offset:wanted]
+        return [self._ids[s] for s in slots[order]]
+
+
+snapshot = ListingSnapshot()
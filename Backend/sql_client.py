@@ -0,0 +1,800 @@
+"""
+Direct-SQL storage engine (Postgres or SQLite) behind the PostgREST query builder
+
+``AsyncSqlClient`` accepts exactly the requests ``rest_client.AsyncQuery``
+builds (``db.table("properties").select(...).eq(...).execute()``) and
+compiles them to parameterised SQL instead of sending them over HTTP, so
+routes run unchanged on either engine. The SQL text depends only on the
+shape of a query, never on its values, so the drivers' statement caches
+(asyncpg's per-connection prepared statements, sqlite3's
+``cached_statements``) prepare each shape once per connection.
+
+``transaction()`` pins one pooled connection to the current task for
+multi-step operations; queries issued inside it run in that transaction.
+
+Supported: column lists, ``alias:table!inner(...)`` embeds along the
+foreign keys in ``FOREIGN_KEYS``, filter-only ``table!inner()`` embeds of
+the rows referencing the base table (an ``EXISTS`` over the embed's
+filters), the ``thumbnail`` computed column, the
+filter operators the query builder emits, ``or``/``and`` groups,
+``order``/``limit``/``offset``, ``count=exact``, insert/upsert, update,
+delete, and the functions in ``FUNCTIONS`` (the ``bulk_*`` functions and
+``create_saved_search``). A
+filter column may be ``jsonb_column->key`` to compare a number stored
+under ``key`` (as PostgREST does for ``nearby_stations->tampines=lte.800``).
+"""
+
+import asyncio
+import json
+import re
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from rest_client import APIError, APIResponse, AsyncQuery, _json_ready
+
+try:
+    import asyncpg
+except ImportError:  # optional: only needed for DB_BACKEND=postgres
+    asyncpg = None
+
+# Column types, mirroring database_schema.sql
+SCHEMA: Dict[str, Dict[str, str]] = {
+    "users": {
+        "id": "uuid", "name": "text", "email": "text", "user_type": "text", "phone": "text",
+        "agent_license": "text", "password_hash": "text", "created_at": "timestamptz", "updated_at": "timestamptz",
+    },
+    "properties": {
+        "id": "uuid", "title": "text", "description": "text", "address": "text", "price": "numeric",
+        "bedrooms": "integer", "bathrooms": "integer", "size": "numeric", "property_type": "text",
+        "listing_type": "text", "features": "text[]", "amenities": "text[]", "images": "text[]",
+        "location": "text", "lat": "numeric", "lng": "numeric", "contact_name": "text",
+        "contact_phone": "text", "contact_email": "text", "owner_id": "uuid", "is_active": "boolean",
+        "nearest_station": "text", "station_distance_m": "integer", "nearby_stations": "jsonb",
+        "created_at": "timestamptz", "updated_at": "timestamptz",
+    },
+    "property_stations": {"property_id": "uuid", "station": "text", "distance_m": "integer"},
+    "favorites": {"id": "uuid", "user_id": "uuid", "property_id": "uuid", "created_at": "timestamptz"},
+    "saved_searches": {"id": "uuid", "user_id": "uuid", "name": "text", "filters": "jsonb", "created_at": "timestamptz"},
+    "search_matches": {
+        "id": "uuid", "search_id": "uuid", "user_id": "uuid", "property_id": "uuid", "matched_at": "timestamptz",
+    },
+}
+
+# (table, referenced table) -> foreign key column on ``table``
+FOREIGN_KEYS = {
+    ("favorites", "properties"): "property_id",
+    ("favorites", "users"): "user_id",
+    ("properties", "users"): "owner_id",
+    ("property_stations", "properties"): "property_id",
+    ("saved_searches", "users"): "user_id",
+    ("search_matches", "saved_searches"): "search_id",
+    ("search_matches", "users"): "user_id",
+    ("search_matches", "properties"): "property_id",
+}
+
+UNIQUE = {
+    "users": [("email",)],
+    "property_stations": [("property_id", "station")],
+    "favorites": [("user_id", "property_id")],
+    "search_matches": [("search_id", "property_id")],
+}
+
+# Postgres functions callable through ``rpc``: parameters, and the table
+# whose column types the returned rows have
+FUNCTIONS = {
+    "bulk_update_properties": ((("p_owner_id", "uuid"), ("p_items", "jsonb")), "properties"),
+    "bulk_deactivate_properties": ((("p_owner_id", "uuid"), ("p_ids", "uuid[]")), "properties"),
+    "create_saved_search": (
+        (("p_user_id", "uuid"), ("p_name", "text"), ("p_filters", "jsonb"), ("p_limit", "integer")),
+        "saved_searches",
+    ),
+}
+
+_COMPARISONS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+OPERATORS = (*_COMPARISONS, "ilike", "in", "is")
+
+
+def _now() -> str:
+    return datetime.now(tz=timezone.utc).isoformat()
+
+
+def _split(text: str) -> List[str]:
+    """Split a PostgREST list on commas outside parentheses and double quotes"""
+    parts, current, depth, quoted, escaped = [], [], 0, False, False
+    for c in text:
+        if escaped:
+            escaped = False
+        elif quoted and c == "\\":
+            escaped = True
+        elif c == '"':
+            quoted = not quoted
+        elif not quoted and c == "(":
+            depth += 1
+        elif not quoted and c == ")":
+            depth -= 1
+        elif not quoted and c == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(c)
+    if current or parts:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(text: str) -> str:
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", text[1:-1])
+    return text
+
+
+@lru_cache(maxsize=256)
+def _parse_select(select: str) -> Tuple[Tuple[str, Any], ...]:
+    """``(name, None)`` per column, ``(alias, (table, inner, columns))`` per embed"""
+    out = []
+    for item in _split(select):
+        match = re.match(r"^(?:(\w+):)?(\w+)(!inner)?\((.*)\)$", item.strip())
+        if match:
+            alias, table, inner, columns = match.groups()
+            out.append((alias or table, (table, bool(inner), _parse_select(columns) if columns else ())))
+        else:
+            out.append((item.strip(), None))
+    return tuple(out)
+
+
+def _invalid(message: str) -> APIError:
+    return APIError(message, code="22P02", status_code=400)
+
+
+def _coerce(kind: str, raw: str) -> Any:
+    """Typed Python value for a filter value sent as text"""
+    if raw == "null":
+        return None
+    try:
+        if kind == "boolean":
+            return raw == "true"
+        if kind == "integer":
+            return int(raw)
+        if kind == "numeric":
+            return float(raw)
+        if kind == "uuid":
+            return str(uuid.UUID(raw))
+    except ValueError:
+        raise _invalid(f'invalid input syntax for type {kind}: "{raw}"')
+    return raw
+
+
+class SqliteDialect:
+    name = "sqlite"
+    like = "LIKE"  # case-insensitive for ASCII in SQLite
+
+    def placeholder(self, index: int) -> str:
+        return "?"
+
+    def first_element(self, column: str) -> str:
+        return f"json_extract({column}, '$[0]')"
+
+    def json_number(self, column: str, key: str) -> str:
+        return f"CAST(json_extract({column}, '$.' || {key}) AS REAL)"
+
+    def encode(self, kind: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if kind == "text[]":
+            return json.dumps(list(value))
+        if kind == "jsonb":
+            return json.dumps(value)
+        if kind == "boolean":
+            return int(bool(value))
+        if kind == "timestamptz" and isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def decode(self, kind: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if kind in ("text[]", "jsonb"):
+            return json.loads(value)
+        if kind == "boolean":
+            return bool(value)
+        if kind == "numeric":
+            return float(value)
+        return value
+
+
+class PostgresDialect:
+    name = "postgres"
+    like = "ILIKE"
+
+    def placeholder(self, index: int) -> str:
+        return f"${index}"
+
+    def first_element(self, column: str) -> str:
+        return f"{column}[1]"
+
+    def json_number(self, column: str, key: str) -> str:
+        return f"({column} ->> {key})::numeric"
+
+    def encode(self, kind: str, value: Any) -> Any:
+        if value is None:
+            return None
+        try:
+            if kind == "uuid":
+                return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+            if kind == "uuid[]":
+                return [self.encode("uuid", v) for v in value]
+            if kind == "numeric":
+                return Decimal(str(value))
+            if kind == "timestamptz" and isinstance(value, str):
+                return datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if kind == "jsonb":
+                return json.dumps(value)
+        except ValueError:
+            raise _invalid(f'invalid input syntax for type {kind}: "{value}"')
+        return value
+
+    def decode(self, kind: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if kind == "jsonb" and isinstance(value, str):
+            return json.loads(value)
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+
+class _Compiler:
+    """Builds one statement: SQL text plus bound arguments"""
+
+    def __init__(self, dialect, table: str):
+        if table not in SCHEMA:
+            raise APIError(f'relation "public.{table}" does not exist', code="42P01", status_code=404)
+        self.dialect = dialect
+        self.table = table
+        self.args: List[Any] = []
+        # alias -> (table, SQL alias); "" is the base table
+        self.tables: Dict[str, Tuple[str, str]] = {"": (table, "t0")}
+        # alias -> correlation of a filter-only embed of referencing rows
+        self.exists: Dict[str, str] = {}
+
+    def bind(self, kind: str, value: Any) -> str:
+        self.args.append(self.dialect.encode(kind, value))
+        return self.dialect.placeholder(len(self.args))
+
+    def column(self, name: str, qualified: bool = True) -> Tuple[str, str]:
+        """``(SQL expression, type)`` for ``name``, ``embed_alias.name`` or ``name->key``"""
+        name, arrow, key = name.partition("->")
+        if arrow:
+            ref, kind = self.column(name, qualified)
+            if kind != "jsonb" or not re.fullmatch(r"\w+", key):
+                raise APIError(f"invalid JSON path {name}->{key}", code="PGRST100", status_code=400)
+            return self.dialect.json_number(ref, self.bind("text", key)), "numeric"
+        alias, _, column = name.rpartition(".")
+        if alias not in self.tables:
+            raise APIError(f"Unknown embedded resource {alias!r}", code="PGRST108", status_code=400)
+        table, sql_alias = self.tables[alias]
+        if column not in SCHEMA[table]:
+            raise APIError(f"column {table}.{column} does not exist", code="42703", status_code=400)
+        ref = f'"{sql_alias}"."{column}"' if qualified else f'"{column}"'
+        return ref, SCHEMA[table][column]
+
+    def condition(self, column: str, expr: str, qualified: bool = True) -> str:
+        op, _, raw = expr.partition(".")
+        if op == "not":
+            inner_op, _, raw = raw.partition(".")
+            return f"NOT ({self.condition(column, f'{inner_op}.{raw}', qualified)})"
+        ref, kind = self.column(column, qualified)
+        if op in _COMPARISONS:
+            return f"{ref} {_COMPARISONS[op]} {self.bind(kind, _coerce(kind, _unquote(raw)))}"
+        if op == "ilike":
+            pattern = _unquote(raw).replace("*", "%")
+            return f"{ref} {self.dialect.like} {self.bind('text', pattern)}"
+        if op == "in":
+            values = [_coerce(kind, _unquote(v)) for v in _split(raw[1:-1])]
+            if not values:
+                return "FALSE"
+            return f"{ref} IN ({', '.join(self.bind(kind, v) for v in values)})"
+        if op == "is":
+            keyword = {"null": "NULL", "true": "TRUE", "false": "FALSE"}.get(raw)
+            if keyword is None:
+                raise _invalid(f"invalid is value {raw!r}")
+            return f"{ref} IS {keyword}"
+        raise APIError(f"Unsupported operator {op!r}", code="PGRST100", status_code=400)
+
+    def logic(self, expr: str, qualified: bool = True) -> str:
+        """``or(...)``/``and(...)`` groups and their ``column.op.value`` terms"""
+        for group, joiner in (("or(", " OR "), ("and(", " AND ")):
+            if expr.startswith(group):
+                terms = [self.logic(term, qualified) for term in _split(expr[len(group):-1])]
+                return "(" + joiner.join(terms) + ")"
+        column, _, rest = expr.partition(".")
+        if rest.partition(".")[0] not in (*OPERATORS, "not"):
+            # Embedded column: "alias.column.op.value"
+            embedded, _, rest = rest.partition(".")
+            column = f"{column}.{embedded}"
+        return self.condition(column, rest, qualified)
+
+    def where(self, filters: List[Tuple[str, str]], qualified: bool = True) -> str:
+        clauses = []
+        embedded: Dict[str, List[Tuple[str, str]]] = {alias: [] for alias in self.exists}
+        for key, value in filters:
+            if key in ("or", "and"):
+                clauses.append(self.logic(f"{key}{value}", qualified))
+            elif key.rpartition(".")[0] in embedded:
+                embedded[key.rpartition(".")[0]].append((key, value))
+            else:
+                clauses.append(self.condition(key, value, qualified))
+        # Bound after the other clauses, so positional placeholders stay in order
+        for alias, terms in embedded.items():
+            table, sql_alias = self.tables[alias]
+            conditions = [self.exists[alias]] + [self.condition(key, value) for key, value in terms]
+            clauses.append(f'EXISTS (SELECT 1 FROM "{table}" AS "{sql_alias}" WHERE {" AND ".join(conditions)})')
+        return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+    def projection(self, select: str, qualified: bool = True) -> Tuple[List[str], List[Tuple[Tuple[str, ...], str]], List[str]]:
+        """Select expressions, their ``(output path, type)`` and the JOIN clauses for embeds"""
+        expressions, outputs, joins = [], [], []
+
+        def add(table: str, alias: str, sql_alias: str, items, path: Tuple[str, ...]):
+            for name, embed in items:
+                if embed is not None:
+                    target, inner, columns = embed
+                    key = FOREIGN_KEYS.get((table, target))
+                    embed_alias = f"{alias}.{name}" if alias else name
+                    embed_sql = f"t{len(self.tables)}"
+                    referencing = FOREIGN_KEYS.get((target, table))
+                    if key is None and referencing is not None and inner and not columns:
+                        # Rows pointing at this one, used only to filter it
+                        self.tables[embed_alias] = (target, embed_sql)
+                        self.exists[embed_alias] = f'"{embed_sql}"."{referencing}" = "{sql_alias}"."id"'
+                        continue
+                    if key is None:
+                        raise APIError(f"No relationship between {table} and {target}", code="PGRST200", status_code=400)
+                    self.tables[embed_alias] = (target, embed_sql)
+                    kind = "JOIN" if inner else "LEFT JOIN"
+                    joins.append(f' {kind} "{target}" AS "{embed_sql}" ON "{embed_sql}"."id" = "{sql_alias}"."{key}"')
+                    # The embedded id tells a LEFT JOIN miss from a row of NULLs
+                    expressions.append(f'"{embed_sql}"."id"')
+                    outputs.append(((*path, name, "\0present"), "uuid"))
+                    add(target, embed_alias, embed_sql, columns, (*path, name))
+                    continue
+                ref = f'"{sql_alias}".' if qualified else ""
+                if name == "*":
+                    for column, kind in SCHEMA[table].items():
+                        expressions.append(f'{ref}"{column}"')
+                        outputs.append(((*path, column), kind))
+                elif name == "thumbnail" and table == "properties":
+                    expressions.append(self.dialect.first_element(f'{ref}"images"'))
+                    outputs.append(((*path, name), "text"))
+                elif name in SCHEMA[table]:
+                    expressions.append(f'{ref}"{name}"')
+                    outputs.append(((*path, name), SCHEMA[table][name]))
+                else:
+                    raise APIError(f"column {table}.{name} does not exist", code="42703", status_code=400)
+
+        add(self.table, "", "t0", _parse_select(select), ())
+        return expressions, outputs, joins
+
+    def order(self, value: str) -> str:
+        terms = []
+        for term in value.split(","):
+            parts = term.split(".")
+            ref, _ = self.column(parts[0])
+            direction = "DESC" if "desc" in parts[1:] else "ASC"
+            # Postgres defaults, spelled out so SQLite sorts NULLs the same way
+            nulls = "NULLS FIRST" if "nullsfirst" in parts[1:] or (direction == "DESC" and "nullslast" not in parts[1:]) else "NULLS LAST"
+            terms.append(f"{ref} {direction} {nulls}")
+        return " ORDER BY " + ", ".join(terms)
+
+
+def _decode_rows(dialect, outputs, records) -> List[Dict[str, Any]]:
+    rows = []
+    for record in records:
+        row: Dict[str, Any] = {}
+        missing = set()
+        for (path, kind), value in zip(outputs, record):
+            *parents, key = path
+            if tuple(parents) in missing:
+                continue
+            target = row
+            for part in parents:
+                target = target.setdefault(part, {})
+            if key == "\0present":
+                if value is None:
+                    missing.add(tuple(parents))
+                    # Nothing to embed: the resource is null (LEFT JOIN miss)
+                    parent = row
+                    for part in parents[:-1]:
+                        parent = parent[part]
+                    parent[parents[-1]] = None
+                continue
+            target[key] = dialect.decode(kind, value)
+        rows.append(row)
+    return rows
+
+
+class _Lease:
+    """One pooled connection, with a lock so tasks sharing a transaction take turns"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = asyncio.Lock()
+        self.in_transaction = False
+
+
+_transaction: ContextVar[Optional[Tuple["AsyncSqlClient", _Lease]]] = ContextVar("sql_transaction", default=None)
+
+
+class AsyncSqlClient:
+    """Query-builder compatible client executing SQL on a pooled Postgres or SQLite connection"""
+
+    def __init__(self, url: str, pool_size: int = 10):
+        self.url = url
+        self.pool_size = pool_size
+        if url.startswith(("postgres://", "postgresql://")):
+            if asyncpg is None:
+                raise RuntimeError("DB_BACKEND=postgres needs the asyncpg package")
+            self.dialect = PostgresDialect()
+        else:
+            self.dialect = SqliteDialect()
+        self._pool: Optional[asyncio.Queue] = None
+        self._pg_pool = None
+        self._init_lock = asyncio.Lock()
+        self._executors: List[ThreadPoolExecutor] = []
+
+    # Query builder entry points (same as AsyncPostgrestClient)
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self, name)
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> AsyncQuery:
+        query = AsyncQuery(self, f"rpc/{function}")
+        query._method = "POST"
+        query._operation = "rpc"
+        query._json = _json_ready(params or {})
+        return query
+
+    # Connections
+    async def _open(self) -> None:
+        async with self._init_lock:
+            if self._pool is not None or self._pg_pool is not None:
+                return
+            if self.dialect.name == "postgres":
+                self._pg_pool = await asyncpg.create_pool(self.url, min_size=1, max_size=self.pool_size)
+                return
+            path = self.url[len("sqlite:///"):] if self.url.startswith("sqlite:///") else self.url
+            size = self.pool_size
+            if path in ("", ":memory:"):
+                # Connections must share one in-memory database, and shared-cache
+                # table locks fail concurrent writers instead of waiting
+                # (busy_timeout does not apply): one connection, tasks queue for it
+                path = f"file:cribhunter-{id(self)}?mode=memory&cache=shared"
+                size = 1
+            pool: asyncio.Queue = asyncio.Queue()
+            for _ in range(size):
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+                conn = await asyncio.get_running_loop().run_in_executor(executor, self._connect_sqlite, path)
+                self._executors.append(executor)
+                pool.put_nowait(_Lease((conn, executor)))
+            self._pool = pool
+
+    @staticmethod
+    def _connect_sqlite(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, uri=path.startswith("file:"), isolation_level=None,
+                               check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        if "mode=memory" not in path:
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(sqlite_schema())
+        return conn
+
+    @asynccontextmanager
+    async def _lease(self) -> AsyncIterator[_Lease]:
+        current = _transaction.get()
+        if current is not None and current[0] is self:
+            async with current[1].lock:
+                yield current[1]
+            return
+        if self._pool is None and self._pg_pool is None:
+            await self._open()
+        if self._pg_pool is not None:
+            async with self._pg_pool.acquire() as conn:
+                yield _Lease(conn)
+            return
+        lease = await self._pool.get()
+        try:
+            yield lease
+        finally:
+            self._pool.put_nowait(lease)
+
+    async def _execute(self, lease: _Lease, sql: str, args: Sequence[Any]) -> List[Sequence[Any]]:
+        try:
+            if self.dialect.name == "postgres":
+                return await lease.conn.fetch(sql, *args)
+            conn, executor = lease.conn
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, lambda: conn.execute(sql, args).fetchall()
+            )
+        except sqlite3.IntegrityError as e:
+            message = str(e)
+            code = "23503" if "FOREIGN KEY" in message else "23505" if "UNIQUE" in message else "23514"
+            raise APIError(message, code=code, status_code=409) from e
+        except sqlite3.Error as e:
+            raise APIError(f"Database request failed: {e}") from e
+        except Exception as e:
+            sqlstate = getattr(e, "sqlstate", None)
+            if sqlstate is None:
+                raise
+            status = 409 if sqlstate.startswith("23") else 400 if sqlstate.startswith("22") else 500
+            raise APIError(str(e), code=sqlstate, status_code=status) from e
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Run the queries issued inside the block in one transaction on one connection"""
+        current = _transaction.get()
+        if current is not None and current[0] is self:
+            yield  # nested: part of the outer transaction
+            return
+        async with self._lease() as lease:
+            token = _transaction.set((self, lease))
+            try:
+                if self.dialect.name == "postgres":
+                    async with lease.conn.transaction():
+                        yield
+                else:
+                    # IMMEDIATE takes the write lock up front, so check-then-write
+                    # sequences cannot interleave with another writer
+                    await self._execute(lease, "BEGIN IMMEDIATE", ())
+                    try:
+                        yield
+                    except BaseException:
+                        await self._execute(lease, "ROLLBACK", ())
+                        raise
+                    await self._execute(lease, "COMMIT", ())
+            finally:
+                _transaction.reset(token)
+
+    # Request compilation (the AsyncQuery.execute entry point)
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[List[Tuple[str, str]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+    ) -> APIResponse:
+        path = path.strip("/")
+        params = params or []
+        prefer = (headers or {}).get("Prefer", "")
+        if path.startswith("rpc/"):
+            return APIResponse(await self._rpc(path[4:], json or {}))
+
+        select, order, limit, offset, on_conflict, filters = "*", None, None, None, None, []
+        for key, value in params:
+            if key == "select":
+                select = value
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key == "on_conflict":
+                on_conflict = value
+            else:
+                filters.append((key, value))
+
+        if method == "GET":
+            return await self._select(path, select, filters, order, limit, offset, "count=exact" in prefer)
+        if method == "POST":
+            rows = json if isinstance(json, list) else [json]
+            return APIResponse(await self._insert(path, select, rows, "resolution=merge-duplicates" in prefer, on_conflict))
+        if method == "PATCH":
+            return APIResponse(await self._update(path, select, filters, json or {}))
+        if method == "DELETE":
+            return APIResponse(await self._delete(path, select, filters))
+        raise APIError(f"Unsupported method {method}", status_code=405)
+
+    async def _select(self, table, select, filters, order, limit, offset, count) -> APIResponse:
+        c = _Compiler(self.dialect, table)
+        expressions, outputs, joins = c.projection(select)
+        where = c.where(filters)
+        source = f' FROM "{table}" AS "t0"' + "".join(joins) + where
+        where_args = list(c.args)
+        sql = f"SELECT {', '.join(expressions)}{source}"
+        if order:
+            sql += c.order(order)
+        if limit is not None:
+            sql += f" LIMIT {c.bind('integer', limit)}"
+        if offset:
+            if limit is None:
+                sql += " LIMIT -1" if self.dialect.name == "sqlite" else ""
+            sql += f" OFFSET {c.bind('integer', offset)}"
+        async with self._lease() as lease:
+            records = await self._execute(lease, sql, c.args)
+            total = None
+            if count:
+                total = (await self._execute(lease, f"SELECT count(*){source}", where_args))[0][0]
+        return APIResponse(_decode_rows(self.dialect, outputs, records), count=total)
+
+    def _returning(self, c: _Compiler, select: str) -> Tuple[str, list]:
+        expressions, outputs, joins = c.projection(select, qualified=False)
+        if joins or c.exists:
+            raise APIError("Embedding is not supported on writes", code="PGRST100", status_code=400)
+        return " RETURNING " + ", ".join(expressions), outputs
+
+    async def _insert(self, table, select, rows, upsert, on_conflict) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        schema = SCHEMA[table]
+        now = _now()
+        prepared = []
+        # Only columns the caller sent are overwritten by an upsert (as in PostgREST)
+        sent = {k for row in rows for k in row if k in schema}
+        for row in rows:
+            row = {k: v for k, v in row.items() if k in schema}
+            if "id" in schema:
+                row.setdefault("id", str(uuid.uuid4()))
+            for column in ("created_at", "updated_at", "matched_at"):
+                if column in schema:
+                    row.setdefault(column, now)
+            if table == "properties":
+                row.setdefault("is_active", True)
+            prepared.append(row)
+        columns = list(dict.fromkeys(k for row in prepared for k in row))
+        c = _Compiler(self.dialect, table)
+        values = ", ".join(
+            "(" + ", ".join(c.bind(schema[col], row.get(col)) for col in columns) + ")" for row in prepared
+        )
+        sql = f'INSERT INTO "{table}" ({", ".join(f"{chr(34)}{col}{chr(34)}" for col in columns)}) VALUES {values}'
+        if upsert:
+            target = on_conflict.split(",") if on_conflict else ["id"]
+            updates = [col for col in columns if col in sent and col not in target and col != "id"]
+            assignments = ", ".join(f'"{col}" = excluded."{col}"' for col in updates)
+            sql += f' ON CONFLICT ({", ".join(target)}) ' + (f"DO UPDATE SET {assignments}" if assignments else "DO NOTHING")
+        returning, outputs = self._returning(c, select)
+        async with self._lease() as lease:
+            records = await self._execute(lease, sql + returning, c.args)
+        result = _decode_rows(self.dialect, outputs, records)
+        # Callers rely on rows coming back in input order (as PostgREST returns them)
+        if result and all("id" in row for row in result):
+            position = {row["id"]: i for i, row in enumerate(prepared)}
+            result.sort(key=lambda row: position.get(row["id"], len(position)))
+        return result
+
+    async def _update(self, table, select, filters, data) -> List[Dict[str, Any]]:
+        schema = SCHEMA[table]
+        data = {k: v for k, v in data.items() if k in schema and k != "id"}
+        if "updated_at" in schema:
+            data.setdefault("updated_at", _now())
+        c = _Compiler(self.dialect, table)
+        assignments = ", ".join(f'"{col}" = {c.bind(schema[col], value)}' for col, value in data.items())
+        sql = f'UPDATE "{table}" SET {assignments}{c.where(filters, qualified=False)}'
+        returning, outputs = self._returning(c, select)
+        async with self._lease() as lease:
+            records = await self._execute(lease, sql + returning, c.args)
+        return _decode_rows(self.dialect, outputs, records)
+
+    async def _delete(self, table, select, filters) -> List[Dict[str, Any]]:
+        c = _Compiler(self.dialect, table)
+        sql = f'DELETE FROM "{table}"{c.where(filters, qualified=False)}'
+        returning, outputs = self._returning(c, select)
+        async with self._lease() as lease:
+            records = await self._execute(lease, sql + returning, c.args)
+        return _decode_rows(self.dialect, outputs, records)
+
+    async def _rpc(self, function: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if function not in FUNCTIONS:
+            raise APIError(f"Could not find the function public.{function}", code="PGRST202", status_code=404)
+        signature, returns = FUNCTIONS[function]
+        if self.dialect.name == "postgres":
+            c = _Compiler(self.dialect, returns)
+            args = ", ".join(f"{name} => {c.bind(kind, params.get(name))}" for name, kind in signature)
+            async with self._lease() as lease:
+                records = await self._execute(lease, f"SELECT * FROM {function}({args})", c.args)
+            types = SCHEMA[returns]
+            return [{k: self.dialect.decode(types.get(k, ""), v) for k, v in dict(record).items()} for record in records]
+        # SQLite has no stored functions: same statements, one transaction
+        # (BEGIN IMMEDIATE serialises it with every other writer)
+        owner = params.get("p_owner_id")
+        async with self.transaction():
+            if function == "create_saved_search":
+                user = params.get("p_user_id")
+                existing = await self.table("saved_searches").select("id").eq("user_id", user).execute()
+                if len(existing.data) >= params.get("p_limit", 0):
+                    return []
+                result = await self.table("saved_searches").insert(
+                    {"user_id": user, "name": params.get("p_name"), "filters": params.get("p_filters")}
+                ).execute()
+                return result.data
+            if function == "bulk_update_properties":
+                rows = []
+                for item in params.get("p_items") or []:
+                    changes = {k: v for k, v in item.items() if k != "id" and v is not None}
+                    result = await self.table("properties").update(changes).eq("id", item["id"]).eq("owner_id", owner).execute()
+                    rows.extend(result.data)
+                return rows
+            ids = list(params.get("p_ids") or [])
+            if not ids:
+                return []
+            result = await (
+                self.table("properties").update({"is_active": False})
+                .in_("id", ids).eq("owner_id", owner).select("id").execute()
+            )
+            return result.data
+
+    async def aclose(self) -> None:
+        if self._pg_pool is not None:
+            await self._pg_pool.close()
+            self._pg_pool = None
+        if self._pool is not None:
+            while not self._pool.empty():
+                conn, executor = self._pool.get_nowait().conn
+                executor.submit(conn.close).result()
+            self._pool = None
+        for executor in self._executors:
+            executor.shutdown(wait=False)
+        self._executors = []
+
+
+_SQLITE_TYPES = {
+    "uuid": "TEXT", "text": "TEXT", "numeric": "REAL", "integer": "INTEGER",
+    "boolean": "INTEGER", "text[]": "TEXT", "jsonb": "TEXT", "timestamptz": "TEXT",
+}
+
+
+def sqlite_schema() -> str:
+    """DDL for a local SQLite database equivalent to database_schema.sql"""
+    statements = []
+    for table, columns in SCHEMA.items():
+        lines = []
+        for column, kind in columns.items():
+            line = f'"{column}" {_SQLITE_TYPES[kind]}'
+            if column == "id":
+                line += " PRIMARY KEY"
+            lines.append(line)
+        for (source, target), key in FOREIGN_KEYS.items():
+            if source == table:
+                lines.append(f'FOREIGN KEY ("{key}") REFERENCES "{target}"("id") ON DELETE CASCADE')
+        for keys in UNIQUE.get(table, []):
+            lines.append(f"UNIQUE ({', '.join(keys)})")
+        statements.append(f'CREATE TABLE IF NOT EXISTS "{table}" (\n    ' + ",\n    ".join(lines) + "\n);")
+    statements += [
+        "CREATE INDEX IF NOT EXISTS idx_properties_owner_id ON properties(owner_id);",
+        "CREATE INDEX IF NOT EXISTS idx_properties_active_created_id ON properties(created_at DESC, id DESC) WHERE is_active = 1;",
+        "CREATE INDEX IF NOT EXISTS idx_properties_active_price_id ON properties(price, id) WHERE is_active = 1;",
+        "CREATE INDEX IF NOT EXISTS idx_properties_active_size_id ON properties(size, id) WHERE is_active = 1;",
+        "CREATE INDEX IF NOT EXISTS idx_properties_active_station_id ON properties(station_distance_m, id) WHERE is_active = 1;",
+        "CREATE INDEX IF NOT EXISTS idx_property_stations_station_distance ON property_stations(station, distance_m, property_id);",
+        # property_stations follows nearby_stations, as the trigger in properties_schema.sql does
+        """CREATE TRIGGER IF NOT EXISTS sync_property_stations_insert AFTER INSERT ON properties BEGIN
+            INSERT INTO property_stations (property_id, station, distance_m)
+            SELECT NEW.id, key, value FROM json_each(NEW.nearby_stations);
+        END;""",
+        """CREATE TRIGGER IF NOT EXISTS sync_property_stations_update AFTER UPDATE OF nearby_stations ON properties BEGIN
+            DELETE FROM property_stations WHERE property_id = NEW.id;
+            INSERT INTO property_stations (property_id, station, distance_m)
+            SELECT NEW.id, key, value FROM json_each(NEW.nearby_stations);
+        END;""",
+        # Databases created before property_stations existed
+        """INSERT INTO property_stations (property_id, station, distance_m)
+            SELECT p.id, j.key, j.value FROM properties p, json_each(p.nearby_stations) AS j
+            WHERE NOT EXISTS (SELECT 1 FROM property_stations);""",
+        "CREATE INDEX IF NOT EXISTS idx_favorites_user_id ON favorites(user_id);",
+        "CREATE INDEX IF NOT EXISTS idx_favorites_property_id ON favorites(property_id);",
+        "CREATE INDEX IF NOT EXISTS idx_saved_searches_user_id ON saved_searches(user_id);",
+        "CREATE INDEX IF NOT EXISTS idx_search_matches_user_matched ON search_matches(user_id, matched_at DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_search_matches_property_id ON search_matches(property_id);",
+    ]
+    return "\n".join(statements)
@@ -0,0 +1,53 @@
+"""
+Shared fixtures: the Backend modules on the import path, an event loop,
+and an in-memory SQLite database behind ``sql_client.AsyncSqlClient``
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, "benchmarks"))
+
+from sql_client import AsyncSqlClient  # noqa: E402
+from transit import with_transit  # noqa: E402
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on the test's event loop"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def db(run):
+    client = AsyncSqlClient("sqlite:///:memory:", pool_size=2)
+    yield client
+    run(client.aclose())
+
+
+def make_user(user_id: str, user_type: str = "agent") -> dict:
+    return {
+        "id": user_id, "name": "Test User", "email": f"{user_id}@example.com",
+        "user_type": user_type, "password_hash": "x",
+    }
+
+
+async def seed_listings(db: AsyncSqlClient, rows) -> None:
+    """Insert ``rows`` (with their transit columns) and the users owning them"""
+    owners = sorted({row["owner_id"] for row in rows})
+    await db.table("users").insert([make_user(owner) for owner in owners]).execute()
+    for row in rows:
+        with_transit(row)
+    await db.table("properties").insert(rows).execute()
+
+
+def new_id() -> str:
+    return str(uuid.uuid4())
@@ -0,0 +1,46 @@
+"""
+Bulk writes must match ids however the client cases or formats them
+"""
+
+from bulk import deactivate_listings, update_listings, validate
+from conftest import new_id, seed_listings
+from models import BulkPropertyUpdate
+from synthetic import make_listings
+
+
+def _listings(db, run):
+    rows = make_listings(4, seed=5, owners=1)
+    run(seed_listings(db, rows))
+    return rows[0]["owner_id"], rows
+
+
+def test_update_matches_upper_case_ids(db, run):
+    owner, rows = _listings(db, run)
+    items = [
+        {"id": rows[0]["id"].upper(), "price": 1234.0},
+        {"id": rows[1]["id"].replace("-", ""), "price": 2345.0},
+        {"id": rows[1]["id"], "price": 1.0},
+        {"id": "not-a-uuid", "price": 1.0},
+        {"id": new_id(), "price": 1.0},
+    ]
+    valid, errors = validate(items, BulkPropertyUpdate)
+    written = []
+    results = run(update_listings(db, owner, valid, written.append))
+
+    by_index = {result.index: result for result in errors + results}
+    assert [by_index[i].status for i in range(len(items))] == ["updated", "updated", "invalid", "invalid", "not_found"]
+    assert by_index[0].id == rows[0]["id"]
+    assert by_index[2].error == "Duplicate id in request"
+    assert by_index[3].error == "Invalid id"
+    assert sorted(row["price"] for row in written) == [1234.0, 2345.0]
+
+
+def test_deactivate_matches_upper_case_ids(db, run):
+    owner, rows = _listings(db, run)
+    gone = []
+    results = run(deactivate_listings(db, owner, [rows[0]["id"].upper(), rows[0]["id"], "x"], gone.append))
+
+    assert sorted(result.status for result in results) == ["deactivated", "invalid", "invalid"]
+    assert gone == [rows[0]["id"]]
+    stored = run(db.table("properties").select("id").eq("is_active", True).execute()).data
+    assert sorted(row["id"] for row in stored) == sorted(row["id"] for row in rows[1:])
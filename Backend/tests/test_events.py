@@ -0,0 +1,62 @@
+"""
+An event stream holds its subscription only while the response runs
+"""
+
+import asyncio
+
+import events
+from events import EventStreamResponse, ListingEventBus
+from models import PropertyFilters
+from synthetic import make_listings
+
+SCOPE = {"type": "http", "method": "GET", "path": "/stream", "headers": []}
+
+
+class Client:
+    def __init__(self):
+        self.sent = []
+        self.gone = asyncio.Event()
+
+    async def receive(self):
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def test_unsent_response_does_not_subscribe():
+    bus = ListingEventBus()
+    EventStreamResponse(PropertyFilters(), bus=bus)
+    assert bus.subscribers == 0
+
+
+def test_disconnect_unsubscribes(run):
+    bus = ListingEventBus()
+    client = Client()
+
+    async def stream():
+        task = asyncio.create_task(EventStreamResponse(PropertyFilters(), bus=bus)(SCOPE, client.receive, client.send))
+        while not client.sent:
+            await asyncio.sleep(0)
+        assert bus.subscribers == 1
+        bus.publish("create", make_listings(1, seed=2)[0])
+        while len(client.sent) < 3:
+            await asyncio.sleep(0)
+        client.gone.set()
+        await task
+
+    run(stream())
+    assert client.sent[0]["status"] == 200
+    assert b"event: create" in client.sent[2]["body"]
+    assert bus.subscribers == 0
+    assert not bus.groups
+
+
+def test_full_bus_answers_503(run, monkeypatch):
+    monkeypatch.setattr(events, "SSE_MAX_SUBSCRIBERS", 0)
+    bus = ListingEventBus()
+    client = Client()
+    run(EventStreamResponse(PropertyFilters(), bus=bus)(SCOPE, client.receive, client.send))
+    assert client.sent[0]["status"] == 503
+    assert bus.subscribers == 0
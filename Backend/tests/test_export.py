@@ -0,0 +1,35 @@
+"""
+Exports are anonymous: no per-user columns
+"""
+
+import csv
+import io
+
+import orjson
+import pytest
+
+from conftest import seed_listings
+from export import ExportReader, encode
+from fields import FAVORITED
+from models import PropertyFilters
+from synthetic import make_listings
+
+
+async def _export(db, format, fields=None):
+    reader = ExportReader(db, PropertyFilters(), fields, chunk_size=7)
+    first = await reader.fetch(None)
+    return b"".join([block async for block in encode(reader, first, format)]).decode()
+
+
+@pytest.mark.parametrize("fields", [None, ("id", "title", FAVORITED)])
+def test_exports_leave_out_is_favorited(db, run, fields):
+    rows = make_listings(20, seed=3, owners=2)
+    run(seed_listings(db, rows))
+
+    lines = [orjson.loads(line) for line in run(_export(db, "ndjson", fields)).splitlines()]
+    assert len(lines) == 20 and all(FAVORITED not in item for item in lines)
+    assert {item["id"] for item in lines} == {row["id"] for row in rows}
+
+    table = list(csv.reader(io.StringIO(run(_export(db, "csv", fields)))))
+    assert FAVORITED not in table[0] and len(table) == 21
+    assert all(len(line) == len(table[0]) for line in table)
@@ -0,0 +1,50 @@
+"""
+Favouriting answers 404 for anything but an active listing
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import routes.favorites
+from conftest import make_user, new_id, seed_listings
+from favorites import favorite_ids, invalidate_favorites
+from models import UserResponse
+from synthetic import make_listings
+
+
+@pytest.fixture
+def setup(db, run, monkeypatch):
+    rows = make_listings(2, seed=4, owners=1)
+    run(seed_listings(db, rows))
+    run(db.table("properties").update({"is_active": False}).eq("id", rows[1]["id"]).execute())
+    user_id = new_id()
+    run(db.table("users").insert(make_user(user_id, "hunter")).execute())
+    monkeypatch.setattr(routes.favorites, "get_db", lambda: db)
+    invalidate_favorites(user_id)
+    user = UserResponse(
+        id=user_id, name="Buyer", email="buyer@example.com", user_type="hunter", created_at=datetime.now(tz=timezone.utc)
+    )
+    return user, rows
+
+
+def test_active_listing_is_favourited(db, run, setup):
+    user, rows = setup
+    run(routes.favorites.favorite_property(rows[0]["id"].upper(), current_user=user))
+    assert run(favorite_ids(db, user.id)) == {rows[0]["id"]}
+    run(routes.favorites.unfavorite_property(rows[0]["id"].upper(), current_user=user))
+    assert run(favorite_ids(db, user.id)) == frozenset()
+
+
+@pytest.mark.parametrize("which", ["inactive", "missing", "malformed"])
+def test_other_ids_are_not_found(db, run, setup, which):
+    user, rows = setup
+    property_id = {"inactive": rows[1]["id"], "missing": new_id(), "malformed": "1; drop"}[which]
+    with pytest.raises(HTTPException) as info:
+        run(routes.favorites.favorite_property(property_id, current_user=user))
+    assert info.value.status_code == 404
+    with pytest.raises(HTTPException) as info:
+        run(routes.favorites.unfavorite_property(property_id, current_user=user))
+    assert info.value.status_code == 404
+    assert not run(db.table("favorites").select("property_id").execute()).data
@@ -0,0 +1,58 @@
+"""
+Nearest-k must agree with a brute-force scan as listings move and leave the
+grid, and the viewport endpoint must reject inverted bounds
+"""
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+
+import routes.properties
+from geo_index import GeoIndex, haversine_m
+from synthetic import make_listings
+
+
+def _brute_nearest(rows, lat, lng, k):
+    distances = sorted(
+        (haversine_m(lat, lng, row["lat"], row["lng"]), row["id"])
+        for row in rows.values() if row["lat"] is not None
+    )
+    return [pid for _, pid in distances[:k]]
+
+
+def test_nearest_tracks_bounds_through_writes():
+    rows = {row["id"]: row for row in make_listings(300, seed=3, owners=4)}
+    index = GeoIndex()
+    index.reset(rows.values())
+    ordered = sorted(rows.values(), key=lambda row: (row["lat"], row["lng"]))
+    # Empty the grid's outer rows and columns, then move a listing far out
+    for row in ordered[:20] + ordered[-20:]:
+        index.remove(row["id"])
+        del rows[row["id"]]
+    outlier = dict(next(iter(rows.values())), lat=1.6, lng=104.2)
+    index.upsert(outlier)
+    rows[outlier["id"]] = outlier
+
+    for lat, lng in [(1.35, 103.82), (1.29, 103.85), (1.6, 104.2), (1.0, 103.0)]:
+        for k in (1, 5, len(rows) + 3):
+            assert [pid for pid, _ in index.nearest(lat, lng, k)] == _brute_nearest(rows, lat, lng, k)
+
+    for pid in list(rows):
+        index.remove(pid)
+    assert index.nearest(1.35, 103.82, 3) == []
+    index.upsert(outlier)
+    assert [pid for pid, _ in index.nearest(1.35, 103.82, 3)] == [outlier["id"]]
+
+
+@pytest.mark.parametrize("edges", [
+    {"south": 1.4, "north": 1.3, "west": 103.7, "east": 103.9},
+    {"south": 1.3, "north": 1.4, "west": 103.9, "east": 103.7},
+])
+def test_viewport_rejects_inverted_bounds(edges):
+    with pytest.raises(RequestValidationError) as info:
+        routes.properties.viewport(zoom=12, **edges)
+    assert info.value.errors()[0]["loc"] == ("query",)
+
+
+def test_viewport_accepts_a_point():
+    view = routes.properties.viewport(south=1.3, north=1.3, west=103.8, east=103.8, zoom=12)
+    assert (view.south, view.east) == (1.3, 103.8)
@@ -0,0 +1,63 @@
+"""
+A 304 must carry the same validator as the 200 it stands for, without
+building the body
+"""
+
+import pytest
+from starlette.requests import Request
+
+import http_cache
+from http_cache import COMPRESS_MIN_BYTES, cached_json, etag_for
+
+
+def _unbuilt():
+    raise AssertionError("304 built the body")
+
+
+def _request(**headers) -> Request:
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw})
+
+
+@pytest.fixture(autouse=True)
+def empty_body_cache():
+    http_cache._bodies.clear()
+
+
+@pytest.mark.parametrize("size", [10, COMPRESS_MIN_BYTES * 4])
+@pytest.mark.parametrize("stored", [True, False], ids=["stored", "cold"])
+def test_304_etag_matches_the_200(size, stored):
+    rows = [{"id": str(i), "updated_at": "2024-01-01", "text": "x" * (size // 10)} for i in range(10)]
+    etag = etag_for(rows)
+    ok = cached_json(_request(accept_encoding="gzip"), lambda: rows, etag, public=True)
+    assert ok.status_code == 200
+    assert ("content-encoding" in ok.headers) == (size > COMPRESS_MIN_BYTES)
+    if not stored:
+        http_cache._bodies.clear()
+
+    revalidated = cached_json(
+        _request(accept_encoding="gzip", if_none_match=ok.headers["etag"]), _unbuilt, etag, public=True
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == ok.headers["etag"]
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('"other", W/"{base}-gzip"', '"{base}-gzip"'),
+    ('"{base}"', '"{base}"'),
+    ("*", '"{base}-gzip"'),
+    ('"{base}-deflate"', None),
+    ('"{base}x"', None),
+])
+def test_304_echoes_the_matched_coding(if_none_match, expected):
+    etag = '"abc123"'
+    base = etag.strip('"')
+    response = cached_json(
+        _request(accept_encoding="gzip", if_none_match=if_none_match.format(base=base)),
+        (lambda: []) if expected is None else _unbuilt, etag, public=False,
+    )
+    if expected is None:
+        assert response.status_code == 200
+    else:
+        assert response.status_code == 304
+        assert response.headers["etag"] == expected.format(base=base)
@@ -0,0 +1,48 @@
+"""
+Sketch quantiles against exact ones (numpy method="higher")
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from market_stats import QUANTILES, STATS_RELATIVE_ACCURACY, QuantileSketch
+
+
+def _sketch(values):
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def _assert_close(sketch, values):
+    for _, q in QUANTILES:
+        exact = float(np.quantile(values, q, method="higher"))
+        assert abs(sketch.quantile(q) - exact) <= STATS_RELATIVE_ACCURACY * exact, (q, len(values))
+
+
+def test_small_segment():
+    values = [1234, 2400, 9999]
+    sketch = _sketch(values)
+    _assert_close(sketch, values)
+    assert sketch.quantile(0.9) == pytest.approx(9999, rel=STATS_RELATIVE_ACCURACY)
+
+
+@pytest.mark.parametrize("n", [1, 2, 4, 7, 10, 31, 200, 5000])
+def test_random_segments(n):
+    rng = random.Random(n)
+    values = [rng.lognormvariate(8, 1) for _ in range(n)]
+    _assert_close(_sketch(values), values)
+
+
+def test_remove_and_merge():
+    rng = random.Random(7)
+    values = [float(rng.randrange(1500, 12000, 50)) for _ in range(400)]
+    a, b = _sketch(values[:250]), _sketch(values[250:])
+    for value in values[:40]:
+        a.remove(value)
+    a.merge(b)
+    assert a.count == 360
+    _assert_close(a, values[40:])
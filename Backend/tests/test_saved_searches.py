@@ -0,0 +1,141 @@
+"""
+The saved-search match index must agree with filters.matches, and the
+per-user cap must hold in the database
+"""
+
+import asyncio
+import random
+
+import pytest
+
+import saved_searches
+from conftest import make_user, new_id
+from filters import matches
+from models import PropertyFilters
+from saved_searches import MatchIndex, create_search
+from sql_client import AsyncSqlClient
+from synthetic import LOCATIONS, make_listings
+from transit import STATIONS, with_transit
+
+LOCATION_NAMES = [name for name, _, _ in LOCATIONS]
+# More distinct names than the 64 location bits, so some searches take the uncommon-location path
+EXTRA_LOCATIONS = [f"Estate {i}" for i in range(60)]
+WORDS = ["modern", "bright", "renovated", "kitchen", "gym", "bedok", "mrt", "balcony", "corner unit"]
+
+
+def _random_filters(rng: random.Random) -> dict:
+    f = {}
+    maybe = lambda p: rng.random() < p  # noqa: E731
+    if maybe(0.5):
+        f["listing_type"] = rng.choice(["rent", "sale"])
+    if maybe(0.4):
+        f["property_types"] = rng.sample(["hdb", "condo", "landed"], rng.randint(1, 2))
+    if maybe(0.3):
+        f["locations"] = rng.sample(LOCATION_NAMES + EXTRA_LOCATIONS, rng.randint(1, 4))
+    if maybe(0.6):
+        scale = 1 if f.get("listing_type") == "rent" or maybe(0.5) else 400
+        low = rng.randrange(1000, 9000, 250) * scale
+        if maybe(0.7):
+            f["min_price"] = low
+        if maybe(0.7):
+            # Sometimes an empty range (max below min)
+            f["max_price"] = low + rng.randrange(-500, 6000, 250) * scale
+    for name, top in (("bedrooms", 9), ("bathrooms", 5)):
+        if maybe(0.4):
+            f[f"min_{name}"] = rng.randint(0, top)
+        if maybe(0.3):
+            f[f"max_{name}"] = rng.randint(0, top)
+    if maybe(0.3):
+        f["min_size"] = rng.randrange(400, 2500, 50)
+    if maybe(0.2):
+        f["max_size"] = rng.randrange(800, 3600, 50)
+    if maybe(0.15):
+        f["search"] = rng.choice(WORDS)
+    if maybe(0.1):
+        f["max_station_distance"] = rng.randrange(200, 2000, 100)
+        if maybe(0.5):
+            f["station"] = rng.choice(STATIONS).id
+    return f
+
+
+def _listings(rng: random.Random):
+    rows = make_listings(150, seed=rng.randint(0, 10**6), owners=10)
+    for row in rows:
+        if rng.random() < 0.1:
+            row["bedrooms"] = rng.randint(6, 9)
+        if rng.random() < 0.05:
+            row["lat"] = row["lng"] = None
+        with_transit(row)
+    return rows
+
+
+def _expected(searches, row):
+    return {
+        (s["id"], s["user_id"])
+        for s in searches.values()
+        if s["user_id"] != row["owner_id"] and matches(s["model"], row)
+    }
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_match_index_agrees_with_filters(monkeypatch, seed):
+    # Small buffers and leaves so a few thousand searches build trees with
+    # inner nodes, flush buffers and merge trees many times
+    monkeypatch.setattr(saved_searches, "BUFFER_SIZE", 16)
+    monkeypatch.setattr(saved_searches, "LEAF_SIZE", 4)
+    rng = random.Random(seed)
+    rows = _listings(rng)
+    # Some searches belong to listing owners (their own listings are skipped)
+    users = [new_id() for _ in range(40)] + sorted({row["owner_id"] for row in rows})
+
+    def search():
+        filters = _random_filters(rng)
+        return {"id": new_id(), "user_id": rng.choice(users), "filters": filters, "model": PropertyFilters(**filters)}
+
+    searches = {s["id"]: s for s in (search() for _ in range(1500))}
+    index = MatchIndex()
+    index.reset(searches.values())
+    for _ in range(4):
+        # Added searches go through the buffers; removals leave tombstones
+        # that the next merges drop
+        for _ in range(800):
+            s = search()
+            searches[s["id"]] = s
+            index.add(s)
+        for search_id in rng.sample(sorted(searches), 300):
+            index.remove(search_id)
+            del searches[search_id]
+    gone = rng.choice(users)
+    index.remove_user(gone)
+    searches = {k: s for k, s in searches.items() if s["user_id"] != gone}
+
+    assert len(index) == len(searches)
+    assert max(len(s.trees) for bands in index.partitions.values() for s in bands.values()) > 1
+    hits = 0
+    for row in rows:
+        expected = _expected(searches, row)
+        assert set(index.match(row)) == expected, row["id"]
+        hits += len(expected)
+    assert hits, "no listing matched any search: the comparison would be vacuous"
+
+
+def test_saved_search_cap_holds_under_concurrent_creates(run, tmp_path, monkeypatch):
+    monkeypatch.setattr(saved_searches, "SAVED_SEARCHES_PER_USER", 3)
+    monkeypatch.setattr(saved_searches, "match_index", MatchIndex())
+    # A file database with several connections, as deployed, so the
+    # creates really run concurrently
+    db = AsyncSqlClient(f"sqlite:///{tmp_path / 'cap.db'}", pool_size=8)
+    user = new_id()
+
+    async def burst():
+        await db.table("users").insert(make_user(user, "hunter")).execute()
+        return await asyncio.gather(*(create_search(db, user, f"s{i}", {"min_bedrooms": i}) for i in range(8)))
+
+    try:
+        created = [row for row in run(burst()) if row is not None]
+        stored = run(db.table("saved_searches").select("id").eq("user_id", user).execute()).data
+        extra = run(create_search(db, user, "one more", {}))
+    finally:
+        run(db.aclose())
+    assert len(created) == 3 and len(stored) == 3
+    assert extra is None
@@ -0,0 +1,50 @@
+"""
+The SQL schema files must agree with each other and with sql_client.SCHEMA
+"""
+
+import os
+import re
+
+from sql_client import SCHEMA
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+
+# Listing columns bulk_update_properties never takes from the request
+NOT_UPDATED = {"id", "owner_id", "is_active", "created_at", "updated_at"}
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(BACKEND, name)) as f:
+        return f.read()
+
+
+def _functions(sql: str):
+    return re.findall(r"CREATE OR REPLACE FUNCTION (\w+)\(", sql)
+
+
+def test_each_function_is_defined_once():
+    names = _functions(_read("database_schema.sql")) + _functions(_read("properties_schema.sql"))
+    duplicated = {name for name in names if names.count(name) > 1} - {"thumbnail", "update_updated_at_column"}
+    assert not duplicated
+
+
+def test_bulk_update_writes_every_listing_column():
+    sql = _read("properties_schema.sql")
+    body = sql[sql.index("FUNCTION bulk_update_properties"):]
+    body = body[:body.index("$$ LANGUAGE")]
+    assigned = set(re.findall(r"(\w+) = COALESCE\(i\.\1, p\.\1\)", body))
+    record = body[body.index("AS i("):]
+    declared = set(re.findall(r"(\w+) (?:UUID|TEXT|NUMERIC|INTEGER|JSONB|TEXT\[\])", record)) - {"id"}
+    assert assigned == declared == set(SCHEMA["properties"]) - NOT_UPDATED
+
+
+def _not_null_columns(sql: str):
+    table = sql[sql.index("CREATE TABLE IF NOT EXISTS properties ("):]
+    table = table[:table.index("\n);")]
+    return {line.split()[0] for line in table.splitlines()[1:] if "NOT NULL" in line}
+
+
+def test_schemas_agree_on_required_listing_columns():
+    required = _not_null_columns(_read("properties_schema.sql"))
+    assert required == _not_null_columns(_read("database_schema.sql"))
+    assert "location" not in required
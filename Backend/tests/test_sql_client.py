@@ -0,0 +1,198 @@
+"""
+The SQL engine must return what PostgREST would for the queries the app builds
+"""
+
+import pytest
+
+from conftest import make_user, new_id, seed_listings
+from database import Database
+from filters import apply_filters, matches
+from models import PropertyFilters
+from pagination import SORTS, apply_keyset, apply_sort, sort_key
+from rest_client import APIError, AsyncPostgrestClient, quote
+from sql_client import AsyncSqlClient
+from synthetic import make_listings
+from transit import with_transit
+
+# Values with the characters PostgREST lists and groups are split on
+AWKWARD_LOCATION = 'Tiong Bahru, (East) "Estate"'
+AWKWARD_TITLE = 'Loft, (renovated) "A" \\ unit'
+
+
+@pytest.fixture
+def listings(db, run):
+    rows = make_listings(150, seed=11, owners=3)
+    rows[0].update(location=AWKWARD_LOCATION, title=AWKWARD_TITLE)
+    rows[1].update(location=AWKWARD_LOCATION)
+    rows[2].update(lat=None, lng=None)
+    for row in rows[3:40:4]:
+        row["price"] = 3000.0
+    run(seed_listings(db, rows))
+    return rows
+
+
+def _ids(run, query):
+    return {row["id"] for row in run(query.execute()).data}
+
+
+def test_both_clients_implement_the_storage_interface():
+    assert isinstance(AsyncSqlClient("sqlite:///:memory:"), Database)
+    assert isinstance(AsyncPostgrestClient("http://localhost", "key"), Database)
+
+
+OPERATORS = [
+    (lambda q: q.eq("bedrooms", 3), lambda r: r["bedrooms"] == 3),
+    (lambda q: q.neq("listing_type", "rent"), lambda r: r["listing_type"] != "rent"),
+    (lambda q: q.gt("price", 3000), lambda r: r["price"] > 3000),
+    (lambda q: q.gte("price", 3000), lambda r: r["price"] >= 3000),
+    (lambda q: q.lt("size", 1000), lambda r: r["size"] < 1000),
+    (lambda q: q.lte("size", 1000), lambda r: r["size"] <= 1000),
+    (lambda q: q.ilike("title", "*BRIGHT*"), lambda r: "bright" in r["title"].lower()),
+    (lambda q: q.in_("location", [AWKWARD_LOCATION, "Bedok"]), lambda r: r["location"] in (AWKWARD_LOCATION, "Bedok")),
+    (lambda q: q.in_("bedrooms", []), lambda r: False),
+    (lambda q: q.eq("location", AWKWARD_LOCATION), lambda r: r["location"] == AWKWARD_LOCATION),
+    (lambda q: q.eq("title", AWKWARD_TITLE), lambda r: r["title"] == AWKWARD_TITLE),
+    (lambda q: q.or_("lat.is.null"), lambda r: r["lat"] is None),
+    (lambda q: q.or_("is_active.is.true"), lambda r: True),
+    (lambda q: q.or_("bedrooms.not.eq.3"), lambda r: r["bedrooms"] != 3),
+    (lambda q: q.or_(f"location.in.({quote(AWKWARD_LOCATION)},Bedok)"), lambda r: r["location"] in (AWKWARD_LOCATION, "Bedok")),
+    (lambda q: q.or_(f"title.eq.{quote(AWKWARD_TITLE)},bedrooms.gte.5"), lambda r: r["title"] == AWKWARD_TITLE or r["bedrooms"] >= 5),
+    (lambda q: q.or_("and(bedrooms.eq.2,price.lt.5000),and(bedrooms.eq.4,listing_type.eq.sale)"),
+     lambda r: (r["bedrooms"] == 2 and r["price"] < 5000) or (r["bedrooms"] == 4 and r["listing_type"] == "sale")),
+    (lambda q: q.lte("nearby_stations->tampines", 1200), lambda r: (r["nearby_stations"] or {}).get("tampines", 10**9) <= 1200),
+    (lambda q: q.embed("property_stations!inner()").eq("property_stations.station", "tampines").gte("bedrooms", 3),
+     lambda r: "tampines" in (r["nearby_stations"] or {}) and r["bedrooms"] >= 3),
+]
+
+
+@pytest.mark.parametrize("build, expected", OPERATORS)
+def test_operators(db, run, listings, build, expected):
+    want = {row["id"] for row in listings if expected(row)}
+    assert _ids(run, build(db.table("properties").select("id"))) == want
+
+
+FILTERS = [
+    PropertyFilters(),
+    PropertyFilters(listing_type="sale", property_types=["condo", "landed"]),
+    PropertyFilters(locations=[AWKWARD_LOCATION, "Bedok", "Yishun"]),
+    PropertyFilters(min_price=2000, max_price=6000, min_bedrooms=2, max_bedrooms=4),
+    PropertyFilters(min_bathrooms=2, min_size=900, max_size=2500),
+    PropertyFilters(search="renovated"),
+    PropertyFilters(search='(renovated) "a"'),
+    PropertyFilters(search="tiong bahru, (east)"),
+    PropertyFilters(station="tampines", max_station_distance=1500),
+    PropertyFilters(max_station_distance=500),
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_apply_filters_matches_in_memory(db, run, listings, filters):
+    want = {row["id"] for row in listings if matches(filters, row)}
+    assert want or filters.search, "filter selects nothing: the comparison would be vacuous"
+    assert _ids(run, apply_filters(db.table("properties").select("id"), filters)) == want
+
+
+@pytest.mark.parametrize("sort", list(SORTS))
+def test_keyset_or_combined_with_search_or(db, run, listings, sort):
+    """Two ``or`` groups in one query: the search terms and the keyset branches"""
+    filters = PropertyFilters(search="bedroom")
+    rows = sorted(
+        (row for row in listings if matches(filters, row) and (sort != "transit" or row["station_distance_m"] is not None)),
+        key=lambda row: sort_key(sort, row),
+    )
+    descending = SORTS[sort][0][1]
+    if descending:
+        rows.reverse()
+    after = sort_key(sort, rows[len(rows) // 3])
+    query = apply_keyset(apply_sort(apply_filters(db.table("properties").select("id"), filters), sort), sort, after)
+    assert [row["id"] for row in run(query.execute()).data] == [row["id"] for row in rows[len(rows) // 3 + 1:]]
+
+
+def test_embed_and_count(db, run, listings):
+    user = new_id()
+    run(db.table("users").insert(make_user(user, "hunter")).execute())
+    liked = [row["id"] for row in listings[:5]]
+    run(db.table("favorites").insert([{"user_id": user, "property_id": pid} for pid in liked]).execute())
+    run(db.table("properties").update({"is_active": False}).eq("id", liked[0]).execute())
+
+    result = run(
+        db.table("favorites").select("property_id,property:properties!inner(id,title,thumbnail)", count="exact")
+        .eq("user_id", user).eq("property.is_active", True).execute()
+    )
+    assert result.count == 4
+    assert {row["property"]["id"] for row in result.data} == set(liked[1:])
+    assert all(row["property"]["thumbnail"].endswith("/0.jpg") for row in result.data)
+
+
+def test_transaction_rolls_back(db, run, listings):
+    user = make_user(new_id(), "hunter")
+
+    async def failing():
+        async with db.transaction():
+            await db.table("users").insert(user).execute()
+            await db.table("properties").update({"price": 1.0}).eq("id", listings[0]["id"]).execute()
+            raise RuntimeError("abort")
+
+    with pytest.raises(RuntimeError):
+        run(failing())
+    assert not run(db.table("users").select("id").eq("id", user["id"]).execute()).data
+    price = run(db.table("properties").select("price").eq("id", listings[0]["id"]).execute()).data[0]["price"]
+    assert price == listings[0]["price"]
+
+
+def test_unique_violation_is_23505(db, run, listings):
+    user = make_user(new_id(), "hunter")
+    run(db.table("users").insert(user).execute())
+    with pytest.raises(APIError) as error:
+        run(db.table("users").insert(dict(user, id=new_id())).execute())
+    assert error.value.code == "23505"
+
+
+def test_bulk_update_properties(db, run, listings):
+    owner = listings[0]["owner_id"]
+    mine = [row for row in listings if row["owner_id"] == owner][:3]
+    other = next(row for row in listings if row["owner_id"] != owner)
+    items = [
+        {"id": mine[0]["id"], "price": 4321.0, "title": None},
+        {"id": mine[1]["id"], "bedrooms": 9},
+        {"id": other["id"], "price": 1.0},
+        {"id": new_id(), "price": 1.0},
+    ]
+    updated = run(db.rpc("bulk_update_properties", {"p_owner_id": owner, "p_items": items}).execute()).data
+    assert [row["id"] for row in updated] == [mine[0]["id"], mine[1]["id"]]
+
+    stored = {row["id"]: row for row in run(db.table("properties").select("*").execute()).data}
+    assert stored[mine[0]["id"]]["price"] == 4321.0
+    assert stored[mine[0]["id"]]["title"] == mine[0]["title"]  # null keeps the current value
+    assert stored[mine[1]["id"]]["bedrooms"] == 9
+    assert stored[mine[2]["id"]]["price"] == mine[2]["price"]
+    assert stored[other["id"]]["price"] == other["price"]
+
+
+def test_bulk_deactivate_properties(db, run, listings):
+    owner = listings[0]["owner_id"]
+    mine = [row["id"] for row in listings if row["owner_id"] == owner][:4]
+    other = next(row["id"] for row in listings if row["owner_id"] != owner)
+    result = run(db.rpc("bulk_deactivate_properties", {"p_owner_id": owner, "p_ids": mine + [other]}).execute()).data
+    assert {row["id"] for row in result} == set(mine)
+
+    inactive = _ids(run, db.table("properties").select("id").eq("is_active", False))
+    assert inactive == set(mine)
+    assert run(db.rpc("bulk_deactivate_properties", {"p_owner_id": owner, "p_ids": []}).execute()).data == []
+
+
+def test_property_stations_follow_nearby_stations(db, run, listings):
+    moved, deleted = listings[3], listings[4]
+    run(db.table("properties").update(with_transit({"lat": 1.3521, "lng": 103.9448})).eq("id", moved["id"]).execute())
+    run(db.table("properties").update({"nearby_stations": None}).eq("id", listings[5]["id"]).execute())
+    run(db.table("properties").delete().eq("id", deleted["id"]).execute())
+
+    stored = run(db.table("properties").select("id,nearby_stations").execute()).data
+    expected = {(row["id"], station, metres) for row in stored for station, metres in (row["nearby_stations"] or {}).items()}
+    indexed = run(db.table("property_stations").select("property_id,station,distance_m").execute()).data
+    assert {(row["property_id"], row["station"], row["distance_m"]) for row in indexed} == expected
+    assert moved["id"] in {row["property_id"] for row in indexed}
+
+    # A filter-only embed adds no key to the rows
+    row = run(db.table("properties").select("id").embed("property_stations!inner()").limit(1).execute()).data[0]
+    assert set(row) == {"id"}
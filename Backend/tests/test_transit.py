@@ -0,0 +1,84 @@
+"""
+Transit columns are filled by the backfill and kept by bulk updates
+"""
+
+from datetime import datetime, timezone
+
+from fastapi import BackgroundTasks
+
+import routes.properties
+from backfill_transit import backfill
+from bulk import update_listings, validate
+from catalog import ListingCatalog
+from conftest import seed_listings
+from models import BulkPropertyUpdate, PropertyUpdate, UserResponse
+from synthetic import make_listings
+from transit import TRANSIT_COLUMNS, transit_fields, with_transit
+
+
+def _stored(db, run):
+    return {row["id"]: row for row in run(db.table("properties").select("*").execute()).data}
+
+
+def test_backfill_fills_missing_columns_once(db, run):
+    rows = make_listings(30, seed=5, owners=3)
+    rows[0]["lat"] = rows[0]["lng"] = None
+    run(seed_listings(db, rows))
+    run(db.table("properties").update({column: None for column in TRANSIT_COLUMNS}).execute())
+
+    assert run(backfill(db, chunk_size=7, dry_run=True)) == (30, 29)
+    assert run(backfill(db, chunk_size=7)) == (30, 29)
+    stored = _stored(db, run)
+    for row in rows[1:]:
+        assert {k: stored[row["id"]][k] for k in TRANSIT_COLUMNS} == transit_fields(row["lat"], row["lng"])
+    assert run(backfill(db, chunk_size=7)) == (30, 0)
+
+
+def test_backfill_clears_columns_of_listings_without_coordinates(db, run):
+    rows = make_listings(10, seed=7, owners=2)
+    run(seed_listings(db, rows))
+    cleared = [row["id"] for row in rows[:3]]
+    run(db.table("properties").update({"lat": None}).in_("id", cleared[:2]).execute())
+    run(db.table("properties").update({"lng": None}).eq("id", cleared[2]).execute())
+
+    assert run(backfill(db, chunk_size=4, dry_run=True)) == (10, 3)
+    assert run(backfill(db, chunk_size=4)) == (10, 3)
+    stored = _stored(db, run)
+    for property_id in cleared:
+        assert all(stored[property_id][k] is None for k in TRANSIT_COLUMNS)
+    for row in rows[3:]:
+        assert stored[row["id"]]["nearest_station"] == transit_fields(row["lat"], row["lng"])["nearest_station"]
+    assert run(backfill(db, chunk_size=4)) == (10, 0)
+
+
+def test_bulk_update_moves_transit_columns(db, run):
+    rows = make_listings(4, seed=6, owners=1)
+    run(seed_listings(db, rows))
+    moved = with_transit({"id": rows[0]["id"], "lat": 1.3521, "lng": 103.9448})
+    run(db.rpc("bulk_update_properties", {"p_owner_id": rows[0]["owner_id"], "p_items": [moved]}).execute())
+    stored = _stored(db, run)[rows[0]["id"]]
+    assert stored["nearest_station"] == moved["nearest_station"]
+    assert stored["nearby_stations"] == moved["nearby_stations"]
+
+
+def test_moving_one_coordinate_keeps_the_stored_other(db, run, monkeypatch):
+    rows = make_listings(3, seed=8, owners=1)
+    run(seed_listings(db, rows))
+    monkeypatch.setattr(routes.properties, "get_db", lambda: db)
+    monkeypatch.setattr(routes.properties, "catalog", ListingCatalog())
+    owner = UserResponse(
+        id=rows[0]["owner_id"], name="Agent", email="agent@example.com", user_type="agent",
+        created_at=datetime.now(tz=timezone.utc),
+    )
+
+    run(routes.properties.update_property(
+        rows[0]["id"], PropertyUpdate(lat=1.3521), BackgroundTasks(), current_user=owner
+    ))
+    valid, errors = validate([{"id": rows[1]["id"], "lng": 103.9448}], BulkPropertyUpdate)
+    assert not errors
+    results = run(update_listings(db, owner.id, valid, lambda row: None))
+    assert [result.status for result in results] == ["updated"]
+
+    stored = _stored(db, run)
+    for row, lat, lng in [(rows[0], 1.3521, rows[0]["lng"]), (rows[1], rows[1]["lat"], 103.9448)]:
+        assert {k: stored[row["id"]][k] for k in TRANSIT_COLUMNS} == transit_fields(lat, lng)
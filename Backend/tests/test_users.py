@@ -0,0 +1,40 @@
+"""
+Deleting an account takes its listings out of every in-memory view
+"""
+
+from datetime import datetime, timezone
+
+import routes.properties
+import routes.users
+from catalog import ListingCatalog
+from conftest import seed_listings
+from models import PropertyFilters, UserResponse
+from snapshot import ListingSnapshot
+from synthetic import make_listings
+
+
+def test_deleted_owner_listings_leave_the_catalogue(db, run, monkeypatch):
+    rows = make_listings(40, seed=9, owners=2)
+    run(seed_listings(db, rows))
+    owner = rows[0]["owner_id"]
+    mine = {row["id"] for row in rows if row["owner_id"] == owner}
+
+    catalog, snapshot = ListingCatalog(), ListingSnapshot()
+    catalog.register(snapshot)
+    catalog.register(routes.properties.page_cache)
+    catalog.reset(dict(row) for row in rows)
+    generation = routes.properties.page_cache.generation
+    monkeypatch.setattr(routes.properties, "catalog", catalog)
+    monkeypatch.setattr(routes.users, "catalog", catalog)
+    monkeypatch.setattr(routes.users, "get_db", lambda: db)
+
+    user = UserResponse(
+        id=owner, name="Agent", email="agent@example.com", user_type="agent", created_at=datetime.now(tz=timezone.utc)
+    )
+    run(routes.users.delete_user_profile(current_user=user))
+
+    assert not mine & set(catalog.rows)
+    listed = set(snapshot.query(PropertyFilters(), "newest", 100, rows=catalog.rows))
+    assert listed == {row["id"] for row in rows} - mine
+    assert routes.properties.page_cache.generation > generation
+    assert not run(db.table("properties").select("id").eq("owner_id", owner).execute()).data
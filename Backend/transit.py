@@ -0,0 +1,114 @@
+"""
+MRT station gazetteer and precomputed transit distances
+
+``mrt_stations.csv`` (bundled, no network access needed) lists the MRT
+stations with their coordinates. Every listing stores, next to its
+``lat``/``lng``:
+
+- ``nearest_station`` / ``station_distance_m``: the closest station id and
+  the straight-line distance to it in metres;
+- ``nearby_stations``: ``{station id: metres}`` for every station within
+  ``TRANSIT_RADIUS_M``.
+
+They are computed when a listing is created or moved (``with_transit`` on
+the write payloads) and for existing rows by ``backfill_transit.py``, so
+transit filters and the transit sort only compare stored numbers. Station
+ids are lower-case slugs of the names (``ang_mo_kio``) so they can be used
+as JSON keys in PostgREST filters.
+"""
+
+import csv
+import os
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+TRANSIT_RADIUS_M = int(os.getenv("TRANSIT_RADIUS_M", "2000"))
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "mrt_stations.csv")
+
+EARTH_RADIUS_M = 6_371_000
+
+TRANSIT_COLUMNS = ("nearest_station", "station_distance_m", "nearby_stations")
+
+
+class Station(NamedTuple):
+    id: str
+    name: str
+    lat: float
+    lng: float
+
+
+def station_id(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _load(path: str) -> List[Station]:
+    with open(path, newline="") as f:
+        return [Station(station_id(r["name"]), r["name"], float(r["lat"]), float(r["lng"])) for r in csv.DictReader(f)]
+
+
+STATIONS: List[Station] = _load(GAZETTEER_PATH)
+STATIONS_BY_ID: Dict[str, Station] = {s.id: s for s in STATIONS}
+
+_LAT = np.radians([s.lat for s in STATIONS])
+_LNG = np.radians([s.lng for s in STATIONS])
+
+
+def resolve_station(value: str) -> Optional[str]:
+    """Station id for an id or a station name (any case), None when unknown"""
+    key = station_id(value)
+    return key if key in STATIONS_BY_ID else None
+
+
+def transit_fields(lat: Optional[float], lng: Optional[float]) -> Dict[str, Any]:
+    """The stored transit columns for a listing at ``lat``/``lng``"""
+    if lat is None or lng is None:
+        return {"nearest_station": None, "station_distance_m": None, "nearby_stations": None}
+    lat, lng = np.radians(float(lat)), np.radians(float(lng))
+    # Haversine against every station (a hundred-odd points)
+    a = np.sin((_LAT - lat) / 2) ** 2 + np.cos(lat) * np.cos(_LAT) * np.sin((_LNG - lng) / 2) ** 2
+    metres = np.rint(2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))).astype(int)
+    nearest = int(np.argmin(metres))
+    near = np.flatnonzero(metres <= TRANSIT_RADIUS_M)
+    near = near[np.argsort(metres[near], kind="stable")].tolist()
+    return {
+        "nearest_station": STATIONS[nearest].id,
+        "station_distance_m": int(metres[nearest]),
+        "nearby_stations": {STATIONS[i].id: int(metres[i]) for i in near},
+    }
+
+
+def moves_one_coordinate(payload: Dict[str, Any]) -> bool:
+    """Whether a write sets ``lat`` or ``lng`` but not both"""
+    return ("lat" in payload) != ("lng" in payload)
+
+
+def with_transit(payload: Dict[str, Any], stored: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Add the transit columns to a write payload that sets the listing's coordinates.
+
+    A payload setting only one coordinate takes the other from ``stored``
+    (the listing's current row); without it the payload is left as is.
+    """
+    if "lat" in payload and "lng" in payload:
+        payload.update(transit_fields(payload["lat"], payload["lng"]))
+    elif stored is not None and moves_one_coordinate(payload):
+        payload.update(transit_fields(payload.get("lat", stored.get("lat")), payload.get("lng", stored.get("lng"))))
+    return payload
+
+
+def fill_transit(row: Dict[str, Any]) -> None:
+    """Compute the transit columns of a row read before they were backfilled"""
+    if row.get("nearby_stations") is None and row.get("lat") is not None and row.get("lng") is not None:
+        row.update(transit_fields(row["lat"], row["lng"]))
+
+
+def near_station(row: Dict[str, Any], station: Optional[str], max_distance: Optional[int]) -> bool:
+    """Whether ``row`` is within ``max_distance`` metres of ``station`` (or of any station)"""
+    if station is not None:
+        distance = (row.get("nearby_stations") or {}).get(station)
+        limit = TRANSIT_RADIUS_M if max_distance is None else max_distance
+        return distance is not None and distance <= limit
+    distance = row.get("station_distance_m")
+    return distance is not None and distance <= max_distance